@@ -0,0 +1,391 @@
+"""
+Opt-in localhost JSON API over the DivaDivaModule catalog, notes and items
+folder, so authoring tools can query what is already in memory instead of
+re-parsing the CSV files for every question.
+
+POST /rpc takes a JSON-RPC 2.0 request or a batch (a JSON array of
+requests) and answers them all in one response. GET /modules, /items and
+/notes stream NDJSON, one record per line, with chunked transfer encoding.
+The server binds to 127.0.0.1 only, and rejects requests whose Host is not
+local or whose POST body is not application/json, so web pages cannot reach
+it. Nothing here imports tkinter.
+
+Example:
+    curl -s localhost:8765/rpc -H 'Content-Type: application/json' \\
+        -d '[{"jsonrpc": "2.0", "id": 1, "method": "modules.search", "params": {"term": "miku"}}]'
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from divadiva_core import (
+    NOTES_CSV, file_stamp, merged_items_index, split_objects, module_display_name,
+    load_notes, FuzzyModuleIndex, SlotItemIndex, NoteSearchIndex
+)
+
+DEFAULT_API_PORT = 8765
+MAX_REQUEST_BYTES = 4 * 1024 * 1024
+STREAM_FLUSH_LINES = 500 # Records per chunk of a streamed response
+LOCAL_HOSTS = ('127.0.0.1', 'localhost', '[::1]')
+
+MODULE_FIELDS = ['Module ID', 'Name (EN)', 'Name (JP)', 'Character', 'Source', 'COS ID']
+
+
+class ApiError(Exception):
+    """Raised by a method for a JSON-RPC error response; data, if given, goes in the error object."""
+    def __init__(self, message, code=-32602, data=None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+class ApiContext:
+    """
+    What the API answers from. modules is the live catalog dict, read under
+    lock; the owner takes the same lock while changing the catalog and calls
+    catalog_changed() afterwards. Search and slot indexes are built on first
+    use and then updated per changed module. item_roots fixes the folders
+    objects are resolved in; by default the configured roots are used.
+    open_objects, if given, is called with a list of object names to open
+    them in the viewer. It returns {'error': message}, or a dict with the
+    opened (object name, path) pairs and the queued and missing names.
+    """
+    def __init__(self, modules, lock=None, item_roots=None, open_objects=None):
+        self.modules = modules
+        self.lock = lock or threading.RLock()
+        self.item_roots = item_roots
+        self.open_objects = open_objects
+        self._search_index = None
+        self._slot_index = None
+        self._notes = (None, {}, []) # (file_stamp(NOTES_CSV), notes, order)
+        self._note_index = NoteSearchIndex()
+
+    def set_modules(self, modules):
+        with self.lock:
+            self.modules = modules
+            self._search_index = self._slot_index = None
+            self._note_index.stamp = None
+
+    def catalog_changed(self, changed_ids):
+        with self.lock:
+            if self._search_index is not None:
+                self._search_index.update(self.modules, changed_ids)
+            if self._slot_index is not None:
+                self._slot_index.update(self.modules, changed_ids)
+            self._note_index.stamp = None # Indexed module names and objects may be stale
+
+    def search_index(self):
+        # Callers hold self.lock
+        if self._search_index is None:
+            self._search_index = FuzzyModuleIndex()
+            self._search_index.rebuild(self.modules)
+        return self._search_index
+
+    def slot_index(self):
+        # Callers hold self.lock
+        if self._slot_index is None:
+            self._slot_index = SlotItemIndex()
+            self._slot_index.rebuild(self.modules)
+        return self._slot_index
+
+    def notes(self):
+        """(notes, order) from NOTES_CSV, re-read only when the file changes."""
+        with self.lock:
+            stamp = file_stamp(NOTES_CSV)
+            if stamp is None or stamp != self._notes[0]:
+                notes, order = load_notes()
+                self._notes = (stamp, notes, order)
+            return self._notes[1], self._notes[2]
+
+    def note_index(self):
+        notes, _ = self.notes()
+        with self.lock:
+            self._note_index.sync(notes, self.modules)
+            return self._note_index
+
+
+# --- Records ---
+
+def module_record(module, with_items=False):
+    record = {field: module.get(field, '') for field in MODULE_FIELDS}
+    record['Display Name'] = module_display_name(module)
+    record['Item Count'] = len(module['Items'])
+    if with_items:
+        record['Items'] = module['Items']
+    return record
+
+def _note_record(name, item):
+    module_id, item_id, desc = item
+    return {'note': name, 'module_id': module_id, 'item_id': item_id, 'description': desc}
+
+def _param(params, name, kind, default=None):
+    value = params.get(name, default)
+    if value is None or isinstance(value, kind):
+        return value
+    raise ApiError(f"'{name}' must be {getattr(kind, '__name__', kind)}")
+
+
+# --- Methods: each takes (context, params) and returns a JSON-able value ---
+
+def api_modules_get(context, params):
+    """{"ids": [...]} or {"id": ...} -> module records with items (null for unknown IDs)."""
+    ids = _param(params, 'ids', list)
+    if ids is None:
+        ids = [_param(params, 'id', str, '')]
+    with context.lock:
+        found = [context.modules.get(str(mid)) for mid in ids]
+    records = [module_record(module, with_items=True) if module else None for module in found]
+    return records if 'ids' in params else records[0]
+
+def api_modules_search(context, params):
+    """{"term", "limit": 50, "character"} -> module records, best match first."""
+    term = _param(params, 'term', str, '')
+    limit = _param(params, 'limit', int, 50)
+    character = (_param(params, 'character', str) or '').casefold()
+    with context.lock:
+        modules = context.modules
+        accept = (lambda mid: modules[mid].get('Character', '').casefold() == character) if character else None
+        ranked = context.search_index().search(term, limit, accept)
+        return [module_record(modules[mid]) for mid in ranked[:limit]]
+
+def api_items_resolve(context, params):
+    """{"objects": [...]} -> {object name: .farc path or null}; values may list several objects."""
+    index = merged_items_index(context.item_roots)
+    resolved = {}
+    for value in _param(params, 'objects', list, []):
+        for name in split_objects(str(value)):
+            resolved[name] = index.get(name.lower())
+    return resolved
+
+def api_items_slot(context, params):
+    """{"character", "type"} -> the distinct objects that fit that slot."""
+    character = _param(params, 'character', str, '')
+    item_type = _param(params, 'type', str, '')
+    with context.lock:
+        candidates = context.slot_index().candidates(character, item_type)
+        return [{'Object(s)': candidate['Object(s)'], 'sources': [list(source) for source in candidate['sources']]}
+                for candidate in candidates]
+
+def api_notes_list(context, params):
+    """{"name"} (optional) -> note items of that note, or of every note."""
+    notes, order = context.notes()
+    name = _param(params, 'name', str)
+    names = [name] if name else order
+    return [_note_record(note, item) for note in names for item in notes.get(note, [])]
+
+def api_notes_search(context, params):
+    """{"query", "limit": 100} -> note items whose words match every query word by prefix."""
+    query = _param(params, 'query', str, '')
+    limit = _param(params, 'limit', int, 100)
+    with context.lock: # Notes and their index from the same read of notes.csv
+        index = context.note_index()
+        notes, _ = context.notes()
+        return [_note_record(name, notes[name][position]) for name, position in index.search(query, limit)]
+
+def api_viewer_open(context, params):
+    """
+    {"objects": [...]} -> {"opened": count, "queued": [names waiting for a
+    viewer window]}. A viewer that is not set up, or objects not found in
+    the item folders, are errors; the latter lists them as data.missing.
+    """
+    if context.open_objects is None:
+        raise ApiError("No viewer is available in this process", code=-32000)
+    objects = [str(value) for value in _param(params, 'objects', list, [])]
+    result = context.open_objects(objects)
+    if 'error' in result:
+        raise ApiError(result['error'], code=-32000)
+    if result['missing']:
+        raise ApiError(f"{len(result['missing'])} object(s) not found in the item folders", code=-32001,
+                       data={'missing': result['missing'], 'opened': len(result['opened'])})
+    return {'opened': len(result['opened']), 'queued': result['queued']}
+
+API_METHODS = {
+    'modules.get': api_modules_get,
+    'modules.search': api_modules_search,
+    'items.resolve': api_items_resolve,
+    'items.slot': api_items_slot,
+    'notes.list': api_notes_list,
+    'notes.search': api_notes_search,
+    'viewer.open': api_viewer_open,
+}
+
+def handle_rpc(context, request):
+    """Answers one JSON-RPC request dict. Returns None for notifications (no id)."""
+    if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+        return {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32600, 'message': "Invalid request"}}
+    request_id = request.get('id')
+    method = API_METHODS.get(request['method'])
+    params = request.get('params') or {}
+    try:
+        if method is None:
+            raise ApiError(f"Unknown method '{request['method']}'", code=-32601)
+        if not isinstance(params, dict):
+            raise ApiError("params must be an object")
+        response = {'jsonrpc': '2.0', 'id': request_id, 'result': method(context, params)}
+    except ApiError as e:
+        error = {'code': e.code, 'message': str(e)}
+        if e.data is not None:
+            error['data'] = e.data
+        response = {'jsonrpc': '2.0', 'id': request_id, 'error': error}
+    except Exception as e:
+        print(f"API method {request['method']} failed: {e}")
+        response = {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': -32603, 'message': str(e)}}
+    return response if 'id' in request else None
+
+
+# --- Streams: each takes (context, query) and yields JSON-able records ---
+
+def stream_modules(context, query):
+    character = query.get('character', '').casefold()
+    source = query.get('source', '').casefold()
+    with context.lock:
+        snapshot = list(context.modules.values()) # Module dicts are replaced, never edited, on reload
+    for module in snapshot:
+        if character and module.get('Character', '').casefold() != character:
+            continue
+        if source and module.get('Source', '').casefold() != source:
+            continue
+        yield module_record(module, with_items=query.get('items') == '1')
+
+def stream_items(context, query):
+    character = query.get('character', '').casefold()
+    item_type = query.get('type', '').casefold()
+    with context.lock:
+        snapshot = list(context.modules.values())
+    for module in snapshot:
+        if character and module.get('Character', '').casefold() != character:
+            continue
+        for item in module['Items']:
+            if item_type and not item.get('Type', '').casefold().startswith(item_type):
+                continue
+            yield dict(item, **{'Module ID': module['Module ID'], 'Character': module.get('Character', '')})
+
+def stream_notes(context, query):
+    notes, order = context.notes()
+    for name in ([query['name']] if query.get('name') else order):
+        for item in notes.get(name, []):
+            yield _note_record(name, item)
+
+API_STREAMS = {
+    '/modules': stream_modules,
+    '/items': stream_items,
+    '/notes': stream_notes,
+}
+
+
+# --- HTTP ---
+
+class _ApiRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # Keep-alive, so many small queries share one connection
+    server_version = 'DivaDivaModule'
+
+    def log_message(self, format, *args):
+        pass # Quiet unless something fails
+
+    def _local_request(self):
+        # A local Host header rules out pages on other sites reaching us through DNS rebinding
+        host = self.headers.get('Host') or ''
+        host = host.split(']')[0] + ']' if host.startswith('[') else host.split(':')[0]
+        if host not in LOCAL_HOSTS:
+            self._send_json(403, {'error': "Only local requests are served"})
+            return False
+        return True
+
+    def _send_json(self, status, value):
+        body = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self._local_request():
+            return
+        if urlsplit(self.path).path != '/rpc':
+            self._send_json(404, {'error': "Not found"})
+            return
+        if not (self.headers.get('Content-Type') or '').startswith('application/json'):
+            self._send_json(415, {'error': "Content-Type must be application/json"})
+            return
+        length = self.headers.get('Content-Length')
+        if length is None:
+            self._send_json(411, {'error': "Content-Length is required"})
+            return
+        if not length.strip().isdigit(): # Also rules out negative lengths, which would read to EOF
+            self._send_json(400, {'error': "Invalid Content-Length"})
+            self.close_connection = True
+            return
+        length = int(length)
+        if length > MAX_REQUEST_BYTES:
+            self._send_json(413, {'error': "Request too large"})
+            return
+        try:
+            request = json.loads(self.rfile.read(length) or b'null')
+        except ValueError:
+            self._send_json(400, {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32700, 'message': "Parse error"}})
+            return
+        context = self.server.context
+        if isinstance(request, list):
+            responses = [response for response in (handle_rpc(context, r) for r in request) if response is not None]
+        else:
+            responses = handle_rpc(context, request)
+        if responses is None or responses == []:
+            self.send_response(204)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        else:
+            self._send_json(200, responses)
+
+    def do_GET(self):
+        if not self._local_request():
+            return
+        url = urlsplit(self.path)
+        stream = API_STREAMS.get(url.path)
+        if stream is None:
+            self._send_json(404, {'error': "Not found", 'streams': sorted(API_STREAMS), 'methods': sorted(API_METHODS)})
+            return
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        lines = []
+        try:
+            for record in stream(self.server.context, query):
+                lines.append(json.dumps(record, ensure_ascii=False))
+                if len(lines) >= STREAM_FLUSH_LINES:
+                    self._write_chunk(lines)
+                    lines = []
+            self._write_chunk(lines)
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _write_chunk(self, lines):
+        if lines:
+            data = ('\n'.join(lines) + '\n').encode('utf-8')
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+
+
+class ApiServer:
+    """Serves an ApiContext over HTTP on 127.0.0.1 from a background thread."""
+    def __init__(self, context, port=DEFAULT_API_PORT):
+        self.context = context
+        self.port = port
+        self._httpd = None
+
+    def start(self):
+        """Binds and starts serving. Raises OSError if the port is taken."""
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', self.port), _ApiRequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.context = self.context
+        self.port = self._httpd.server_address[1]
+        threading.Thread(target=self._httpd.serve_forever, daemon=True, name="ApiServer").start()
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
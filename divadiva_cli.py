@@ -0,0 +1,270 @@
+"""
+Headless command-line interface to the DivaDivaModule catalog, notes and
+items folder. Reads the same data as the GUI but never imports tkinter or
+PIL, so it starts fast enough to be called in loops from build scripts.
+The packaged build ships it as divadiva-cli.exe next to divadivamodule.exe.
+
+Examples:
+    python divadiva_cli.py search "hatsune miku"
+    python divadiva_cli.py --format json show 12
+    python divadiva_cli.py items --character Miku --type hair
+    python divadiva_cli.py slot Miku Hair
+    python divadiva_cli.py resolve MIKITM001 MIKITM301
+    python divadiva_cli.py memory
+    python divadiva_cli.py serve --port 8765
+"""
+import argparse
+import csv
+import json
+import sys
+
+import divadiva_core as core
+
+
+def _tsv_value(value):
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\r', '\\r').replace('\n', '\\n')
+
+def emit(rows, columns, fmt):
+    """Writes rows (a list of dicts) as TSV with a header line, or as one JSON array."""
+    out = sys.stdout
+    if fmt == 'json':
+        json.dump([{column: row.get(column, '') for column in columns} for row in rows], out, ensure_ascii=False)
+        out.write('\n')
+        return
+    out.write('\t'.join(columns) + '\n')
+    for row in rows:
+        out.write('\t'.join(_tsv_value(row.get(column, '')) for column in columns) + '\n')
+
+MODULE_COLUMNS = ['Module ID', 'Name (EN)', 'Name (JP)', 'Character', 'Source', 'COS ID', 'Item Count']
+ITEM_COLUMNS = ['Module ID', 'Module', 'Character', 'Item ID', 'Object(s)', 'Type']
+NOTE_COLUMNS = ['Note', 'Module ID', 'Item ID', 'Description']
+
+def _module_row(module):
+    row = {column: module.get(column, '') for column in MODULE_COLUMNS}
+    row['Item Count'] = len(module['Items'])
+    return row
+
+def _sorted_ids(modules):
+    # Only the Module ID order is needed here, so skip building a full ModuleSorter
+    return sorted(modules, key=lambda mid: (0, int(mid), '') if mid.isdigit() else (1, 0, mid))
+
+
+def cmd_search(args):
+    modules = core.load_catalog()
+    if args.fuzzy:
+        index = core.FuzzyModuleIndex()
+        index.rebuild(modules)
+        order = {mid: pos for pos, mid in enumerate(_sorted_ids(modules))}
+        # Like the GUI, equally relevant matches go to the most used modules first
+        usage = core.UsageStats()
+        usage.load()
+        order.update((mid, rank - len(usage.order)) for rank, mid in enumerate(usage.order))
+        character = args.character.lower() if args.character else None
+        ranked = index.search(args.term, limit=args.limit or 100, order=order,
+                              accept=lambda mid: not character or modules[mid]['Character'].lower() == character)
+        rows = [_module_row(modules[mid]) for mid in ranked[:args.limit or None]]
+        emit(rows, MODULE_COLUMNS, args.format)
+        return 0 if rows else 1
+    term = args.term.lower()
+    rows = []
+    for mid in _sorted_ids(modules):
+        module = modules[mid]
+        if args.character and module['Character'].lower() != args.character.lower():
+            continue
+        if term in core.module_display_name(module).lower():
+            rows.append(_module_row(module))
+            if args.limit and len(rows) >= args.limit:
+                break
+    emit(rows, MODULE_COLUMNS, args.format)
+    return 0 if rows else 1
+
+def cmd_show(args):
+    modules = core.load_catalog()
+    module = modules.get(args.module_id)
+    if module is None:
+        print(f"Module '{args.module_id}' not found.", file=sys.stderr)
+        return 1
+    if args.format == 'json':
+        record = _module_row(module)
+        record['Names'] = {k: v for k, v in module['Names'].items() if k and k.startswith('Name (')}
+        record['Items'] = module['Items']
+        json.dump(record, sys.stdout, ensure_ascii=False)
+        sys.stdout.write('\n')
+    else:
+        rows = [dict(item, **{'Module ID': module['Module ID'], 'Module': module['Name (EN)'], 'Character': module['Character']})
+                for item in module['Items']]
+        emit(rows, ITEM_COLUMNS, args.format)
+    return 0
+
+def cmd_items(args):
+    modules = core.load_catalog()
+    item_type = args.type.lower() if args.type else None
+    rows = []
+    for mid in _sorted_ids(modules):
+        module = modules[mid]
+        if args.character and module['Character'].lower() != args.character.lower():
+            continue
+        for item in module['Items']:
+            if item_type and not item['Type'].lower().startswith(item_type):
+                continue
+            rows.append(dict(item, **{'Module ID': mid, 'Module': module['Name (EN)'], 'Character': module['Character']}))
+    emit(rows, ITEM_COLUMNS, args.format)
+    return 0 if rows else 1
+
+def cmd_slot(args):
+    modules = core.load_catalog()
+    index = core.SlotItemIndex()
+    index.rebuild(modules)
+    rows = [{'Object(s)': candidate['Object(s)'],
+             'Sources': ' '.join(f"{mid}/{item_id}" for mid, item_id in candidate['sources'])}
+            for candidate in index.candidates(args.character, args.type)]
+    emit(rows, ['Object(s)', 'Sources'], args.format)
+    return 0 if rows else 1
+
+def cmd_resolve(args):
+    index = core.merged_items_index(args.items_folder)
+    rows = []
+    missing = 0
+    for value in args.objects:
+        for name in core.split_objects(value):
+            path = index.get(name.lower(), '')
+            if not path:
+                missing += 1
+            rows.append({'Object': name, 'Path': path})
+    emit(rows, ['Object', 'Path'], args.format)
+    return 1 if missing else 0
+
+def cmd_notes(args):
+    notes, order = core.load_notes()
+    names = [args.name] if args.name else order
+    rows = [{'Note': name, 'Module ID': module_id, 'Item ID': item_id, 'Description': desc}
+            for name in names for module_id, item_id, desc in notes.get(name, [])]
+    emit(rows, NOTE_COLUMNS, args.format)
+    return 0 if rows or not args.name else 1
+
+def cmd_notes_export(args):
+    # Streams straight from notes.csv without building the notes dict
+    count = core.export_notes(core.iter_note_rows(core.NOTES_CSV), args.path)
+    print(f"Exported {count} item(s) to {args.path}", file=sys.stderr)
+    return 0
+
+def cmd_notes_import(args):
+    modules = core.load_catalog()
+    notes, order = core.load_notes()
+    stats = core.import_notes(
+        core.iter_note_rows(args.path), notes, order,
+        policy=args.policy, valid_items=core.catalog_item_keys(modules)
+    )
+    if not args.dry_run:
+        core.save_all_notes(notes)
+    emit([{key: stats[key] for key in ('added', 'updated', 'skipped', 'invalid')}],
+         ['added', 'updated', 'skipped', 'invalid'], args.format)
+    for name, module_id, item_id in stats['invalid_rows']:
+        print(f"Invalid row: note '{name}', module '{module_id}', item '{item_id}'", file=sys.stderr)
+    return 0
+
+def cmd_memory(args):
+    # Load what the GUI keeps resident and report where the memory went
+    import divadiva_diagnostics as diagnostics
+    diagnostics.start_memory_tracing()
+    modules = core.load_catalog()
+    core.load_notes()
+    if args.items:
+        core.merged_items_index(args.items_folder)
+    sorter = core.ModuleSorter()
+    sorter.rebuild(modules)
+    rows = [{'Section': section, 'Name': name, 'Count': count, 'Bytes': size}
+            for section, name, count, size in diagnostics.memory_report(modules=modules)]
+    emit(rows, ['Section', 'Name', 'Count', 'Bytes'], args.format)
+    return 0
+
+def cmd_serve(args):
+    # The GUI's API without the GUI: no viewer, so viewer.open is refused
+    import time
+    from divadiva_api import ApiContext, ApiServer
+    server = ApiServer(ApiContext(core.load_catalog(), item_roots=args.items_folder), args.port)
+    server.start()
+    print(f"Serving on http://127.0.0.1:{server.port} (Ctrl+C to stop)", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='divadiva_cli', description="Query the DivaDivaModule catalog without the GUI.")
+    parser.add_argument('--format', choices=['tsv', 'json'], default='tsv', help="Output format (default: tsv)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    search = commands.add_parser('search', help="Find modules whose display name contains a term")
+    search.add_argument('term')
+    search.add_argument('--character', help="Only modules of this character")
+    search.add_argument('--limit', type=int, default=0, help="Stop after this many results")
+    search.add_argument('--fuzzy', action='store_true', help="Rank results and tolerate typos, as the GUI search does")
+    search.set_defaults(func=cmd_search)
+
+    show = commands.add_parser('show', help="Show one module and its items")
+    show.add_argument('module_id')
+    show.set_defaults(func=cmd_show)
+
+    items = commands.add_parser('items', help="List items, optionally by character and type")
+    items.add_argument('--character')
+    items.add_argument('--type', help="Item type prefix, e.g. 'hair' or 'Hands (Te)'")
+    items.set_defaults(func=cmd_items)
+
+    slot = commands.add_parser('slot', help="List the distinct objects that fit a character's item slot")
+    slot.add_argument('character')
+    slot.add_argument('type', help="Exact item type, e.g. 'Hair'")
+    slot.set_defaults(func=cmd_slot)
+
+    resolve = commands.add_parser('resolve', help="Resolve object names to .farc paths in the item folders")
+    resolve.add_argument('objects', nargs='+')
+    resolve.add_argument('--items-folder', action='append',
+                         help="Folder to search instead of the configured item folders; repeat for several, first match wins")
+    resolve.set_defaults(func=cmd_resolve)
+
+    notes = commands.add_parser('notes', help="List FrankenNotes items, optionally of one note")
+    notes.add_argument('name', nargs='?')
+    notes.set_defaults(func=cmd_notes)
+
+    notes_export = commands.add_parser('notes-export', help="Export notes to a .csv or .jsonl file")
+    notes_export.add_argument('path')
+    notes_export.set_defaults(func=cmd_notes_export)
+
+    notes_import = commands.add_parser('notes-import', help="Merge notes from a .csv or .jsonl file")
+    notes_import.add_argument('path')
+    notes_import.add_argument('--policy', choices=list(core.NOTE_MERGE_POLICIES), default='skip',
+                              help="What to do when an imported item already exists in a note")
+    notes_import.add_argument('--dry-run', action='store_true', help="Report what would change without saving")
+    notes_import.set_defaults(func=cmd_notes_import)
+
+    memory = commands.add_parser('memory', help="Report memory used by the catalog and by each subsystem")
+    memory.add_argument('--items', action='store_true', help="Also index the item folders")
+    memory.add_argument('--items-folder', action='append', help="Folder to index instead of the configured item folders; repeatable")
+    memory.set_defaults(func=cmd_memory)
+
+    serve = commands.add_parser('serve', help="Serve the catalog, notes and items folder as a localhost JSON API")
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--items-folder', action='append',
+                       help="Folder to resolve objects in instead of the configured item folders; repeatable")
+    serve.set_defaults(func=cmd_serve)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        pass
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        return 0
+    except (OSError, ValueError, csv.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1980 @@
+"""
+Catalog, notes and items-folder logic shared by the DivaDivaModule GUI and
+its command-line interface. Nothing here imports tkinter or PIL.
+"""
+import csv
+import os
+import json
+import bisect
+import collections
+import contextlib
+import re
+import gc
+import heapq
+import itertools
+import operator
+import queue
+import threading
+import time
+# pickle, hashlib, socket, secrets, subprocess and concurrent.futures are
+# imported where they are used, so the CLI starts without paying for them
+
+# --- Default app data directory for everyone ---
+def get_app_dir():
+    # On Windows, use LOCALAPPDATA for application-specific data
+    # Example: C:\Users\YourUsername\AppData\Local\DivaDivaModule
+    app_data_path = os.getenv('LOCALAPPDATA')
+    if app_data_path:
+        return os.path.join(app_data_path, "DivaDivaModule")
+    else:
+        # Fallback for systems where LOCALAPPDATA might not be set (unlikely on Windows)
+        return os.path.expanduser("~/DivaDivaModule")
+
+APP_DIR = get_app_dir()
+NOTES_CSV = os.path.join(APP_DIR, "notes.csv")
+MODULES_CSV = os.path.join(APP_DIR, "modules_data.csv")
+SETTINGS_FILE = os.path.join(APP_DIR, "settings.json")
+IMAGES_FOLDER = os.path.join(APP_DIR, "images")
+# Define a dedicated items folder within the app directory
+ITEMS_FOLDER = os.path.join(APP_DIR, "items") # Added ITEMS_FOLDER
+# User and mod catalog fragments layered on top of MODULES_CSV, applied in filename order
+CATALOG_D_FOLDER = os.path.join(APP_DIR, "catalog.d")
+CACHE_FOLDER = os.path.join(APP_DIR, "cache")
+RECENT_ITEMS_FILE = os.path.join(APP_DIR, "recent_items.json")
+USAGE_FILE = os.path.join(APP_DIR, "usage.json") # Local, decayed use counts per module
+INSTANCE_SOCKET = os.path.join(APP_DIR, "instance.sock") # Unix socket of the running GUI
+INSTANCE_PORT_FILE = os.path.join(APP_DIR, "instance.port") # "port token" where AF_UNIX is unavailable
+
+# Define the OLD_APP_DIR for migration purposes (Linux-style path)
+OLD_APP_DIR = os.path.expanduser("~/.divadivamodule")
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+STARTER_MODULES_CSV = os.path.join(SCRIPT_DIR, "modules_data.csv")
+SCRIPT_IMAGES_SOURCE_DIR = os.path.join(SCRIPT_DIR, "images")
+
+
+# --- Module catalog ---
+
+def file_stamp(path):
+    """Returns (size, mtime_ns) for path, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+@contextlib.contextmanager
+def _gc_paused():
+    # Parsing builds millions of small acyclic objects; letting the cyclic
+    # collector scan them over and over adds a third or more to the time taken
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+def parse_modules_csv(path):
+    """Parses one catalog CSV into {Module ID: module}, de-duplicating items per module."""
+    modules = {}
+    with _gc_paused(), open(path, newline='', encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            module_id = row.get('Module ID')
+            if not module_id:
+                continue
+            if module_id not in modules:
+                modules[module_id] = {
+                    'Module ID': module_id,
+                    'Name (EN)': row.get('Name (EN)', ''),
+                    'Name (JP)': row.get('Name (JP)', ''),
+                    'Character': row.get('Character', ''),
+                    'Source': row.get('Source', ''),
+                    'COS ID': row.get('COS ID', ''),
+                    'Names': row,
+                    'Items': [],
+                    '_seen_items': set() # To track unique items for this module
+                }
+
+            current_module = modules[module_id]
+            item_data = {
+                'Item ID': row.get('Item ID', ''),
+                'Object(s)': row.get('Object(s)', ''),
+                'Type': row.get('Type', '')
+            }
+
+            # Create a tuple from item data to use in the set for uniqueness check
+            item_tuple = (item_data['Item ID'], item_data['Object(s)'], item_data['Type'])
+
+            if item_tuple not in current_module['_seen_items']:
+                current_module['Items'].append(item_data)
+                current_module['_seen_items'].add(item_tuple)
+
+    # Clean up the temporary _seen_items set after loading all modules
+    for module_data in modules.values():
+        if '_seen_items' in module_data:
+            del module_data['_seen_items']
+    return modules
+
+# --- Parallel parsing of large catalogs ---
+
+# Uncached layers at least this large are parsed in chunks on a process pool
+PARALLEL_PARSE_MIN_BYTES = 16 * 1024 * 1024
+PARSE_CHUNKS_PER_WORKER = 4
+
+def split_csv_records(path, chunk_size, block_size=1024 * 1024):
+    """
+    Returns byte offsets [0, header end, ..., file size] that cut path into
+    whole CSV records: the first range is the header record and the others
+    are about chunk_size bytes each. A newline only ends a record when the
+    number of quote characters before it is even, so quoted fields spanning
+    lines are never split. Safe on UTF-8, where 0x22 and 0x0A only ever
+    encode '"' and newline.
+    """
+    boundaries = [0]
+    target = 0 # First boundary after this offset ends the header record
+    parity = 0
+    offset = 0 # File offset of block[0]
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            pos = 0
+            while pos < len(block):
+                if offset + pos < target:
+                    # Not near a cut point yet; just keep the quote parity
+                    stop = min(len(block), target - offset)
+                    parity += block.count(b'"', pos, stop)
+                    pos = stop
+                    continue
+                newline = block.find(b'\n', pos)
+                if newline == -1:
+                    parity += block.count(b'"', pos)
+                    break
+                parity += block.count(b'"', pos, newline)
+                pos = newline + 1
+                if parity % 2 == 0:
+                    boundaries.append(offset + pos)
+                    target = offset + pos + chunk_size
+            offset += len(block)
+    if boundaries[-1] != offset:
+        boundaries.append(offset)
+    return boundaries
+
+def _row_dict(fieldnames, values):
+    # Same shape csv.DictReader gives: missing fields are None, extras go under None
+    row = dict(zip(fieldnames, values))
+    if len(values) > len(fieldnames):
+        row[None] = list(values[len(fieldnames):])
+    elif len(values) < len(fieldnames):
+        for key in fieldnames[len(values):]:
+            row.setdefault(key, None)
+    return row
+
+def _field_index(fieldnames, name):
+    # csv.DictReader keeps the last column of a repeated header name
+    for index in range(len(fieldnames) - 1, -1, -1):
+        if fieldnames[index] == name:
+            return index
+    return None
+
+def _parse_csv_chunk(path, start, end, fieldnames):
+    """
+    Worker: parses the records in path[start:end] into {Module ID: module}
+    shaped like parse_modules_csv() output, with items de-duplicated within
+    the chunk.
+    """
+    import io
+    with open(path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('utf-8')
+    id_index, item_index, objects_index, type_index = (
+        _field_index(fieldnames, name) for name in ('Module ID', 'Item ID', 'Object(s)', 'Type'))
+    if id_index is None:
+        return {}
+
+    def field(values, index):
+        # A field missing from a short row is None, a column missing from the header is ''
+        if index is None:
+            return ''
+        return values[index] if index < len(values) else None
+
+    # Rows with every column go through itemgetter; short rows and odd headers take the slow path
+    indexes = (item_index, objects_index, type_index)
+    fast_item = operator.itemgetter(*indexes) if None not in indexes else None
+    fast_len = max(id_index, *(i for i in indexes if i is not None)) + 1
+
+    rows = {} # Module ID -> (first row values, {(Item ID, Object(s), Type): None} as an ordered set)
+    with _gc_paused():
+        for values in csv.reader(io.StringIO(text, newline='')):
+            if fast_item is not None and len(values) >= fast_len:
+                module_id = values[id_index]
+                item = fast_item(values)
+            elif not values:
+                continue
+            else:
+                module_id = field(values, id_index)
+                item = (field(values, item_index), field(values, objects_index), field(values, type_index))
+            if not module_id:
+                continue
+            entry = rows.get(module_id)
+            if entry is None:
+                entry = rows[module_id] = (values, {})
+            entry[1][item] = None
+
+        modules = {}
+        for module_id, (values, items) in rows.items():
+            row = _row_dict(fieldnames, values)
+            modules[module_id] = {
+                'Module ID': module_id,
+                'Name (EN)': row.get('Name (EN)', ''),
+                'Name (JP)': row.get('Name (JP)', ''),
+                'Character': row.get('Character', ''),
+                'Source': row.get('Source', ''),
+                'COS ID': row.get('COS ID', ''),
+                'Names': row,
+                'Items': [{'Item ID': i, 'Object(s)': o, 'Type': t} for i, o, t in items],
+            }
+        return modules
+
+def parse_modules_csv_parallel(path, max_workers=None):
+    """
+    Same result as parse_modules_csv(), with the file split on record
+    boundaries and the chunks parsed on a process pool. Chunks are merged in
+    file order, so module order, the first row kept as 'Names' and item
+    de-duplication match the sequential parser; only modules that span
+    chunks need any work here.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    size = os.path.getsize(path)
+    chunk_size = max(1024 * 1024, size // (max_workers * PARSE_CHUNKS_PER_WORKER))
+    boundaries = split_csv_records(path, chunk_size)
+    if len(boundaries) < 3:
+        return parse_modules_csv(path) # Header only, or empty
+
+    with open(path, 'rb') as f:
+        header = f.read(boundaries[1]).decode('utf-8')
+    fieldnames = next(csv.reader(header.splitlines(True)), [])
+
+    modules = {}
+    seen_items = {} # Module ID -> item tuples, only for modules found in more than one chunk
+    # Results are unpickled on the executor's thread, so pause collection process-wide
+    from concurrent.futures import ProcessPoolExecutor
+    with _gc_paused(), ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_parse_csv_chunk, path, start, end, fieldnames)
+                   for start, end in zip(boundaries[1:], boundaries[2:])]
+        for future in futures:
+            for module_id, module in future.result().items():
+                current = modules.get(module_id)
+                if current is None:
+                    modules[module_id] = module
+                    continue
+                seen = seen_items.get(module_id)
+                if seen is None:
+                    seen = seen_items[module_id] = {(i['Item ID'], i['Object(s)'], i['Type']) for i in current['Items']}
+                for item in module['Items']:
+                    key = (item['Item ID'], item['Object(s)'], item['Type'])
+                    if key not in seen:
+                        seen.add(key)
+                        current['Items'].append(item)
+    return modules
+
+# Bump when the parsed layer structure changes so stale caches are ignored
+CATALOG_CACHE_FORMAT = 1
+
+def _layer_cache_path(path):
+    import hashlib
+    digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_FOLDER, "catalog", f"{digest}.pickle")
+
+def load_catalog_layer(path, stamp):
+    """
+    Returns the parsed modules of one catalog layer, from the on-disk cache if
+    it was written for the same (size, mtime) stamp, otherwise by parsing the
+    CSV and refreshing the cache.
+    """
+    import pickle
+    cache_path = _layer_cache_path(path)
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+        if cached.get('format') == CATALOG_CACHE_FORMAT and cached.get('stamp') == stamp:
+            return cached['modules']
+    except Exception:
+        pass
+
+    if stamp and stamp[0] >= PARALLEL_PARSE_MIN_BYTES and (os.cpu_count() or 1) > 1:
+        parsed = parse_modules_csv_parallel(path)
+    else:
+        parsed = parse_modules_csv(path)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'format': CATALOG_CACHE_FORMAT, 'stamp': stamp, 'path': path, 'modules': parsed}, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Could not write catalog cache for {path}: {e}")
+    return parsed
+
+def catalog_layer_paths():
+    """The bundled base catalog followed by every catalog.d/*.csv fragment in filename order."""
+    paths = [MODULES_CSV]
+    try:
+        fragments = sorted(f for f in os.listdir(CATALOG_D_FOLDER) if f.lower().endswith('.csv'))
+    except OSError:
+        fragments = []
+    paths.extend(os.path.join(CATALOG_D_FOLDER, f) for f in fragments)
+    return paths
+
+def merge_module_layers(contributions):
+    """
+    Merges the versions of one module from each layer, lowest precedence first.
+    Non-empty fields of a later layer override earlier ones, and its items
+    replace earlier items with the same Item ID (new Item IDs are appended).
+    """
+    merged = None
+    for module in contributions:
+        if merged is None:
+            merged = dict(module)
+            merged['Names'] = dict(module['Names'])
+            merged['Items'] = list(module['Items'])
+            continue
+        for key in ('Name (EN)', 'Name (JP)', 'Character', 'Source', 'COS ID'):
+            if module.get(key):
+                merged[key] = module[key]
+        merged['Names'].update((k, v) for k, v in module['Names'].items() if v)
+
+        overlay_items = {}
+        for item in module['Items']:
+            overlay_items.setdefault(item['Item ID'], []).append(item)
+        items = []
+        replaced = set()
+        for item in merged['Items']:
+            item_id = item['Item ID']
+            if item_id not in overlay_items:
+                items.append(item)
+            elif item_id not in replaced:
+                items.extend(overlay_items[item_id])
+                replaced.add(item_id)
+        for item_id, overlay in overlay_items.items():
+            if item_id not in replaced:
+                items.extend(overlay)
+        merged['Items'] = items
+    return merged
+
+class LayeredCatalog:
+    """
+    The module catalog assembled from MODULES_CSV plus catalog.d overlays.
+    Each layer is parsed and cached on its own; refresh() re-reads only layers
+    whose (size, mtime) changed and re-merges only the modules they define.
+    """
+    def __init__(self):
+        self.layers = [] # [(path, stamp, parsed modules)] lowest precedence first
+        self.modules = {} # Merged catalog, updated in place
+        self.errors = [] # [(path, error)] for overlays that failed to load on the last refresh
+
+    def refresh(self, paths):
+        """
+        Brings the merged catalog up to date with paths. Returns the set of
+        Module IDs that were added, removed or whose merged data changed.
+        """
+        previous = {path: (stamp, parsed) for path, stamp, parsed in self.layers}
+        # Precedence changed if layers present before and now appear in a different order
+        reordered = ([p for p in paths if p in previous] !=
+                     [p for p, _, _ in self.layers if p in set(paths)])
+        layers = []
+        dirty = set()
+        self.errors = []
+        for index, path in enumerate(paths):
+            stamp = file_stamp(path)
+            old = previous.pop(path, None)
+            if old is not None and old[0] == stamp:
+                layers.append((path, stamp, old[1]))
+                continue
+            try:
+                parsed = load_catalog_layer(path, stamp)
+            except Exception as e:
+                if index == 0:
+                    raise # The base catalog is required
+                self.errors.append((path, e))
+                parsed = {}
+            dirty.update(parsed)
+            if old is not None:
+                dirty.update(old[1])
+            layers.append((path, stamp, parsed))
+
+        # Removed layers: their modules need re-merging and their caches are stale
+        for path, (_, parsed) in previous.items():
+            dirty.update(parsed)
+            try:
+                os.remove(_layer_cache_path(path))
+            except OSError:
+                pass
+
+        self.layers = layers
+        if reordered:
+            dirty = {mid for _, _, parsed in layers for mid in parsed} | set(self.modules)
+
+        changed = set()
+        for mid in dirty:
+            contributions = [parsed[mid] for _, _, parsed in self.layers if mid in parsed]
+            if contributions:
+                merged = merge_module_layers(contributions)
+                if self.modules.get(mid) != merged:
+                    self.modules[mid] = merged
+                    changed.add(mid)
+            elif mid in self.modules:
+                del self.modules[mid]
+                changed.add(mid)
+        return changed
+
+layered_catalog = LayeredCatalog()
+
+def load_catalog():
+    """
+    Headless counterpart of the GUI's load_modules(): refreshes the layered
+    catalog and returns the merged modules. Falls back to the bundled starter
+    catalog if the app directory has not been set up yet. Raises on errors.
+    """
+    paths = catalog_layer_paths()
+    if not os.path.exists(MODULES_CSV) and os.path.exists(STARTER_MODULES_CSV):
+        paths[0] = STARTER_MODULES_CSV
+    layered_catalog.refresh(paths)
+    return layered_catalog.modules
+
+def module_display_name(module):
+    return f"[{module['Module ID']}] {module['Name (EN)']} ({module['Character']})"
+
+def split_objects(objects):
+    """Splits an 'Object(s)' value such as 'KAIITM461, KAIITM461' into unique object names."""
+    names = []
+    for name in objects.split(','):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def build_items_index(folder=ITEMS_FOLDER):
+    """Maps lower-cased object names to the absolute path of their .farc in folder, from one directory scan."""
+    index = {}
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                name = entry.name.lower()
+                if name.endswith('.farc') and entry.is_file():
+                    index[name[:-len('.farc')]] = os.path.abspath(entry.path)
+    except OSError:
+        pass
+    return index
+
+_items_index_cache = {} # folder -> (directory stamp, index)
+
+def cached_items_index(folder=ITEMS_FOLDER):
+    """
+    build_items_index() reused until the folder's own mtime changes, which
+    happens whenever an archive is added, removed or renamed in it.
+    """
+    stamp = file_stamp(folder)
+    cached = _items_index_cache.get(folder)
+    if cached is None or cached[0] != stamp:
+        cached = (stamp, build_items_index(folder))
+        _items_index_cache[folder] = cached
+    return cached[1]
+
+def configured_item_roots(settings=None):
+    """
+    The folders holding .farc archives, highest precedence first: the
+    'item_roots' setting (e.g. extracted game archives and mod objset
+    folders) followed by the app's own ITEMS_FOLDER. settings.json is read
+    if settings is not given. Each root is scanned on its own, not recursively.
+    """
+    if settings is None:
+        try:
+            with open(SETTINGS_FILE, 'r') as f:
+                settings = json.load(f)
+        except (OSError, ValueError):
+            settings = {}
+    roots = []
+    for root in list(settings.get("item_roots") or []) + [ITEMS_FOLDER]:
+        root = os.path.abspath(os.path.expanduser(root))
+        if root not in roots:
+            roots.append(root)
+    return roots
+
+class ItemRootsIndex:
+    """
+    Object name (lower-cased) -> .farc path merged across ordered item
+    roots, where the first root that has an object wins. Each root's
+    listing comes from cached_items_index(), so only roots whose directory
+    stamp changed are rescanned, in parallel; the merged map is rebuilt only
+    when a listing or the root list changes.
+    """
+    def __init__(self):
+        self.roots = ()
+        self.index = {}
+        self.origin = {} # Lower-cased object name -> position in roots of the root it came from
+        self._listings = ()
+        self._lock = threading.Lock()
+
+    def get(self, roots):
+        from concurrent.futures import ThreadPoolExecutor
+        roots = tuple(roots)
+        with self._lock:
+            stale = [root for root in roots
+                     if root not in _items_index_cache or _items_index_cache[root][0] != file_stamp(root)]
+            if len(stale) > 1:
+                # Scans are directory I/O, which overlaps well on threads
+                with ThreadPoolExecutor(max_workers=min(8, len(stale)), thread_name_prefix="ItemRoots") as executor:
+                    list(executor.map(cached_items_index, stale))
+            listings = tuple(cached_items_index(root) for root in roots)
+            # The listings are replaced, not edited, when a root changes
+            if roots != self.roots or any(a is not b for a, b in zip(listings, self._listings)):
+                index = {}
+                origin = {}
+                for position in range(len(roots) - 1, -1, -1):
+                    index.update(listings[position])
+                    origin.update(dict.fromkeys(listings[position], position))
+                self.roots, self._listings, self.index, self.origin = roots, listings, index, origin
+            return self.index
+
+    def shadowed(self):
+        """How many archives are hidden by a copy in a higher-precedence root."""
+        return sum(len(listing) for listing in self._listings) - len(self.index)
+
+item_roots_index = ItemRootsIndex()
+
+def merged_items_index(roots=None):
+    """item_roots_index for roots (configured_item_roots() by default), rescanning only changed roots."""
+    return item_roots_index.get(configured_item_roots() if roots is None else roots)
+
+
+# --- Recent items and usage counts ---
+
+class RecentItems:
+    """
+    Most recently opened objects, newest first, persisted to a JSON file
+    with the .farc path each one resolved to and that file's (size, mtime)
+    stamp. resolve() re-checks a remembered path only when it is used, with
+    a single stat, so reopening a recent item needs no items-folder lookup.
+    Each entry also remembers the item roots, in order, that its path was
+    resolved against. Once the roots change, the path may no longer be the
+    highest-precedence match, so the entry is looked up again.
+    """
+    def __init__(self, path=RECENT_ITEMS_FILE, max_entries=25):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = [] # [{'object', 'path', 'stamp', 'valid', 'opened', 'roots'}] newest first
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            self.entries = [entry for entry in entries if entry.get('object') and entry.get('path')][:self.max_entries]
+        except (OSError, ValueError, AttributeError):
+            self.entries = []
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save recent items to {self.path}: {e}")
+
+    def get(self, object_name):
+        key = object_name.lower()
+        for entry in self.entries:
+            if entry['object'].lower() == key:
+                return entry
+        return None
+
+    def resolve(self, object_name, roots=None):
+        """
+        Returns the remembered .farc path for object_name if the file is still
+        there, or None if it is unknown or gone. A changed (size, mtime) only
+        refreshes the stored stamp; the path itself is still the right one.
+        With roots, paths resolved against a different list or order of item
+        roots are not trusted either.
+        """
+        entry = self.get(object_name)
+        if entry is None:
+            return None
+        if roots is not None and entry.get('roots') != list(roots):
+            return None
+        stamp = file_stamp(entry['path'])
+        valid = stamp is not None
+        if valid and list(stamp) != entry.get('stamp'):
+            entry['stamp'] = list(stamp)
+        if valid != entry.get('valid', True):
+            entry['valid'] = valid
+            self.save()
+        return entry['path'] if valid else None
+
+    def record(self, opened, roots=None):
+        """Moves each (object name, path) in opened, resolved against roots, to the front and saves once."""
+        now = time.time()
+        for object_name, path in reversed(opened):
+            existing = self.get(object_name)
+            if existing is not None:
+                self.entries.remove(existing)
+            stamp = file_stamp(path)
+            self.entries.insert(0, {
+                'object': object_name, 'path': path, 'stamp': list(stamp) if stamp else None,
+                'valid': stamp is not None, 'opened': now,
+                'roots': list(roots) if roots is not None else None,
+            })
+        del self.entries[self.max_entries:]
+        self.save()
+
+    def remove(self, object_name):
+        entry = self.get(object_name)
+        if entry is not None:
+            self.entries.remove(entry)
+            self.save()
+
+    def clear(self):
+        self.entries = []
+        self.save()
+
+class UsageStats:
+    """
+    How much each module has been used lately (selected, or its items
+    opened), kept locally in a JSON file of Module ID -> score and nothing
+    else. A use at time t adds weight * 2 ** ((t - epoch) / half_life) to
+    the module's score, so older uses count for less but every score decays
+    at the same rate: the order of modules only changes when a use is
+    recorded, never just because time passed. order (most used first) and
+    ranks are kept up to date per recorded use rather than re-sorted.
+    """
+    MAX_EXPONENT = 512 # Scores are rescaled before they can overflow a float
+
+    def __init__(self, path=USAGE_FILE, half_life_days=30.0, max_modules=5000):
+        self.path = path
+        self.half_life = half_life_days * 86400.0
+        self.max_modules = max_modules
+        self.epoch = time.time()
+        self.scores = {} # Module ID -> score relative to epoch
+        self.order = [] # Used Module IDs, highest score first
+        self.ranks = {} # Module ID -> position in order
+        self.version = 0 # Bumped whenever order changes
+        self.dirty = False
+        self._neg_scores = [] # -score for each entry of order, for bisect
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            epoch = float(data['epoch'])
+            scores = {str(mid): float(score) for mid, score in data['scores'].items() if float(score) > 0}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            epoch, scores = time.time(), {}
+        self.epoch = epoch
+        self.scores = scores
+        self._resort()
+        self.dirty = False
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'epoch': self.epoch, 'scores': self.scores}, f)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            print(f"Could not save usage counts to {self.path}: {e}")
+
+    def _resort(self):
+        self.order = sorted(self.scores, key=lambda mid: -self.scores[mid])
+        del self.order[self.max_modules:]
+        self.scores = {mid: self.scores[mid] for mid in self.order}
+        self._neg_scores = [-self.scores[mid] for mid in self.order]
+        self.ranks = {mid: rank for rank, mid in enumerate(self.order)}
+        self.version += 1
+
+    def count(self, mid, now=None):
+        """The module's decayed use count as of now."""
+        now = time.time() if now is None else now
+        return self.scores.get(mid, 0.0) * 2.0 ** ((self.epoch - now) / self.half_life)
+
+    def record(self, mid, weight=1.0, now=None):
+        now = time.time() if now is None else now
+        exponent = (now - self.epoch) / self.half_life
+        if exponent > self.MAX_EXPONENT:
+            # Rescaling every score by the same factor keeps their order
+            factor = 2.0 ** -exponent
+            self.scores = {key: score * factor for key, score in self.scores.items()}
+            self.epoch = now
+            self._resort()
+            exponent = 0.0
+        old_rank = self.ranks.get(mid)
+        if old_rank is not None:
+            del self.order[old_rank]
+            del self._neg_scores[old_rank]
+        score = self.scores.get(mid, 0.0) + weight * 2.0 ** exponent
+        self.scores[mid] = score
+        # Goes before modules with an equal score: the latest use wins ties
+        new_rank = bisect.bisect_left(self._neg_scores, -score)
+        self.order.insert(new_rank, mid)
+        self._neg_scores.insert(new_rank, -score)
+        # Only the ranks between the old and new position moved
+        last = len(self.order) - 1 if old_rank is None else old_rank
+        for rank in range(new_rank, last + 1):
+            self.ranks[self.order[rank]] = rank
+        if len(self.order) > self.max_modules:
+            dropped = self.order.pop()
+            self._neg_scores.pop()
+            del self.scores[dropped]
+            del self.ranks[dropped]
+        self.version += 1
+        self.dirty = True
+
+    def clear(self):
+        self.epoch = time.time()
+        self.scores = {}
+        self._resort()
+        self.save()
+
+
+# --- Watching files for changes ---
+
+class FileWatcher:
+    """
+    Polls the (size, mtime) stamps of the paths returned by paths_func on a
+    background thread. Once a burst of changes has been quiet for debounce
+    seconds, the set of changed paths is put on the changes queue. Watching a
+    directory catches files being added, removed or renamed in it.
+    """
+    def __init__(self, paths_func, interval=0.25, debounce=0.3):
+        self.paths_func = paths_func
+        self.interval = interval
+        self.debounce = debounce
+        self.changes = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _snapshot(self):
+        return {path: file_stamp(path) for path in self.paths_func()}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="FileWatcher")
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        stamps = self._snapshot()
+        pending = set()
+        last_change = 0.0
+        while not self._stop.wait(self.interval):
+            try:
+                current = self._snapshot()
+            except Exception:
+                continue
+            changed = {path for path in current.keys() | stamps.keys() if current.get(path) != stamps.get(path)}
+            stamps = current
+            if changed:
+                pending |= changed
+                last_change = time.monotonic()
+            elif pending and time.monotonic() - last_change >= self.debounce:
+                self.changes.put(pending)
+                pending = set()
+
+
+# --- External viewer launching ---
+
+class ViewerLauncher:
+    """
+    Opens archives in an external viewer (MikuMikuModel) with at most
+    max_running viewer processes alive at once. Further requests wait in a
+    FIFO queue until a viewer exits; submit() says which ones have to wait. Archives already open or waiting are
+    skipped. Launch failures are collected in the errors queue because they
+    happen on worker threads.
+    """
+    DEFAULT_MAX_RUNNING = 4
+
+    def __init__(self, max_running=DEFAULT_MAX_RUNNING):
+        self.max_running = max_running
+        self.errors = queue.Queue()
+        self._pending = queue.Queue()
+        self._active = set() # Normalised paths that are open or waiting
+        self._running = set() # The subset of _active whose viewer has been started
+        self._lock = threading.Lock()
+        self._workers = 0
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def is_open(self, path):
+        with self._lock:
+            return self._key(path) in self._active
+
+    def is_waiting(self, path):
+        """True if path is queued behind max_running open viewers rather than open."""
+        key = self._key(path)
+        with self._lock:
+            return key in self._active and key not in self._running
+
+    def submit(self, exe, path):
+        """
+        Queues path to be opened with exe. Returns 'started' if a viewer slot
+        is free, 'queued' if it has to wait for a viewer to be closed, or None
+        if it is already open or queued.
+        """
+        key = self._key(path)
+        with self._lock:
+            if key in self._active:
+                return None
+            self._active.add(key)
+            if self._workers < self.max_running:
+                self._workers += 1
+                threading.Thread(target=self._work, daemon=True, name="ViewerLauncher").start()
+            # Every worker holds one open viewer, so more active paths than workers means a wait
+            status = 'queued' if len(self._active) > self._workers else 'started'
+        self._pending.put((exe, path, key))
+        return status
+
+    def _work(self):
+        import subprocess
+        while True:
+            exe, path, key = self._pending.get()
+            try:
+                process = subprocess.Popen([exe, path])
+                with self._lock:
+                    self._running.add(key)
+                process.wait()
+            except Exception as e:
+                self.errors.put((path, e))
+            finally:
+                with self._lock:
+                    self._active.discard(key)
+                    self._running.discard(key)
+
+
+# --- Startup ---
+
+class StartupPipeline:
+    """
+    Runs named startup steps on a thread pool, each as soon as the steps it
+    depends on have finished, so independent I/O overlaps and the total
+    time approaches the slowest chain rather than the sum. Dependencies only
+    order steps: a step still runs if one it depends on failed. The caller
+    polls done() from its own thread and then collects result(name), which
+    re-raises the step's exception.
+    """
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+        self.steps = {} # name -> (func, deps)
+        self.results = {}
+        self.errors = {}
+        self.timings = {} # name -> seconds the step ran
+        self._started = set()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def add(self, name, func, deps=()):
+        self.steps[name] = (func, tuple(deps))
+
+    def start(self):
+        from concurrent.futures import ThreadPoolExecutor
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers or len(self.steps) or 1,
+                                            thread_name_prefix="Startup")
+        self._submit_ready()
+
+    def _submit_ready(self):
+        with self._lock:
+            finished = self.results.keys() | self.errors.keys()
+            ready = [name for name, (_, deps) in self.steps.items()
+                     if name not in self._started and all(dep in finished for dep in deps)]
+            self._started.update(ready)
+        for name in ready:
+            self._executor.submit(self._run, name)
+
+    def _run(self, name):
+        func = self.steps[name][0]
+        start = time.perf_counter()
+        try:
+            outcome, value = self.results, func()
+        except BaseException as e:
+            outcome, value = self.errors, e
+        with self._lock:
+            self.timings[name] = time.perf_counter() - start
+            outcome[name] = value
+        self._submit_ready()
+        if self.done():
+            self._executor.shutdown(wait=False)
+
+    def pending(self):
+        with self._lock:
+            return [name for name in self.steps if name not in self.results and name not in self.errors]
+
+    def done(self):
+        return not self.pending()
+
+    def result(self, name):
+        if name in self.errors:
+            raise self.errors[name]
+        return self.results[name]
+
+
+# --- Warming item archives before they are opened ---
+
+class ArchivePrefetcher:
+    """
+    Pulls the archives of the selected module into the OS page cache on a
+    background thread, so the viewer (and preview extraction) read them from
+    memory rather than a slow disk or network share. Uses posix_fadvise
+    WILLNEED where available and throttled sequential reads elsewhere. Each
+    prefetch() replaces the previous request, whose remaining work is
+    dropped, and warms at most budget_bytes. Archives warmed recently (by
+    path and stamp, up to budget_bytes in total) are not read again.
+    """
+    def __init__(self, budget_bytes=256 * 1024 * 1024, block_size=1024 * 1024, pause=0.002):
+        self.budget_bytes = budget_bytes
+        self.block_size = block_size
+        self.pause = pause # Sleep between blocks so the viewer's own reads go first
+        self._generation = 0
+        self._paths = []
+        self._warm = collections.OrderedDict() # (path, stamp) -> size, least recently warmed first
+        self._warm_bytes = 0
+        self._wake = threading.Condition()
+        self._thread = None
+
+    def prefetch(self, paths):
+        with self._wake:
+            self._generation += 1
+            self._paths = list(paths)
+            self._wake.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="ArchivePrefetcher")
+                self._thread.start()
+
+    def cancel(self):
+        self.prefetch([])
+
+    def _cancelled(self, generation):
+        return generation != self._generation
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while not self._paths:
+                    self._wake.wait()
+                generation = self._generation
+                paths, self._paths = self._paths, []
+            budget = self.budget_bytes
+            for path in paths:
+                if self._cancelled(generation) or budget <= 0:
+                    break
+                stamp = file_stamp(path)
+                if stamp is None:
+                    continue
+                if (path, stamp) in self._warm:
+                    self._warm.move_to_end((path, stamp))
+                    continue
+                size = min(stamp[0], budget)
+                try:
+                    done = self._warm_file(path, size, generation)
+                except OSError:
+                    continue
+                budget -= size
+                if done and size == stamp[0]:
+                    self._remember((path, stamp), size)
+
+    def _warm_file(self, path, size, generation):
+        """Returns False if cancelled part way through."""
+        with open(path, 'rb', buffering=0) as f:
+            if hasattr(os, 'posix_fadvise'):
+                # The kernel reads ahead asynchronously; nothing to copy into Python
+                os.posix_fadvise(f.fileno(), 0, size, os.POSIX_FADV_WILLNEED)
+                return True
+            buffer = bytearray(self.block_size)
+            remaining = size
+            while remaining > 0:
+                if self._cancelled(generation):
+                    return False
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                remaining -= read
+                time.sleep(self.pause)
+        return True
+
+    def _remember(self, key, size):
+        self._warm[key] = size
+        self._warm_bytes += size
+        while self._warm_bytes > self.budget_bytes and len(self._warm) > 1:
+            _, evicted = self._warm.popitem(last=False)
+            self._warm_bytes -= evicted
+
+
+# --- Single-instance forwarding ---
+
+def send_to_running_instance(request, timeout=1.0):
+    """
+    Hands request (a JSON-able dict) to an already running GUI. Returns True
+    if it was accepted, False if no instance is listening.
+    """
+    import socket
+    message = dict(request)
+    try:
+        if hasattr(socket, 'AF_UNIX'):
+            if not os.path.exists(INSTANCE_SOCKET):
+                return False
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            address = INSTANCE_SOCKET
+        else:
+            with open(INSTANCE_PORT_FILE, 'r', encoding='utf-8') as f:
+                port, message['token'] = f.read().split()
+            conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            address = ('127.0.0.1', int(port))
+        with conn:
+            conn.settimeout(timeout)
+            conn.connect(address)
+            conn.sendall(json.dumps(message).encode('utf-8') + b'\n')
+            reply = conn.makefile('rb').readline()
+        return json.loads(reply or b'{}').get('ok', False)
+    except (OSError, ValueError):
+        return False
+
+class InstanceServer:
+    """
+    Listens for requests from later launches of the app, one JSON line per
+    connection, on a Unix socket in APP_DIR (or a localhost TCP port with a
+    per-session token written to APP_DIR where AF_UNIX is unavailable).
+    Requests are put on the requests queue for the Tk thread to handle.
+    """
+    def __init__(self):
+        import secrets
+        self.requests = queue.Queue()
+        self._token = secrets.token_hex(16)
+        self._sock = None
+        self._address_file = None
+
+    def start(self):
+        """Starts listening. Returns False if another instance already is."""
+        import socket
+        if hasattr(socket, 'AF_UNIX'):
+            if os.path.exists(INSTANCE_SOCKET):
+                if send_to_running_instance({'action': 'ping'}):
+                    return False
+                os.remove(INSTANCE_SOCKET) # Left behind by an instance that crashed
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.bind(INSTANCE_SOCKET)
+            self._address_file = INSTANCE_SOCKET
+        else:
+            if send_to_running_instance({'action': 'ping'}):
+                return False
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(('127.0.0.1', 0))
+            tmp_path = INSTANCE_PORT_FILE + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(f"{sock.getsockname()[1]} {self._token}")
+            os.replace(tmp_path, INSTANCE_PORT_FILE)
+            self._address_file = INSTANCE_PORT_FILE
+        sock.listen(8)
+        self._sock = sock
+        threading.Thread(target=self._serve, daemon=True, name="InstanceServer").start()
+        return True
+
+    def stop(self):
+        if self._sock is None:
+            return
+        try:
+            self._sock.close()
+            os.remove(self._address_file)
+        except OSError:
+            pass
+        self._sock = None
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except (OSError, AttributeError):
+                return # Closed by stop()
+            with conn:
+                try:
+                    conn.settimeout(2.0)
+                    request = json.loads(conn.makefile('rb').readline() or b'{}')
+                    ok = isinstance(request, dict) and (
+                        self._address_file == INSTANCE_SOCKET or request.pop('token', None) == self._token)
+                    if ok and request.get('action') != 'ping':
+                        self.requests.put(request)
+                    conn.sendall(json.dumps({'ok': ok}).encode('utf-8') + b'\n')
+                except (OSError, ValueError):
+                    pass
+
+class ModuleSorter:
+    """
+    Computes typed sort keys for every module once per catalog load and turns
+    them into integer ranks per field. Any sort order, including multi-key
+    ones, is then just a reordering of module IDs by rank tuples.
+    """
+    def __init__(self):
+        self.fields = ['Module ID', 'Name (EN)', 'Character', 'Source', 'Item Count']
+        self.ranks = {} # field -> {module ID: rank}, equal keys share a rank
+        self._keys = []
+        self._sort_keys = {} # field -> {module ID: typed sort key}
+        self._external = {} # field -> {module ID: rank} set from outside the catalog, see set_ranks()
+        self._order_cache = {}
+
+    def rebuild(self, modules):
+        name_fields = []
+        for module in modules.values():
+            name_fields = [k for k in module['Names'] if k and k.startswith('Name (')]
+            break
+        self.fields = ['Module ID'] + (name_fields or ['Name (EN)']) + ['Character', 'Source', 'Item Count'] + list(self._external)
+        self._keys = list(modules.keys())
+        self._sort_keys = {
+            field: {mid: self._sort_key(module, field) for mid, module in modules.items()}
+            for field in self.fields
+        }
+        self._rerank()
+
+    def update(self, modules, changed_ids):
+        """Recomputes sort keys only for changed_ids (added, edited or removed modules) and re-ranks."""
+        present = set(self._keys)
+        for mid in changed_ids:
+            module = modules.get(mid)
+            for field, keys in self._sort_keys.items():
+                if module is None:
+                    keys.pop(mid, None)
+                else:
+                    keys[mid] = self._sort_key(module, field)
+            if module is None and mid in present:
+                present.discard(mid)
+            elif module is not None and mid not in present:
+                present.add(mid)
+                self._keys.append(mid)
+        self._keys = [mid for mid in self._keys if mid in present]
+        self._rerank()
+
+    def _rerank(self):
+        self._order_cache = {}
+        self.ranks = {}
+        for field, keys in self._sort_keys.items():
+            field_ranks = {}
+            rank = -1
+            previous = None
+            for mid in sorted(keys, key=keys.get):
+                if rank < 0 or keys[mid] != previous:
+                    rank += 1
+                    previous = keys[mid]
+                field_ranks[mid] = rank
+            self.ranks[field] = field_ranks
+        for field in self._external:
+            self._expand_external(field)
+
+    def _expand_external(self, field):
+        sparse = self._external[field]
+        self.ranks[field] = {mid: sparse.get(mid, len(sparse)) for mid in self._keys}
+
+    def set_ranks(self, field, ranks):
+        """
+        Installs a sort field whose ranks come from outside the catalog (e.g.
+        usage counts); modules missing from ranks sort after all others.
+        Only cached orders that use the field are dropped.
+        """
+        if field not in self._external:
+            self.fields.append(field)
+        self._external[field] = ranks
+        self._expand_external(field)
+        self._order_cache = {spec: order for spec, order in self._order_cache.items()
+                             if all(name != field for name, _ in spec)}
+
+    @staticmethod
+    def _sort_key(module, field):
+        if field == 'Module ID':
+            mid = module['Module ID']
+            return (0, int(mid), '') if mid.isdigit() else (1, 0, mid.casefold())
+        if field == 'Item Count':
+            return len(module['Items'])
+        if field.startswith('Name ('):
+            value = module['Names'].get(field) or module.get(field) or ''
+        else:
+            value = module.get(field) or ''
+        # Blank values sort after everything else regardless of language
+        return (value == '', value.casefold())
+
+    def sorted_keys(self, spec):
+        """
+        Returns module IDs ordered by spec, a sequence of (field, descending)
+        pairs. Ties fall back to numeric Module ID. Orders are cached until the
+        next rebuild().
+        """
+        spec = tuple((field, bool(descending)) for field, descending in spec if field in self.ranks)
+        if not any(field == 'Module ID' for field, _ in spec):
+            spec += (('Module ID', False),)
+        order = self._order_cache.get(spec)
+        if order is None:
+            rank_maps = [(self.ranks[field], descending) for field, descending in spec]
+            order = sorted(
+                self._keys,
+                key=lambda mid: tuple(-ranks[mid] if descending else ranks[mid] for ranks, descending in rank_maps)
+            )
+            self._order_cache[spec] = order
+        return order
+
+class ModuleGroups:
+    """
+    Module IDs bucketed by Character, Source and item Type, built once per
+    catalog load. A module is in exactly one Character and one Source group,
+    and in one Type group per distinct type among its items. Blank values
+    form the '' group.
+    """
+    FIELDS = ('Character', 'Source', 'Type')
+
+    def __init__(self):
+        self.keys_of = {field: {} for field in self.FIELDS} # field -> {Module ID: (group keys)}
+        self.members = {field: {} for field in self.FIELDS} # field -> {group key: {Module ID}}
+
+    def rebuild(self, modules):
+        self.keys_of = {field: {} for field in self.FIELDS}
+        self.members = {field: {} for field in self.FIELDS}
+        for mid, module in modules.items():
+            self._add(mid, module)
+
+    def update(self, modules, changed_ids):
+        """Re-buckets only changed_ids (added, edited or removed modules)."""
+        for mid in changed_ids:
+            for field in self.FIELDS:
+                for key in self.keys_of[field].pop(mid, ()):
+                    group = self.members[field][key]
+                    group.discard(mid)
+                    if not group:
+                        del self.members[field][key]
+            if mid in modules:
+                self._add(mid, modules[mid])
+
+    def _add(self, mid, module):
+        for field in self.FIELDS:
+            if field == 'Type':
+                keys = tuple(dict.fromkeys(item.get('Type') or '' for item in module['Items'])) or ('',)
+            else:
+                keys = (module.get(field) or '',)
+            self.keys_of[field][mid] = keys
+            for key in keys:
+                self.members[field].setdefault(key, set()).add(mid)
+
+    def bucket(self, field, ordered_modules):
+        """
+        Splits ordered_modules into [(group key, [modules])], groups sorted by
+        key with the blank group last and modules keeping their given order.
+        """
+        keys_of = self.keys_of[field]
+        buckets = {}
+        for module in ordered_modules:
+            for key in keys_of.get(module['Module ID'], ('',)):
+                buckets.setdefault(key, []).append(module)
+        return sorted(buckets.items(), key=lambda bucket: (bucket[0] == '', bucket[0].casefold()))
+
+class SlotItemIndex:
+    """
+    Every item in the catalog keyed by the slot it fills, (Character, Type),
+    so the items that fit a slot can be listed without scanning the catalog.
+    Items with the same 'Object(s)' in different modules are one candidate
+    whose sources list every (Module ID, Item ID) that provides it.
+    """
+    def __init__(self):
+        self.slots = {} # (Character, Type) -> {object key: candidate dict}
+        self.entries_of = {} # Module ID -> [(slot, object key)]
+
+    def rebuild(self, modules):
+        self.slots = {}
+        self.entries_of = {}
+        for mid, module in modules.items():
+            self._add(mid, module)
+
+    def update(self, modules, changed_ids):
+        """Re-indexes only changed_ids (added, edited or removed modules)."""
+        for mid in changed_ids:
+            for slot, key in self.entries_of.pop(mid, ()):
+                candidates = self.slots[slot]
+                candidate = candidates[key]
+                candidate['sources'] = [source for source in candidate['sources'] if source[0] != mid]
+                if not candidate['sources']:
+                    del candidates[key]
+                    if not candidates:
+                        del self.slots[slot]
+            if mid in modules:
+                self._add(mid, modules[mid])
+
+    def _add(self, mid, module):
+        entries = []
+        for item in module['Items']:
+            objects = ', '.join(split_objects(item.get('Object(s)') or ''))
+            if not objects:
+                continue
+            slot = (module.get('Character') or '', item.get('Type') or '')
+            key = objects.lower()
+            candidate = self.slots.setdefault(slot, {}).get(key)
+            if candidate is None:
+                candidate = self.slots[slot][key] = {
+                    'Object(s)': objects, 'Character': slot[0], 'Type': slot[1], 'sources': []
+                }
+            candidate['sources'].append((mid, item.get('Item ID', '')))
+            entries.append((slot, key))
+        self.entries_of[mid] = entries
+
+    def characters(self):
+        return sorted({character for character, _ in self.slots}, key=str.casefold)
+
+    def types(self, character=None):
+        """Item types with at least one candidate, for one character or for all of them."""
+        return sorted({item_type for slot_character, item_type in self.slots
+                       if character is None or slot_character == character}, key=str.casefold)
+
+    def candidates(self, character, item_type):
+        """The distinct objects that fit the (character, item_type) slot, sorted by name."""
+        found = self.slots.get((character, item_type), {})
+        return sorted(found.values(), key=lambda candidate: candidate['Object(s)'].casefold())
+
+class OptionIndex:
+    """
+    Display strings for a picker together with O(1) maps in both directions
+    (display -> value, value -> display) and a sorted word index, so the
+    options can be narrowed by word prefixes without scanning every string.
+    """
+    def __init__(self, options):
+        self.displays = [display for display, _ in options]
+        self.value_for = {display: value for display, value in options}
+        self.display_for = {value: display for display, value in options}
+        words = []
+        for pos, display in enumerate(self.displays):
+            for word in set(re.findall(r'\w+', display.casefold())):
+                words.append((word, pos))
+        words.sort()
+        self._word_positions = [pos for _, pos in words]
+        self._words = [word for word, _ in words]
+
+    def filter(self, text, limit=None):
+        """Returns the displays containing a word starting with every word of text, in option order."""
+        tokens = re.findall(r'\w+', text.casefold())
+        if not tokens:
+            return self.displays[:limit]
+        matches = None
+        for token in tokens:
+            lo = bisect.bisect_left(self._words, token)
+            hi = bisect.bisect_left(self._words, token + '\U0010ffff')
+            positions = set(self._word_positions[lo:hi])
+            matches = positions if matches is None else matches & positions
+            if not matches:
+                return []
+        return [self.displays[pos] for pos in sorted(matches)[:limit]]
+
+def _search_text(text):
+    # Casefolded words joined by single spaces, so punctuation never breaks a trigram
+    return ' '.join(re.findall(r'\w+', text.casefold()))
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def bounded_edit_distance(a, b, limit):
+    """Optimal string alignment distance between a and b (adjacent swaps count once), or limit + 1 once it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+class FuzzyModuleIndex:
+    """
+    Ranked, typo-tolerant search over module display names. Names are
+    indexed by character trigrams; a query only scores the modules sharing
+    enough of its trigrams to be within its edit budget, so a keystroke
+    touches a few posting lists instead of every module.
+
+    Substring matches (everything a plain substring search finds) come
+    first: exact name, name prefix, at a word start, then inside a word.
+    Weaker matches are scored: 600 when every query word starts a name word,
+    500 - 40 per edit when words are within their edit budget (+30 for
+    words side by side in query order), 300 for the letters in order. When
+    no name shares enough trigrams, names are scanned for the letters in
+    order, stopping after MAX_FUZZY_CANDIDATES hits. Only the best `limit`
+    matches of all classes are returned, picked with heaps rather than by
+    sorting every hit.
+    """
+    MAX_FUZZY_CANDIDATES = 500 # Non-substring candidates scored per query, most shared trigrams first
+
+    def __init__(self):
+        self.names = {} # Module ID -> casefolded display name
+        self.words = {} # Module ID -> words of the display name
+        self.postings = {} # trigram -> {Module ID}
+        self._default_order = None
+
+    def rebuild(self, modules):
+        self.names = {}
+        self.words = {}
+        self.postings = {}
+        self._default_order = None
+        for mid, module in modules.items():
+            self._add(mid, module)
+
+    def update(self, modules, changed_ids):
+        """Re-indexes only changed_ids (added, edited or removed modules)."""
+        self._default_order = None
+        for mid in changed_ids:
+            self._remove(mid)
+            if mid in modules:
+                self._add(mid, modules[mid])
+
+    def _add(self, mid, module):
+        display_name = module_display_name(module)
+        text = _search_text(display_name)
+        self.names[mid] = display_name.casefold()
+        self.words[mid] = text.split()
+        for gram in _trigrams(f" {text} "):
+            self.postings.setdefault(gram, set()).add(mid)
+
+    def _remove(self, mid):
+        if mid not in self.names:
+            return
+        for gram in _trigrams(f" {' '.join(self.words[mid])} "):
+            posting = self.postings.get(gram)
+            if posting is not None:
+                posting.discard(mid)
+                if not posting:
+                    del self.postings[gram]
+        del self.names[mid]
+        del self.words[mid]
+
+    @staticmethod
+    def edit_budget(text):
+        if len(text) <= 3:
+            return 0
+        if len(text) <= 6:
+            return 1
+        return 2 if len(text) <= 12 else 3
+
+    def search(self, query, limit=50, accept=None, order=None):
+        """
+        Returns up to limit matching Module IDs, best first. accept(mid) can
+        exclude modules before scoring; order maps Module ID to a position
+        used to break ties (e.g. the current sort order).
+        """
+        return self.search_counted(query, limit, accept, order)[0]
+
+    def search_counted(self, query, limit=50, accept=None, order=None):
+        """
+        Like search(), but returns (Module IDs, total), total being how many
+        modules matched before the cut to limit. Once the substring matches
+        alone fill limit, weaker matches are not scored and not counted.
+        """
+        raw = query.casefold().strip()
+        text = _search_text(query)
+        if not raw:
+            return [], 0
+        if order is None:
+            if self._default_order is None:
+                self._default_order = {mid: pos for pos, mid in enumerate(self.names)}
+            order = self._default_order
+
+        weak_candidates = []
+        if len(text) < 3:
+            # Too short for trigrams: a plain substring scan
+            substring_candidates = [mid for mid, name in self.names.items() if raw in name]
+        else:
+            grams = _trigrams(text)
+            lists = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+            # A substring of the name contains every trigram of the query
+            substring_candidates = set.intersection(*lists) if lists[0] else set()
+            need = max(1, len(grams) - 3 * self.edit_budget(text)) # Each edit breaks at most three trigrams
+            if need < len(grams):
+                shared = collections.Counter()
+                for posting in lists:
+                    shared.update(posting)
+                weak_candidates = [(count, mid) for mid, count in shared.items()
+                                   if count >= need and mid not in substring_candidates]
+        if accept is not None:
+            substring_candidates = [mid for mid in substring_candidates if accept(mid)]
+            weak_candidates = [(count, mid) for count, mid in weak_candidates if accept(mid)]
+        letters = text.replace(' ', '')
+        if not substring_candidates and not weak_candidates and letters:
+            # Nothing shares enough trigrams, e.g. "rcng" for "Racing": scan for the letters in order
+            hits = (mid for mid, name in self.names.items()
+                    if (accept is None or accept(mid)) and self._is_subsequence(letters, name))
+            weak_candidates = [(0, mid) for mid in itertools.islice(hits, self.MAX_FUZZY_CANDIDATES)]
+
+        # Substring tiers: 0 exact name, 1 name prefix, 2 at a word start, 3 inside a word
+        tiered = []
+        names = self.names
+        for mid in substring_candidates:
+            name = names[mid]
+            pos = name.find(raw)
+            if pos < 0:
+                weak_candidates.append((0, mid)) # Every trigram present, but not contiguously
+            elif pos == 0:
+                tiered.append((0 if name == raw else 1, order.get(mid, 0), mid))
+            else:
+                tiered.append((3 if name[pos - 1].isalnum() else 2, order.get(mid, 0), mid))
+        strong = [entry[-1] for entry in heapq.nsmallest(limit, tiered)]
+        if len(strong) >= limit:
+            return strong, len(tiered)
+
+        if len(weak_candidates) > self.MAX_FUZZY_CANDIDATES:
+            weak_candidates = heapq.nlargest(self.MAX_FUZZY_CANDIDATES, weak_candidates,
+                                             key=lambda entry: (entry[0], -order.get(entry[1], 0)))
+        query_words = text.split()
+        distances = {} # (query word, name word) -> edits; name words repeat a lot across a catalog
+        weak = []
+        for _, mid in weak_candidates:
+            words = self.words[mid]
+            score = self._word_score(query_words, words, distances)
+            if not score and self._is_subsequence(letters, self.names[mid]):
+                score = 300
+            if score:
+                # Ties go to the name with the fewest extra words, then to the caller's order
+                weak.append((score, -len(words), -order.get(mid, 0), mid))
+        best_weak = heapq.nlargest(limit - len(strong), weak)
+        return strong + [entry[-1] for entry in best_weak], len(tiered) + len(weak)
+
+    def _word_distance(self, query_word, word, distances):
+        key = (query_word, word)
+        distance = distances.get(key)
+        if distance is None:
+            budget = self.edit_budget(query_word)
+            if word.startswith(query_word):
+                distance = 0
+            else:
+                distance = bounded_edit_distance(query_word, word, budget)
+                if len(word) > len(query_word):
+                    # Still typing: compare against the start of the word
+                    distance = min(distance, bounded_edit_distance(query_word, word[:len(query_word)], budget))
+            distances[key] = distance
+        return distance
+
+    def _word_score(self, query_words, words, distances):
+        edits = 0
+        positions = []
+        for query_word in query_words:
+            budget = self.edit_budget(query_word)
+            best, best_pos = budget + 1, None
+            for pos, word in enumerate(words):
+                distance = self._word_distance(query_word, word, distances)
+                if distance < best:
+                    best, best_pos = distance, pos
+                    if distance == 0:
+                        break
+            if best > budget:
+                return 0
+            edits += best
+            positions.append(best_pos)
+        # Query words found side by side and in order, e.g. "hatune miku" in "Hatsune Miku Cute"
+        in_order = all(b == a + 1 for a, b in zip(positions, positions[1:]))
+        bonus = 30 if len(positions) > 1 and in_order else 0
+        return (600 if edits == 0 else max(310, 500 - 40 * edits)) + bonus
+
+    @staticmethod
+    def _is_subsequence(letters, name):
+        remaining = iter(name)
+        return all(letter in remaining for letter in letters)
+
+
+# --- FrankenNotes ---
+
+def save_note(name, module_id, item_id, desc):
+    os.makedirs(os.path.dirname(NOTES_CSV), exist_ok=True)
+    with open(NOTES_CSV, 'a', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow([name, module_id, item_id, desc])
+
+def load_notes():
+    notes = {}
+    order = []
+    if os.path.exists(NOTES_CSV):
+        with open(NOTES_CSV, newline='', encoding='utf-8') as csvfile:
+            reader = csv.reader(csvfile)
+            for row in reader:
+                if len(row) < 4:
+                    continue
+                name, module_id, item_id, desc = row
+                if name not in notes:
+                    notes[name] = []
+                    order.append(name)
+                notes[name].append((module_id, item_id, desc))
+    return notes, order
+
+def save_all_notes(notes):
+    """Saves all notes from the current_notes_data dictionary to NOTES_CSV."""
+    os.makedirs(os.path.dirname(NOTES_CSV), exist_ok=True)
+    # Write to a temporary file first so a failed save never leaves a half-written notes.csv
+    tmp_path = NOTES_CSV + ".tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        for name, items in notes.items():
+            for module_id, item_id, desc in items:
+                writer.writerow([name, module_id, item_id, desc])
+    os.replace(tmp_path, NOTES_CSV)
+
+# --- Bulk import / export of notes ---
+NOTE_EXPORT_FIELDS = ['note', 'module_id', 'item_id', 'description']
+NOTE_MERGE_POLICIES = {
+    'skip': "Keep existing items, skip conflicting imported ones",
+    'overwrite': "Replace descriptions of existing items",
+    'keep_both': "Keep both as separate items",
+}
+
+def _is_jsonl_path(path):
+    return path.lower().endswith(('.jsonl', '.ndjson'))
+
+def iter_note_rows(path):
+    """
+    Yields (note name, Module ID, Item ID, description) tuples from a notes
+    CSV (the notes.csv layout, optional header) or a JSON Lines file, one row
+    at a time so files of any size are read in constant memory.
+    """
+    if _is_jsonl_path(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                yield tuple(str(record.get(field, '')) for field in NOTE_EXPORT_FIELDS)
+    else:
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            for row in reader:
+                if len(row) < 4:
+                    continue
+                if [value.strip().lower().replace(' ', '_') for value in row[:4]] == NOTE_EXPORT_FIELDS:
+                    continue # Header row
+                yield tuple(row[:4])
+
+def iter_notes(notes):
+    for name, items in notes.items():
+        for module_id, item_id, desc in items:
+            yield (name, module_id, item_id, desc)
+
+def export_notes(rows, path):
+    """Streams (note, Module ID, Item ID, description) rows to a CSV or JSON Lines file. Returns the row count."""
+    count = 0
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        if _is_jsonl_path(path):
+            for row in rows:
+                f.write(json.dumps(dict(zip(NOTE_EXPORT_FIELDS, row)), ensure_ascii=False))
+                f.write("\n")
+                count += 1
+        else:
+            writer = csv.writer(f)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+    os.replace(tmp_path, path)
+    return count
+
+def catalog_item_keys(catalog):
+    """Set of (Module ID, Item ID) pairs present in the catalog, for O(1) validation of imported rows."""
+    return {(mid, item['Item ID']) for mid, module in catalog.items() for item in module['Items']}
+
+def import_notes(rows, notes, order, policy='skip', valid_items=None):
+    """
+    Merges rows into notes/order in place, keyed on (note name, Module ID, Item ID).
+    Conflicts are resolved by policy (see NOTE_MERGE_POLICIES). Rows whose
+    (Module ID, Item ID) is not in valid_items are rejected. Nothing is
+    written to disk; the caller saves once for the whole import.
+    Returns a stats dict with added/updated/skipped/invalid counts, the first
+    few invalid rows and the set of touched note names.
+    """
+    if policy not in NOTE_MERGE_POLICIES:
+        raise ValueError(f"Unknown merge policy '{policy}'")
+    positions = {}
+    for name, items in notes.items():
+        for pos, (module_id, item_id, _desc) in enumerate(items):
+            positions.setdefault((name, module_id, item_id), pos)
+
+    stats = {'added': 0, 'updated': 0, 'skipped': 0, 'invalid': 0, 'invalid_rows': [], 'touched': set()}
+    for name, module_id, item_id, desc in rows:
+        name = name.strip()
+        if not name or (valid_items is not None and (module_id, item_id) not in valid_items):
+            stats['invalid'] += 1
+            if len(stats['invalid_rows']) < 10:
+                stats['invalid_rows'].append((name, module_id, item_id))
+            continue
+        key = (name, module_id, item_id)
+        pos = positions.get(key)
+        if pos is not None and policy != 'keep_both':
+            if policy == 'overwrite' and notes[name][pos][2] != desc:
+                notes[name][pos] = (module_id, item_id, desc)
+                stats['updated'] += 1
+                stats['touched'].add(name)
+            else:
+                stats['skipped'] += 1
+            continue
+        if name not in notes:
+            notes[name] = []
+            order.append(name)
+        notes[name].append((module_id, item_id, desc))
+        if pos is None:
+            positions[key] = len(notes[name]) - 1
+        stats['added'] += 1
+        stats['touched'].add(name)
+    return stats
+
+class NoteSearchIndex:
+    """
+    Inverted index from words to (note name, item position) postings. Words
+    come from the note name, the item description, the referenced Module and
+    Item IDs, and the referenced module's name and object(s) from the catalog.
+    Kept up to date per item or per note rather than rebuilt from notes.csv.
+    """
+    def __init__(self):
+        self.postings = {} # word -> set of (note name, position)
+        self._note_words = {} # note name -> [word set per item position]
+        self._vocabulary = None # Sorted words for prefix queries, rebuilt lazily
+        self.stamp = None # file_stamp(NOTES_CSV) the index was last in sync with
+
+    @staticmethod
+    def _words_for(note_name, item, catalog):
+        module_id, item_id, desc = item
+        text = f"{note_name} {desc}"
+        module = catalog.get(module_id) if catalog else None
+        if module:
+            text += f" {module['Name (EN)']}"
+            for catalog_item in module['Items']:
+                if catalog_item['Item ID'] == item_id:
+                    text += f" {catalog_item['Object(s)']}"
+        words = set(re.findall(r'\w+', text.casefold()))
+        words.add(module_id.casefold())
+        words.add(item_id.casefold())
+        words.discard('')
+        return words
+
+    def _add_posting(self, name, pos, words):
+        for word in words:
+            if word not in self.postings:
+                self.postings[word] = set()
+                self._vocabulary = None
+            self.postings[word].add((name, pos))
+
+    def _remove_postings(self, name, pos, words):
+        for word in words:
+            posting = self.postings.get(word)
+            if posting is None:
+                continue
+            posting.discard((name, pos))
+            if not posting:
+                del self.postings[word]
+                self._vocabulary = None
+
+    def rebuild(self, notes, catalog):
+        self.postings = {}
+        self._note_words = {}
+        self._vocabulary = None
+        for name, items in notes.items():
+            self.reindex_note(name, items, catalog)
+        self.stamp = file_stamp(NOTES_CSV)
+
+    def sync(self, notes, catalog):
+        """Rebuilds only if notes.csv changed behind the index's back."""
+        if self.stamp is None or self.stamp != file_stamp(NOTES_CSV):
+            self.rebuild(notes, catalog)
+
+    def add_item(self, name, pos, item, catalog):
+        words = self._words_for(name, item, catalog)
+        self._note_words.setdefault(name, []).insert(pos, words)
+        self._add_posting(name, pos, words)
+
+    def update_item(self, name, pos, item, catalog):
+        note_words = self._note_words.get(name)
+        if note_words is None or pos >= len(note_words):
+            self.add_item(name, pos, item, catalog)
+            return
+        self._remove_postings(name, pos, note_words[pos])
+        note_words[pos] = self._words_for(name, item, catalog)
+        self._add_posting(name, pos, note_words[pos])
+
+    def reindex_note(self, name, items, catalog):
+        """Replaces all postings of one note, e.g. after a delete shifted its positions."""
+        self.remove_note(name)
+        for pos, item in enumerate(items):
+            self.add_item(name, pos, item, catalog)
+
+    def remove_note(self, name):
+        for pos, words in enumerate(self._note_words.pop(name, [])):
+            self._remove_postings(name, pos, words)
+
+    def search(self, query, limit=None):
+        """
+        Returns (note name, position) pairs where every word of the query is a
+        prefix of some indexed word, ordered by note name then position.
+        """
+        tokens = re.findall(r'\w+', query.casefold())
+        if not tokens:
+            return []
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        matches = None
+        for token in tokens:
+            lo = bisect.bisect_left(self._vocabulary, token)
+            hi = bisect.bisect_left(self._vocabulary, token + '\U0010ffff')
+            token_matches = set()
+            for word in self._vocabulary[lo:hi]:
+                token_matches |= self.postings[word]
+            matches = token_matches if matches is None else matches & token_matches
+            if not matches:
+                return []
+        return sorted(matches)[:limit]
+
+class NotesModel:
+    """
+    FrankenNotes kept in memory across window opens. Every change is made
+    here, saved to NOTES_CSV and reported to the subscribed listeners as one
+    event tuple, so views and indexes touch only what changed:
+        ('reset',)                         anything may have changed
+        ('note_added', name, index)        index into order
+        ('note_removed', name, index)
+        ('note_changed', name)             any of the note's items may have changed
+        ('item_inserted', name, pos, item)
+        ('item_updated', name, pos, item)
+        ('item_removed', name, pos)
+    Listeners are called after the in-memory change and before the save, so
+    they stay consistent with the model even if saving fails (an import is
+    reported after its save, since a failed one is rolled back).
+
+    If notes.csv was changed by someone else since the last load or save
+    (e.g. divadiva-cli notes-import), saving first merges in the rows added
+    and removed there, and reports a reset.
+    """
+    def __init__(self):
+        self.notes = {} # note name -> [(Module ID, Item ID, description)]
+        self.order = []
+        self.stamp = None # file_stamp(NOTES_CSV) as of the last load or save
+        self._base = collections.Counter() # Rows of notes.csv as of the last load or save
+        self.loaded = False
+        self.listeners = []
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def _emit(self, *event):
+        for listener in list(self.listeners):
+            listener(event)
+
+    def reload(self):
+        # Refilled in place, so references to notes and order stay valid
+        notes, order = load_notes()
+        self.notes.clear()
+        self.notes.update(notes)
+        self.order[:] = order
+        self.stamp = file_stamp(NOTES_CSV)
+        self._base = collections.Counter(iter_notes(notes))
+        self.loaded = True
+        self._emit('reset')
+
+    def sync(self):
+        """Reloads only if notes.csv changed since the last load or save. Returns True if it reloaded."""
+        if self.loaded and self.stamp == file_stamp(NOTES_CSV):
+            return False
+        self.reload()
+        return True
+
+    def save(self):
+        if self.loaded and file_stamp(NOTES_CSV) != self.stamp:
+            self._merge_from_disk()
+        save_all_notes(self.notes)
+        self.stamp = file_stamp(NOTES_CSV)
+        self._base = collections.Counter(iter_notes(self.notes))
+
+    def _merge_from_disk(self):
+        # Three-way: rows added or removed on disk since our base are applied on top of our changes
+        disk_notes, _ = load_notes()
+        disk = collections.Counter(iter_notes(disk_notes))
+        for name, module_id, item_id, desc in (self._base - disk).elements():
+            items = self.notes.get(name)
+            if items and (module_id, item_id, desc) in items:
+                items.remove((module_id, item_id, desc))
+                if not items:
+                    del self.notes[name]
+                    self.order.remove(name)
+        for name, module_id, item_id, desc in (disk - self._base).elements():
+            if name not in self.notes:
+                self.notes[name] = []
+                self.order.append(name)
+            self.notes[name].append((module_id, item_id, desc))
+        self._emit('reset')
+
+    def add_note(self, name):
+        """Adds an empty note. Returns False if one with that name exists."""
+        if name in self.notes:
+            return False
+        self.notes[name] = []
+        self.order.append(name)
+        self._emit('note_added', name, len(self.order) - 1)
+        self.save()
+        return True
+
+    def add_items(self, name, items):
+        """Appends items to a note, creating it if needed. Returns the position of the first one."""
+        if name not in self.notes:
+            self.notes[name] = []
+            self.order.append(name)
+            self._emit('note_added', name, len(self.order) - 1)
+        note_items = self.notes[name]
+        first = len(note_items)
+        for item in items:
+            note_items.append(tuple(item))
+            self._emit('item_inserted', name, len(note_items) - 1, note_items[-1])
+        self.save()
+        return first
+
+    def update_item(self, name, pos, item):
+        self.notes[name][pos] = tuple(item)
+        self._emit('item_updated', name, pos, self.notes[name][pos])
+        self.save()
+
+    def remove_item(self, name, pos):
+        """Removes one item; a note left empty is removed with it."""
+        self.notes[name].pop(pos)
+        self._emit('item_removed', name, pos)
+        if not self.notes[name]:
+            index = self.order.index(name)
+            del self.notes[name]
+            del self.order[index]
+            self._emit('note_removed', name, index)
+        self.save()
+
+    def import_rows(self, rows, policy='skip', valid_items=None):
+        """
+        Merges rows as import_notes does and saves once. On any error the
+        model is reloaded from disk and the error re-raised.
+        """
+        self.sync() # Import on top of what is on disk now
+        known = len(self.order)
+        try:
+            stats = import_notes(rows, self.notes, self.order, policy=policy, valid_items=valid_items)
+            self.save()
+        except Exception:
+            self.reload()
+            raise
+        for index in range(known, len(self.order)):
+            self._emit('note_added', self.order[index], index)
+        for name in stats['touched']:
+            self._emit('note_changed', name)
+        return stats
@@ -0,0 +1,266 @@
+"""
+Opt-in diagnostics for DivaDivaModule: an event-loop stall watchdog that
+samples the main thread's stack while Tk is unresponsive, and a memory
+report of Tk widgets, images, catalog structures and tracemalloc
+allocations by subsystem. Nothing here imports tkinter; the GUI passes in
+what is needed, so the CLI can use the same reports.
+"""
+import collections
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import traceback
+
+from divadiva_core import APP_DIR
+
+STALL_LOG = os.path.join(APP_DIR, "stalls.log")
+STALL_LOG_MAX_BYTES = 1024 * 1024 # Rotated to stalls.log.1 beyond this
+
+
+class StallWatchdog:
+    """
+    Detects event-loop stalls. A heartbeat is re-scheduled on the Tk thread
+    with schedule (root.after) every interval_ms; a background thread notices
+    when it is more than threshold seconds late and, for as long as the stall
+    lasts, samples the main thread's stack with sys._current_frames(). Each
+    stall is written to log_path with its most frequent stacks, and a summary
+    of the session is appended by stop().
+    """
+    def __init__(self, schedule, log_path=STALL_LOG, interval_ms=100, threshold=0.2, sample_interval=0.01, max_stacks=5):
+        self.schedule = schedule
+        self.log_path = log_path
+        self.interval_ms = interval_ms
+        self.threshold = threshold
+        self.sample_interval = sample_interval
+        self.max_stacks = max_stacks
+        self.main_ident = threading.main_thread().ident
+        self.last_beat = time.monotonic()
+        self.stall_count = 0
+        self.stall_seconds = 0.0
+        self.leaf_samples = collections.Counter() # Innermost frame -> samples, across the session
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.last_beat = time.monotonic()
+        self.schedule(self.interval_ms, self._beat)
+        self._thread = threading.Thread(target=self._monitor, daemon=True, name="StallWatchdog")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.stall_count:
+            lines = [f"=== Session summary {time.strftime('%Y-%m-%d %H:%M:%S')}: "
+                     f"{self.stall_count} stall(s), {self.stall_seconds:.2f}s total ==="]
+            total = sum(self.leaf_samples.values()) or 1
+            for (filename, lineno, name), count in self.leaf_samples.most_common(10):
+                lines.append(f"  {100.0 * count / total:5.1f}%  {name} ({os.path.basename(filename)}:{lineno})")
+            self._write(lines)
+
+    def _beat(self):
+        self.last_beat = time.monotonic()
+        if not self._stop.is_set():
+            self.schedule(self.interval_ms, self._beat)
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.main_ident)
+        if frame is None:
+            return None
+        return tuple((f.filename, f.lineno, f.name) for f in traceback.extract_stack(frame))
+
+    def _monitor(self):
+        expected = self.interval_ms / 1000.0
+        stall_start = None
+        samples = collections.Counter()
+        while not self._stop.wait(self.sample_interval):
+            late = time.monotonic() - self.last_beat - expected
+            if late > self.threshold:
+                if stall_start is None:
+                    stall_start = self.last_beat + expected
+                    samples = collections.Counter()
+                stack = self._sample()
+                if stack:
+                    samples[stack] += 1
+            elif stall_start is not None:
+                self._report(self.last_beat - stall_start, samples)
+                stall_start = None
+
+    def _report(self, duration, samples):
+        self.stall_count += 1
+        self.stall_seconds += duration
+        total = sum(samples.values())
+        for stack, count in samples.items():
+            self.leaf_samples[stack[-1]] += count
+
+        lines = [f"=== Stall of {duration:.3f}s ending {time.strftime('%Y-%m-%d %H:%M:%S')} ({total} samples) ==="]
+        for stack, count in samples.most_common(self.max_stacks):
+            lines.append(f"--- {count}/{total} samples ({100.0 * count / max(total, 1):.0f}%), innermost call last:")
+            for filename, lineno, name in stack[-25:]:
+                lines.append(f"    {os.path.basename(filename)}:{lineno} in {name}")
+        self._write(lines)
+
+    def _write(self, lines):
+        try:
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > STALL_LOG_MAX_BYTES:
+                os.replace(self.log_path, self.log_path + ".1")
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n\n")
+        except OSError as e:
+            print(f"Could not write stall report to {self.log_path}: {e}")
+
+
+# --- Memory accounting ---
+
+# Our source files -> subsystem name for tracemalloc grouping
+MEMORY_SUBSYSTEMS = {
+    'divadivamodule.py': 'GUI',
+    'divadiva_core.py': 'Catalog, notes and items',
+    'divadiva_thumbs.py': 'Thumbnails',
+    'divadiva_diagnostics.py': 'Diagnostics',
+    'divadiva_cli.py': 'CLI',
+    'divadiva_api.py': 'API server',
+    'divadiva_uibench.py': 'UI benchmark',
+}
+TRACEMALLOC_FRAMES = 25
+
+def start_memory_tracing():
+    """Starts tracemalloc if needed. Returns False if it was already tracing (e.g. via PYTHONTRACEMALLOC)."""
+    if tracemalloc.is_tracing():
+        return False
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+    return True
+
+def _subsystem_for(traceback_):
+    # Attribute an allocation to the innermost frame in our own code, so that
+    # csv/json/tkinter allocations count towards the code that asked for them
+    for frame in reversed(traceback_):
+        name = MEMORY_SUBSYSTEMS.get(os.path.basename(frame.filename))
+        if name:
+            return name
+    for frame in reversed(traceback_):
+        path = frame.filename.replace('\\', '/')
+        for library in ('tkinter', 'PIL'):
+            if f'/{library}/' in path:
+                return library
+    return 'Other'
+
+def tracemalloc_rows(snapshot):
+    """Groups a tracemalloc snapshot's live allocations by subsystem, largest first."""
+    sizes = collections.Counter()
+    blocks = collections.Counter()
+    for trace in snapshot.traces:
+        name = _subsystem_for(trace.traceback)
+        sizes[name] += trace.size
+        blocks[name] += 1
+    return [('Allocations', name, blocks[name], size) for name, size in sizes.most_common()]
+
+def deep_sizeof(obj, seen):
+    """Size of obj and the containers and strings under it, skipping objects already in seen."""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += deep_sizeof(key, seen) + deep_sizeof(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for value in obj:
+            size += deep_sizeof(value, seen)
+    return size
+
+def catalog_rows(modules):
+    """
+    Memory held by the modules dict, split into module records, their items
+    and their 'Names' rows. Shared strings are counted once, under the part
+    measured first, so the 'Names' figure is what the duplicated rows add.
+    """
+    seen = set()
+    records = sys.getsizeof(modules) + sum(deep_sizeof(mid, seen) for mid in modules)
+    items = names = item_count = name_count = 0
+    for module in modules.values():
+        seen.add(id(module))
+        records += sys.getsizeof(module)
+        for key, value in module.items():
+            if key not in ('Items', 'Names'):
+                records += deep_sizeof(key, seen) + deep_sizeof(value, seen)
+    for module in modules.values():
+        items += deep_sizeof(module['Items'], seen)
+        item_count += len(module['Items'])
+    for module in modules.values():
+        names += deep_sizeof(module['Names'], seen)
+        name_count += 1
+    return [
+        ('Catalog', 'Module records', len(modules), records),
+        ('Catalog', 'Items', item_count, items),
+        ('Catalog', "'Names' rows", name_count, names),
+    ]
+
+def tk_widget_rows(root):
+    """Live widget counts by Tk class, walking every window under root."""
+    counts = collections.Counter()
+    pending = [root]
+    while pending:
+        widget = pending.pop()
+        counts[widget.winfo_class()] += 1
+        pending.extend(widget.winfo_children())
+    return [('Tk widgets', name, count, '') for name, count in counts.most_common()]
+
+def tk_image_rows(root, sources=None):
+    """
+    Live Tk images with their pixel memory (4 bytes per photo pixel).
+    sources maps a label to the PhotoImage objects it owns; images nobody
+    claims are reported as 'Other'.
+    """
+    owner = {}
+    for label, images in (sources or {}).items():
+        for image in images:
+            owner[str(image)] = label
+    counts = collections.Counter()
+    sizes = collections.Counter()
+    for name in root.tk.splitlist(root.tk.call('image', 'names')):
+        name = str(name)
+        label = owner.get(name, 'Other')
+        counts[label] += 1
+        if root.tk.call('image', 'type', name) == 'photo':
+            sizes[label] += int(root.tk.call('image', 'width', name)) * int(root.tk.call('image', 'height', name)) * 4
+    return [('Tk images', label, counts[label], sizes[label]) for label in sorted(counts, key=lambda l: -sizes[l])]
+
+def memory_report(root=None, image_sources=None, modules=None, extra_rows=()):
+    """Collects (section, name, count, bytes) rows for whatever is available."""
+    rows = []
+    if root is not None:
+        rows += tk_widget_rows(root)
+        rows += tk_image_rows(root, image_sources)
+    rows += list(extra_rows)
+    if modules is not None:
+        rows += catalog_rows(modules)
+    if tracemalloc.is_tracing():
+        rows += tracemalloc_rows(tracemalloc.take_snapshot())
+        current, peak = tracemalloc.get_traced_memory()
+        rows.append(('Allocations', 'Total traced (peak)', '', f"{current} ({peak})"))
+    return rows
+
+def _format_bytes(value):
+    if not isinstance(value, int):
+        return str(value)
+    for unit in ('B', 'KB', 'MB'):
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == 'B' else f"{value:.1f} {unit}"
+        value /= 1024.0
+    return f"{value:.1f} GB"
+
+def format_memory_report(rows):
+    lines = []
+    section = None
+    for row_section, name, count, size in rows:
+        if row_section != section:
+            section = row_section
+            if lines:
+                lines.append("")
+            lines.append(section)
+        lines.append(f"  {name:<32} {count!s:>8} {_format_bytes(size):>12}")
+    if not tracemalloc.is_tracing():
+        lines.append("\nAllocations: tracemalloc is not running.")
+    return "\n".join(lines)
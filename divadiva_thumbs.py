@@ -0,0 +1,292 @@
+"""
+Texture thumbnails for item archives. Reads the texture set (*_tex.bin)
+inside an item's .farc, decodes a small preview with PIL and keeps it in an
+on-disk LRU cache keyed by the archive's (size, mtime). Decoding runs in
+worker processes, so this module has no import-time side effects.
+"""
+import gzip
+import hashlib
+import os
+import struct
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+THUMBNAIL_SIZE = 64
+
+# --- FARC archives ---
+
+def read_farc_entries(path):
+    """
+    Returns {entry name: (offset, stored size, size)} for an FArc (plain) or
+    FArC (gzip-compressed) archive. Raises ValueError for other archive types,
+    such as encrypted FARC archives.
+    """
+    with open(path, 'rb') as f:
+        signature = f.read(4)
+        header_size, = struct.unpack('>I', f.read(4))
+        header = f.read(header_size)
+    if signature not in (b'FArc', b'FArC'):
+        raise ValueError(f"Unsupported archive type {signature!r}")
+    compressed = signature == b'FArC'
+
+    entries = {}
+    pos = 4 # Skip the alignment field
+    while pos < len(header):
+        end = header.find(b'\0', pos)
+        if end <= pos: # Padding at the end of the header
+            break
+        name = header[pos:end].decode('utf-8', 'replace')
+        pos = end + 1
+        if compressed:
+            if pos + 12 > len(header):
+                break
+            offset, stored_size, size = struct.unpack_from('>III', header, pos)
+            pos += 12
+        else:
+            if pos + 8 > len(header):
+                break
+            offset, size = struct.unpack_from('>II', header, pos)
+            stored_size = size
+            pos += 8
+        entries[name] = (offset, stored_size, size)
+    return entries
+
+def read_farc_entry(path, entry):
+    offset, stored_size, size = entry
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(stored_size)
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+    return data
+
+# --- TXP texture sets ---
+
+TXP_SET = 0x03505854
+TXP_TEXTURE = 0x04505854
+TXP_CUBE_MAP = 0x05505854
+TXP_MIPMAP = 0x02505854
+
+# TXP format id -> (PIL mode, BCn decoder number or None for raw data)
+TXP_FORMATS = {
+    0: ('L', None), # A8
+    1: ('RGB', None), # RGB8
+    2: ('RGBA', None), # RGBA8
+    6: ('RGBA', 1), # DXT1
+    7: ('RGBA', 1), # DXT1a
+    8: ('RGBA', 2), # DXT3
+    9: ('RGBA', 3), # DXT5
+    10: ('L', 4), # ATI1
+    11: ('RGB', 5), # ATI2
+    12: ('L', None), # L8
+    13: ('LA', None), # L8A8
+}
+TXP_ATI1 = 10
+TXP_ATI2 = 11
+
+def iter_txp_textures(data):
+    """Yields each texture of a texture set as a list of (width, height, format, data) mipmaps of its first layer."""
+    signature, count = struct.unpack_from('<II', data, 0)
+    if signature != TXP_SET:
+        raise ValueError("Not a texture set")
+    for offset in struct.unpack_from(f'<{count}I', data, 12):
+        signature, sub_count, info = struct.unpack_from('<III', data, offset)
+        if signature not in (TXP_TEXTURE, TXP_CUBE_MAP):
+            continue
+        mip_count = info & 0xFF
+        mipmaps = []
+        for mip_offset in struct.unpack_from(f'<{sub_count}I', data, offset + 12)[:mip_count]:
+            start = offset + mip_offset
+            signature, width, height, fmt, _id, size = struct.unpack_from('<IiiiiI', data, start)
+            if signature != TXP_MIPMAP:
+                break
+            mipmaps.append((width, height, fmt, data[start + 24:start + 24 + size]))
+        yield mipmaps
+
+def _decode_mipmap(width, height, fmt, data):
+    from PIL import Image
+    mode, bcn = TXP_FORMATS[fmt]
+    if bcn is None:
+        return Image.frombytes(mode, (width, height), data)
+    return Image.frombytes(mode, (width, height), data, 'bcn', bcn)
+
+def _ycbcr_to_rgba(luma, chroma):
+    """Combines an MM+ style YCbCr pair (luma+alpha in R/G, Cb/Cr in R/G) into RGBA."""
+    from PIL import Image
+    chroma = chroma.resize(luma.size)
+    pixels = []
+    for (y, a, _), (cb, cr, _) in zip(luma.getdata(), chroma.getdata()):
+        y /= 255.0
+        cb = cb / 255.0 - 0.5
+        cr = cr / 255.0 - 0.5
+        rgb = (y + 1.5748 * cr, y - 0.1873 * cb - 0.4681 * cr, y + 1.8556 * cb)
+        pixels.append(tuple(max(0, min(255, int(c * 255))) for c in rgb) + (a,))
+    image = Image.new('RGBA', luma.size)
+    image.putdata(pixels)
+    return image
+
+def decode_preview(data, size=THUMBNAIL_SIZE):
+    """Returns a PIL image preview of the first colour texture in a texture set, or None."""
+    from PIL import Image
+    for mipmaps in iter_txp_textures(data):
+        if not mipmaps:
+            continue
+        width, height, fmt, pixels = mipmaps[0]
+        if fmt not in TXP_FORMATS:
+            continue
+        if fmt == TXP_ATI2 and len(mipmaps) == 2:
+            # Two-level ATI2 textures hold YCbCr colour; shrink before the per-pixel conversion
+            luma = _decode_mipmap(width, height, fmt, pixels)
+            chroma = _decode_mipmap(*mipmaps[1])
+            luma.thumbnail((size, size))
+            image = _ycbcr_to_rgba(luma, chroma)
+        elif fmt in (TXP_ATI1, TXP_ATI2):
+            continue # Single-level ATI textures are normal or mask maps, not colour
+        else:
+            image = _decode_mipmap(width, height, fmt, pixels)
+        image = image.convert('RGBA').transpose(Image.Transpose.FLIP_TOP_BOTTOM)
+        image.thumbnail((size, size))
+        return image
+    return None
+
+def extract_thumbnail(farc_path, out_path, size=THUMBNAIL_SIZE):
+    """
+    Worker entry point: writes a PNG preview of farc_path to out_path and
+    returns out_path, or writes an empty out_path + '.none' marker and
+    returns None when the archive was read but has no decodable colour
+    texture. I/O errors propagate and leave nothing cached, so the archive
+    is tried again next time.
+    """
+    try:
+        entries = read_farc_entries(farc_path)
+    except (ValueError, struct.error):
+        entries = {} # Not an archive we can read, e.g. encrypted: nothing to decode
+    image = None
+    for name, entry in entries.items():
+        if not name.lower().endswith('_tex.bin'):
+            continue
+        try:
+            image = decode_preview(read_farc_entry(farc_path, entry), size)
+        except (ValueError, struct.error, EOFError, zlib.error, gzip.BadGzipFile):
+            continue # A corrupt texture set; try the next one
+        if image is not None:
+            break
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    if image is None:
+        with open(out_path + '.none', 'wb'):
+            pass
+        return None
+    tmp_path = out_path + '.tmp'
+    image.save(tmp_path, 'PNG')
+    os.replace(tmp_path, out_path)
+    return out_path
+
+# --- Cache and background service ---
+
+class ThumbnailCache:
+    """
+    Preview PNGs on disk, one per archive (size, mtime). A hit refreshes the
+    file's mtime, and the least recently used files are evicted once the
+    folder grows past max_bytes.
+    """
+    def __init__(self, folder, max_bytes=64 * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._total_bytes = None # Computed on first add
+        self._lock = threading.Lock()
+
+    def path_for(self, farc_path):
+        try:
+            st = os.stat(farc_path)
+        except OSError:
+            return None
+        key = f"{os.path.abspath(farc_path)}|{st.st_size}|{st.st_mtime_ns}"
+        return os.path.join(self.folder, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.png')
+
+    def lookup(self, png_path):
+        """Returns 'hit', 'none' (known to have no preview) or 'miss'."""
+        try:
+            os.utime(png_path)
+            return 'hit'
+        except OSError:
+            pass
+        return 'none' if os.path.exists(png_path + '.none') else 'miss'
+
+    def added(self, png_path):
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._entries())
+            else:
+                try:
+                    self._total_bytes += os.path.getsize(png_path)
+                except OSError:
+                    pass
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        try:
+            with os.scandir(self.folder) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        st = entry.stat()
+                        yield entry.path, st.st_size, st.st_mtime
+        except OSError:
+            return
+
+    def _evict(self):
+        # Drop least recently used files until 10% below the budget
+        target = self.max_bytes * 0.9
+        for path, size, _ in sorted(self._entries(), key=lambda entry: entry[2]):
+            if self._total_bytes <= target:
+                break
+            try:
+                os.remove(path)
+                self._total_bytes -= size
+            except OSError:
+                pass
+
+class ThumbnailService:
+    """
+    Hands out previews for .farc paths: cached ones immediately, others as
+    futures of a process pool running extract_thumbnail(). Each archive
+    version is extracted once; concurrent requests share one future.
+    """
+    def __init__(self, cache, max_workers=None):
+        self.cache = cache
+        self.max_workers = max_workers
+        self._executor = None
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def request(self, farc_path):
+        """Returns ('ready', png path), ('none', None) or ('pending', future resolving to a png path or None)."""
+        png_path = self.cache.path_for(farc_path)
+        if png_path is None:
+            return ('none', None)
+        state = self.cache.lookup(png_path)
+        if state == 'hit':
+            return ('ready', png_path)
+        if state == 'none':
+            return ('none', None)
+        with self._lock:
+            future = self._in_flight.get(png_path)
+            if future is None:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                future = self._executor.submit(extract_thumbnail, farc_path, png_path)
+                self._in_flight[png_path] = future
+                future.add_done_callback(lambda f, png_path=png_path: self._done(png_path, f))
+        return ('pending', future)
+
+    def _done(self, png_path, future):
+        with self._lock:
+            self._in_flight.pop(png_path, None)
+        if not future.cancelled() and future.exception() is None and future.result():
+            self.cache.added(png_path)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,273 @@
+"""
+UI latency benchmark for DivaDivaModule. Builds a synthetic catalog and
+notes.csv in a throwaway app folder, runs the real app, injects input
+events and measures how long each takes until the Tk event loop is idle
+again (root.update() returning). Percentiles are checked against the
+budgets in ui_latency_budgets.json; the exit status is 1 if any is over.
+
+On Linux without a display it starts its own Xvfb server.
+
+Examples:
+    python divadiva_uibench.py
+    python divadiva_uibench.py --modules 50000 --notes 20000 --runs 10
+    python divadiva_uibench.py --update-budgets
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BUDGETS_FILE = os.path.join(SCRIPT_DIR, "ui_latency_budgets.json")
+
+SEARCH_QUERY = "hatsune miku"
+SCROLL_STEPS = 40
+SELECT_STEPS = 30
+
+# --- Synthetic data ---
+
+NAME_WORDS = ["Hatsune", "Miku", "Racing", "Snow", "Sakura", "Future", "Style", "Append", "Classic",
+              "Summer", "Night", "Star", "Breathe", "Cyber", "Angel", "Blue", "Crimson", "Heart"]
+ITEM_TYPES = ["Hair", "Body", "Hands (Te)", "Face Accessory", "Head Accessory", "Back Accessory"]
+CHARACTERS = ["Miku", "Rin", "Len", "Luka", "KAITO", "MEIKO", "Neru", "Haku", "Sakine", "Teto"]
+
+def write_synthetic_catalog(path, module_count, items_per_module, rng):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Module ID", "Name (EN)", "Name (JP)", "Character", "Source", "COS ID", "Item ID", "Object(s)", "Type"])
+        for mid in range(module_count):
+            character = CHARACTERS[mid % len(CHARACTERS)]
+            name = " ".join(rng.sample(NAME_WORDS, 3))
+            prefix = character[:3].upper()
+            for item in range(items_per_module):
+                writer.writerow([mid, name, f"モジュール{mid}", character, f"Source {mid % 7}", mid,
+                                 mid * items_per_module + item, f"{prefix}ITM{mid:05d}_{item}", ITEM_TYPES[item % len(ITEM_TYPES)]])
+
+def write_synthetic_notes(path, item_count, module_count, items_per_module, rng):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        for index in range(item_count):
+            mid = rng.randrange(module_count)
+            writer.writerow([f"Note {index // 25:04d}", mid, mid * items_per_module + rng.randrange(items_per_module),
+                             " ".join(rng.sample(NAME_WORDS, 4))])
+
+def prepare_app_dir(root_dir, args):
+    """Fills root_dir/DivaDivaModule so the app starts without any first-run dialog."""
+    app_dir = os.path.join(root_dir, "DivaDivaModule")
+    os.makedirs(os.path.join(app_dir, "items"))
+    rng = random.Random(args.seed)
+    write_synthetic_catalog(os.path.join(app_dir, "modules_data.csv"), args.modules, args.items_per_module, rng)
+    write_synthetic_notes(os.path.join(app_dir, "notes.csv"), args.notes, args.modules, args.items_per_module, rng)
+    viewer = os.path.join(app_dir, "MikuMikuModel.exe")
+    with open(viewer, 'wb'):
+        pass
+    with open(os.path.join(app_dir, "items", "placeholder.farc"), 'wb'):
+        pass # A non-empty items folder skips the tutorial
+    with open(os.path.join(app_dir, "settings.json"), 'w') as f:
+        json.dump({"mikumikumodel_exe": viewer, "theme": "light", "hot_reload": False,
+                   "single_instance": False, "api_server": False, "prefetch_mb": 0,
+                   "module_group": None}, f) # Flat list: the scroll and select scenarios walk module rows
+
+# --- Virtual display ---
+
+def start_virtual_display():
+    """Starts Xvfb if this is Linux without a DISPLAY. Returns the process, or None if none was needed."""
+    if not sys.platform.startswith('linux') or os.environ.get('DISPLAY'):
+        return None
+    xvfb = shutil.which('Xvfb')
+    if xvfb is None:
+        sys.exit("No X display: install Xvfb or run under xvfb-run.")
+    for number in range(99, 199):
+        if os.path.exists(f"/tmp/.X11-unix/X{number}") or os.path.exists(f"/tmp/.X{number}-lock"):
+            continue
+        process = subprocess.Popen([xvfb, f":{number}", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline and process.poll() is None:
+            if os.path.exists(f"/tmp/.X11-unix/X{number}"):
+                os.environ['DISPLAY'] = f":{number}"
+                return process
+            time.sleep(0.05)
+        process.kill()
+    sys.exit("Could not start Xvfb.")
+
+# --- Measuring ---
+
+def percentile(samples, fraction):
+    # Nearest rank, so p100 is the maximum and nothing is interpolated
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered), math.ceil(fraction * len(ordered))) - 1)]
+
+def find_widget(widget, predicate):
+    for child in widget.winfo_children():
+        if predicate(child):
+            return child
+        found = find_widget(child, predicate)
+        if found is not None:
+            return found
+    return None
+
+class Driver:
+    """Runs the scenarios from inside the app's event loop, then quits it."""
+    def __init__(self, app, runs):
+        self.app = app
+        self.runs = runs
+        self.samples = {} # scenario -> [milliseconds]
+        self.error = None
+
+    def measure(self, root, scenario, action):
+        start = time.perf_counter()
+        action()
+        root.update() # Returns once every event and idle callback (redraws included) has run
+        self.samples.setdefault(scenario, []).append((time.perf_counter() - start) * 1000.0)
+
+    def __call__(self, root):
+        try:
+            root.update()
+            for run in range(self.runs + 1):
+                record = run > 0 # The first run warms caches and is not counted
+                self.search_keystrokes(root, record)
+                self.scroll(root, record)
+                self.select_rows(root, record)
+                self.switch_theme(root, record)
+                self.open_notes(root, record)
+        except Exception as e:
+            self.error = e
+        finally:
+            root.quit()
+
+    def _step(self, root, scenario, action, record):
+        if record:
+            self.measure(root, scenario, action)
+        else:
+            action()
+            root.update()
+
+    def search_keystrokes(self, root, record):
+        app = self.app
+        entry = find_widget(root, lambda w: w.winfo_class() == 'Entry' and str(w.cget('textvariable')) == str(app.search_var))
+        entry.focus_force()
+        root.update()
+        for char in SEARCH_QUERY:
+            keysym = 'space' if char == ' ' else char
+            self._step(root, 'search_keystroke', lambda: entry.event_generate('<KeyPress>', keysym=keysym), record)
+        if app.search_var.get() != SEARCH_QUERY:
+            raise RuntimeError(f"Typed {SEARCH_QUERY!r} but the search box holds {app.search_var.get()!r}")
+        for _ in SEARCH_QUERY:
+            self._step(root, 'search_keystroke', lambda: entry.event_generate('<KeyPress>', keysym='BackSpace'), record)
+
+    def scroll(self, root, record):
+        canvas = self.app.canvas
+        for button in ('<Button-5>', '<Button-4>'):
+            for _ in range(SCROLL_STEPS):
+                self._step(root, 'scroll_step', lambda: canvas.event_generate(button), record)
+
+    def select_rows(self, root, record):
+        canvas = self.app.canvas
+        canvas.focus_force()
+        self.app.select_module_row(0)
+        root.update()
+        for keysym in ('Down', 'Up'):
+            for _ in range(SELECT_STEPS):
+                self._step(root, 'select_row', lambda: canvas.event_generate('<KeyPress>', keysym=keysym), record)
+
+    def switch_theme(self, root, record):
+        app = self.app
+        for theme in ('dark', 'light'):
+            # What the settings window's theme radio buttons do
+            self._step(root, 'theme_switch', lambda: (app.theme_manager.set_theme(theme), app.refresh_all_themes()), record)
+
+    def open_notes(self, root, record):
+        app = self.app
+        before = set(root.winfo_children())
+        self._step(root, 'notes_open', lambda: app.open_notes_view(root, app.modules), record)
+        for window in set(root.winfo_children()) - before:
+            window.destroy()
+        root.update()
+
+# --- Budgets ---
+
+def load_budgets(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def summarize(samples, budgets):
+    """Returns ([(scenario, count, p50, p95, max, budget text, ok)], all ok)."""
+    rows = []
+    all_ok = True
+    for scenario, values in samples.items():
+        p50, p95 = percentile(values, 0.50), percentile(values, 0.95)
+        budget = budgets.get(scenario, {})
+        ok = p50 <= budget.get('p50_ms', float('inf')) and p95 <= budget.get('p95_ms', float('inf'))
+        all_ok = all_ok and ok
+        budget_text = f"{budget['p50_ms']:g}/{budget['p95_ms']:g}" if budget else "-"
+        rows.append((scenario, len(values), p50, p95, max(values), budget_text, ok))
+    return rows, all_ok
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure DivaDivaModule UI latency against stored budgets.")
+    parser.add_argument('--modules', type=int, default=20000, help="Modules in the synthetic catalog")
+    parser.add_argument('--items-per-module', type=int, default=6)
+    parser.add_argument('--notes', type=int, default=5000, help="Items in the synthetic notes.csv")
+    parser.add_argument('--runs', type=int, default=5, help="Measured repetitions of every scenario")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--budgets', default=BUDGETS_FILE)
+    parser.add_argument('--update-budgets', action='store_true',
+                        help="Write the measured p50/p95 times --headroom as the new budgets")
+    parser.add_argument('--headroom', type=float, default=1.5)
+    parser.add_argument('--propose', metavar='PATH',
+                        help="Also write the measured budgets to PATH, still checking against --budgets")
+    parser.add_argument('--json', help="Also write the raw samples to this file")
+    args = parser.parse_args(argv)
+
+    display = start_virtual_display()
+    work_dir = tempfile.mkdtemp(prefix="divadiva_uibench_")
+    try:
+        prepare_app_dir(work_dir, args)
+        os.environ['LOCALAPPDATA'] = work_dir # Read by divadiva_core when it is first imported
+        import divadivamodule as app
+        driver = Driver(app, args.runs)
+        app.main(['--new-instance'], on_ready=driver)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if display is not None:
+            display.terminate()
+    if driver.error is not None:
+        print(f"Benchmark failed: {driver.error!r}", file=sys.stderr)
+        return 2
+
+    budgets = load_budgets(args.budgets)
+    rows, all_ok = summarize(driver.samples, budgets)
+    print(f"{'Scenario':<18} {'n':>5} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}  {'budget p50/p95':>15}")
+    for scenario, count, p50, p95, worst, budget_text, ok in rows:
+        print(f"{scenario:<18} {count:>5} {p50:>8.1f} {p95:>8.1f} {worst:>8.1f}  {budget_text:>15}  {'ok' if ok else 'OVER BUDGET'}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'samples': driver.samples}, f, indent=2)
+    if args.propose:
+        write_budgets(args.propose, rows, args.headroom)
+    if args.update_budgets:
+        write_budgets(args.budgets, rows, args.headroom)
+        return 0
+    return 0 if all_ok else 1
+
+def write_budgets(path, rows, headroom):
+    budgets = {scenario: {'p50_ms': round(p50 * headroom, 1), 'p95_ms': round(p95 * headroom, 1)}
+               for scenario, _, p50, p95, _, _, _ in rows}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(budgets, f, indent=4)
+        f.write('\n')
+    print(f"Wrote budgets to {path}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,38 +3,29 @@ from tkinter import ttk, messagebox, simpledialog, filedialog
 from tkinter import PhotoImage
 import csv
 import os
-import subprocess
 import json
 import sys
 import shutil
+import time
+import queue
+import threading
+import argparse
+import bisect
+import multiprocessing
 from PIL import Image, ImageTk
 
-# --- Default app data directory for everyone ---
-def get_app_dir():
-    # On Windows, use LOCALAPPDATA for application-specific data
-    # Example: C:\Users\YourUsername\AppData\Local\DivaDivaModule
-    app_data_path = os.getenv('LOCALAPPDATA')
-    if app_data_path:
-        return os.path.join(app_data_path, "DivaDivaModule")
-    else:
-        # Fallback for systems where LOCALAPPDATA might not be set (unlikely on Windows)
-        return os.path.expanduser("~/DivaDivaModule")
-
-APP_DIR = get_app_dir()
-NOTES_CSV = os.path.join(APP_DIR, "notes.csv")
-MODULES_CSV = os.path.join(APP_DIR, "modules_data.csv")
-SETTINGS_FILE = os.path.join(APP_DIR, "settings.json")
-IMAGES_FOLDER = os.path.join(APP_DIR, "images")
-# Define a dedicated items folder within the app directory
-ITEMS_FOLDER = os.path.join(APP_DIR, "items") # Added ITEMS_FOLDER
-
-# Define the OLD_APP_DIR for migration purposes (Linux-style path)
-OLD_APP_DIR = os.path.expanduser("~/.divadivamodule")
-
-
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-STARTER_MODULES_CSV = os.path.join(SCRIPT_DIR, "modules_data.csv")
-SCRIPT_IMAGES_SOURCE_DIR = os.path.join(SCRIPT_DIR, "images")
+from divadiva_core import (
+    APP_DIR, NOTES_CSV, MODULES_CSV, SETTINGS_FILE, IMAGES_FOLDER, ITEMS_FOLDER,
+    CATALOG_D_FOLDER, OLD_APP_DIR, STARTER_MODULES_CSV, SCRIPT_IMAGES_SOURCE_DIR,
+    file_stamp, catalog_layer_paths, layered_catalog, module_display_name,
+    split_objects, configured_item_roots, merged_items_index, item_roots_index, ViewerLauncher, FileWatcher, ArchivePrefetcher, StartupPipeline, InstanceServer, send_to_running_instance,
+    ModuleSorter, ModuleGroups, SlotItemIndex, OptionIndex, NoteSearchIndex, FuzzyModuleIndex, RecentItems, UsageStats,
+    NotesModel, NOTE_MERGE_POLICIES, iter_note_rows, iter_notes,
+    export_notes, catalog_item_keys, CACHE_FOLDER
+)
+from divadiva_thumbs import ThumbnailCache, ThumbnailService
+from divadiva_diagnostics import StallWatchdog, start_memory_tracing, memory_report, format_memory_report
+from divadiva_api import ApiContext, ApiServer, DEFAULT_API_PORT
 
 # --- GLOBAL COLOR AND THEME DEFINITIONS ---
 CHARACTER_COLORS = {
@@ -228,9 +219,15 @@ theme_manager = ThemeManager()
 # --- Function Definitions ---
 
 def ensure_app_structure():
+    """
+    Creates and migrates the app folder. Safe to run off the Tk thread: it
+    returns [(messagebox function name, title, message)] for the caller to show.
+    """
+    notices = []
     os.makedirs(APP_DIR, exist_ok=True)
     os.makedirs(IMAGES_FOLDER, exist_ok=True)
     os.makedirs(ITEMS_FOLDER, exist_ok=True) # Ensure ITEMS_FOLDER exists
+    os.makedirs(CATALOG_D_FOLDER, exist_ok=True)
 
     # --- Migration Logic ---
     # Check if the old Linux-style app directory exists AND
@@ -283,16 +280,16 @@ def ensure_app_structure():
                         print(f"Removed old app directory: {OLD_APP_DIR}")
                     except OSError as e:
                         print(f"Error removing old app directory {OLD_APP_DIR}: {e}")
-                    messagebox.showinfo("Migration Complete", "Your data from the old app directory has been moved to the new Windows location.")
+                    notices.append(("showinfo", "Migration Complete", "Your data from the old app directory has been moved to the new Windows location."))
                 else:
                     print(f"Old app directory {OLD_APP_DIR} exists but is empty. No migration needed.")
             except Exception as e:
                 print(f"Error during migration: {e}")
-                messagebox.showerror("Migration Error", f"An error occurred during data migration:\n{e}\n"
-                                     "Please manually move your data from:\n"
-                                     f"{OLD_APP_DIR}\n"
-                                     "to:\n"
-                                     f"{APP_DIR}")
+                notices.append(("showerror", "Migration Error", f"An error occurred during data migration:\n{e}\n"
+                                "Please manually move your data from:\n"
+                                f"{OLD_APP_DIR}\n"
+                                "to:\n"
+                                f"{APP_DIR}"))
         else:
             print(f"New app directory {APP_DIR} already contains data. Skipping migration from {OLD_APP_DIR}.")
     else:
@@ -356,6 +353,7 @@ def ensure_app_structure():
              print(f"Image for '{char_name}' already exists in app directory.")
 
     print("Finished checking/coping character images.")
+    return notices
 
 
 def center_window(win):
@@ -366,11 +364,10 @@ def center_window(win):
     y = (win.winfo_screenheight() - height) // 2
     win.geometry(f"+{x}+{y}")
 
-def first_launch_prompt():
-    temp_root = tk.Tk()
-    temp_root.withdraw()
-
-    win = tk.Toplevel(temp_root)
+def first_launch_prompt(parent=None):
+    # A Toplevel of the app's own (possibly still withdrawn) root: a second
+    # tk.Tk() would be a separate Tcl interpreter from the variables below
+    win = tk.Toplevel(parent)
     win.title("Welcome to DivaDivaModule!")
     win.geometry("440x250") # Adjusted height as Wine Prefix field is removed
     win.grab_set()
@@ -382,10 +379,10 @@ def first_launch_prompt():
     tk.Label(frame, text="Welcome to DivaDivaModule!", font=('Arial', 16, 'bold')).pack(pady=(0,10))
     tk.Label(frame, text="Let's set up your environment.").pack(pady=(0, 18))
 
-    exe_var = tk.StringVar()
+    exe_var = tk.StringVar(master=win)
 
     def browse_exe():
-        path = filedialog.askopenfilename(title="Select MikuMikuModel.exe", filetypes=[("Exe files", "*.exe")])
+        path = filedialog.askopenfilename(title="Select MikuMikuModel.exe", filetypes=[("Exe files", "*.exe")], parent=win)
         if path:
             exe_var.set(path)
 
@@ -402,7 +399,7 @@ def first_launch_prompt():
         exe = exe_var.get().strip()
 
         if not exe or not os.path.isfile(exe):
-            messagebox.showerror("Setup Error", "Please select a valid MikuMikuModel.exe.")
+            messagebox.showerror("Setup Error", "Please select a valid MikuMikuModel.exe.", parent=win)
             return
 
         settings_to_save = {
@@ -415,29 +412,22 @@ def first_launch_prompt():
             with open(SETTINGS_FILE, "w") as f:
                 json.dump(settings_to_save, f, indent=4)
 
-            messagebox.showinfo("Setup Complete", "Initial settings saved successfully.")
+            messagebox.showinfo("Setup Complete", "Initial settings saved successfully.", parent=win)
             win.destroy()
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to save initial settings: {e}\nDirectory tried: {os.path.dirname(SETTINGS_FILE)}")
+            messagebox.showerror("Error", f"Failed to save initial settings: {e}\nDirectory tried: {os.path.dirname(SETTINGS_FILE)}", parent=win)
 
     tk.Button(frame, text="Save & Continue", command=confirm, font=('Arial', 11)).pack(pady=(24,0))
 
     win.protocol("WM_DELETE_WINDOW", lambda: sys.exit(0))
 
-    temp_root.wait_window(win)
+    win.wait_window()
 
-    # Destroy the temporary root window after the first launch prompt is done
-    try:
-        if temp_root.winfo_exists():
-            temp_root.destroy()
-    except Exception:
-        pass
 
-
-def load_settings():
+def load_settings(parent=None):
     # If settings file doesn't exist, prompt for first launch setup
     if not os.path.exists(SETTINGS_FILE):
-        first_launch_prompt()
+        first_launch_prompt(parent)
     else:
         # If settings file exists, check its content
         with open(SETTINGS_FILE, "r") as f:
@@ -445,32 +435,69 @@ def load_settings():
                 s = json.load(f)
                 # Check if mikumikumodel_exe is missing or invalid
                 if "mikumikumodel_exe" not in s or not os.path.isfile(s["mikumikumodel_exe"]):
-                    first_launch_prompt()
+                    first_launch_prompt(parent)
             except json.JSONDecodeError: # Handle empty or malformed JSON
                 # If JSON is corrupt, treat it as first launch
-                first_launch_prompt()
+                first_launch_prompt(parent)
             except Exception: # Catch any other unexpected errors during loading
-                first_launch_prompt()
+                first_launch_prompt(parent)
     # Re-open the file after potential first_launch_prompt to ensure it's loaded
     with open(SETTINGS_FILE, "r") as f:
         return json.load(f)
 
-# --- Global Variables and Initial Setup ---
-ensure_app_structure()
+def read_valid_settings():
+    """The settings if settings.json is complete, else None (load_settings() must prompt). No UI, so it can run on any thread."""
+    try:
+        with open(SETTINGS_FILE, "r") as f:
+            s = json.load(f)
+    except Exception:
+        return None
+    if not isinstance(s, dict) or "mikumikumodel_exe" not in s or not os.path.isfile(s["mikumikumodel_exe"]):
+        return None
+    return s
+
+_settings_cache = (None, None) # (settings.json stamp, settings)
+
+def cached_settings():
+    """load_settings(), re-read only when settings.json has changed on disk."""
+    global _settings_cache
+    stamp = file_stamp(SETTINGS_FILE)
+    if stamp is None or stamp != _settings_cache[0]:
+        settings = load_settings()
+        _settings_cache = (file_stamp(SETTINGS_FILE), settings)
+    return _settings_cache[1]
+
 
-# Load settings after ensuring the app structure and potentially running first_launch_prompt
-settings = load_settings()
+def setting_number(settings, key, default, minimum=0, maximum=None):
+    """
+    settings[key] as a number of the same type as default, clamped to
+    [minimum, maximum]; default if it is missing or not a number. Settings
+    are hand-editable, so "64" or -5 must not reach the code using them.
+    """
+    value = settings.get(key, default)
+    try:
+        value = type(default)(value)
+    except (TypeError, ValueError, OverflowError):
+        print(f"Ignoring setting {key}={value!r}: not a number")
+        return default
+    if value != value: # NaN
+        return default
+    value = max(minimum, value)
+    return value if maximum is None else min(maximum, value)
 
 
 # --- NEW FUNCTIONALITY: Check Items Folder and Guide ---
-def check_items_folder_and_guide(parent_window):
+def items_folder_is_empty():
+    # Archives in any configured item root count, not just ITEMS_FOLDER
+    return not merged_items_index()
+
+def check_items_folder_and_guide(parent_window, folder_is_empty=None):
     """
-    Checks if the ITEMS_FOLDER is empty and displays a tutorial if it is.
+    Checks if the item roots hold no archives and displays a tutorial if so.
+    folder_is_empty can be passed in when the roots were already scanned.
     """
-    folder_is_empty = True
-    if os.path.exists(ITEMS_FOLDER):
-        if os.listdir(ITEMS_FOLDER): # If listdir returns anything, it's not empty
-            folder_is_empty = False
+    if folder_is_empty is None:
+        folder_is_empty = items_folder_is_empty()
 
     if folder_is_empty:
         display_items_tutorial(parent_window)
@@ -514,6 +541,7 @@ def display_items_tutorial(parent_window):
 # --- Rest of the Functions and Classes ---
 
 MODULE_ENTRY_INSTANCES = []
+GROUP_HEADER_INSTANCES = []
 
 def refresh_all_themes():
     root = tk._default_root
@@ -552,6 +580,8 @@ def refresh_all_themes():
                 pass
     for entry in MODULE_ENTRY_INSTANCES:
         entry.redraw_theme()
+    for header in GROUP_HEADER_INSTANCES:
+        header.redraw_theme()
 
 def apply_theme_to_window(window, window_type='toplevel'):
     theme_manager.apply_theme_to_widget(window, window_type)
@@ -588,115 +618,286 @@ def apply_theme_to_window(window, window_type='toplevel'):
     except Exception:
         pass
 
-def load_modules():
-    modules = {}
-    try:
-        with open(MODULES_CSV, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                module_id = row.get('Module ID')
-                if not module_id:
-                    continue
-                if module_id not in modules:
-                    modules[module_id] = {
-                        'Module ID': module_id,
-                        'Name (EN)': row.get('Name (EN)', ''),
-                        'Name (JP)': row.get('Name (JP)', ''),
-                        'Character': row.get('Character', ''),
-                        'Source': row.get('Source', ''),
-                        'COS ID': row.get('COS ID', ''),
-                        'Names': row,
-                        'Items': [],
-                        '_seen_items': set() # To track unique items for this module
-                    }
-
-                current_module = modules[module_id]
-                item_data = {
-                    'Item ID': row.get('Item ID', ''),
-                    'Object(s)': row.get('Object(s)', ''),
-                    'Type': row.get('Type', '')
-                }
-
-                # Create a tuple from item data to use in the set for uniqueness check
-                item_tuple = (item_data['Item ID'], item_data['Object(s)'], item_data['Type'])
-
-                if item_tuple not in current_module['_seen_items']:
-                    current_module['Items'].append(item_data)
-                    current_module['_seen_items'].add(item_tuple)
-
-        # Clean up the temporary _seen_items set after loading all modules
-        for module_data in modules.values():
-            if '_seen_items' in module_data:
-                del module_data['_seen_items']
-
-    except Exception as e:
-        messagebox.showerror("Error", f"{MODULES_CSV} could not be loaded: {e}")
-        sys.exit(1) # Use sys.exit for critical errors
-    return modules
 
-def open_item_in_mikumikumodel(object_name):
-    # Reload settings to ensure we have the latest paths
-    current_settings = load_settings()
+def report_catalog_load(error=None):
+    """Reports the outcome of layered_catalog.refresh(); error (from the base catalog) is fatal."""
+    if error is not None:
+        messagebox.showerror("Error", f"{MODULES_CSV} could not be loaded: {error}")
+        sys.exit(1) # Use sys.exit for critical errors
+    for path, error in layered_catalog.errors:
+        print(f"Skipping catalog overlay {path}: {error}")
+        messagebox.showwarning("Catalog Overlay Error", f"{path} could not be loaded and was skipped:\n{error}")
+    return layered_catalog.modules
+
+module_sorter = ModuleSorter()
+module_groups = ModuleGroups()
+slot_item_index = SlotItemIndex()
+
+# Option indexes shared by every dialog, invalidated when the catalog changes
+catalog_version = 0
+_option_index_cache = {}
+
+def module_option_index():
+    key = (catalog_version, 'modules')
+    if key not in _option_index_cache:
+        _option_index_cache[key] = OptionIndex([
+            (module_display_name(modules[mid]), mid)
+            for mid in module_sorter.sorted_keys([('Module ID', False)])
+        ])
+    return _option_index_cache[key]
+
+def item_option_index(module_id):
+    key = (catalog_version, 'items', module_id)
+    if key not in _option_index_cache:
+        module = modules.get(module_id)
+        _option_index_cache[key] = OptionIndex([
+            (f"[{item['Item ID']}] {item['Object(s)']}", item['Item ID'])
+            for item in (module['Items'] if module else [])
+        ])
+    return _option_index_cache[key]
+
+def set_catalog(new_modules):
+    """Installs a freshly loaded catalog and invalidates everything derived from it."""
+    global modules, catalog_version, _module_search_stale
+    modules = new_modules
+    catalog_version += 1
+    module_sorter.rebuild(modules)
+    module_groups.rebuild(modules)
+    slot_item_index.rebuild(modules)
+    _option_index_cache.clear()
+    _module_search_stale = True
+
+viewer_launcher = ViewerLauncher()
+
+# Opt-in localhost API. Its threads read the catalog under catalog_lock,
+# which the Tk thread holds while folding in changes from disk.
+catalog_lock = threading.RLock()
+api_context = None
+api_open_requests = queue.Queue() # (object names, reply queue) to open, from API threads
+API_OPEN_TIMEOUT = 30 # Seconds an API thread waits for the Tk thread to open its objects
+
+def queue_api_open(object_names):
+    """Called on an API thread: opens object_names on the Tk thread and returns launch_items()'s result."""
+    reply = queue.Queue(maxsize=1)
+    api_open_requests.put((object_names, reply))
+    try:
+        return reply.get(timeout=API_OPEN_TIMEOUT)
+    except queue.Empty:
+        return {'error': "The viewer did not answer in time"}
+
+def poll_api_requests(root):
+    """Opens objects requested through the API on the Tk thread. No dialogs: the outcome goes back to the caller."""
+    while not api_open_requests.empty():
+        object_names, reply = api_open_requests.get_nowait()
+        try:
+            result = launch_items(object_names, current_settings=read_valid_settings() or {}) # Never prompts
+        except Exception as e:
+            result = {'error': str(e)}
+        reply.put(result)
+    root.after(200, poll_api_requests, root)
+
+recent_items = RecentItems()
+refresh_recent_items_panel = None # Set by main() once the panel exists
+
+# Local use counts per module. They order equally relevant search results
+# and back the "Most Used" sort; main() turns them off if settings say so.
+usage_stats = UsageStats()
+usage_ranking_enabled = True
+USAGE_SORT_FIELD = "Most Used"
+USAGE_WEIGHTS = {'select': 1.0, 'open': 2.0}
+
+def record_module_use(module_ids, kind):
+    """Counts one use of each module in module_ids; kind is a key of USAGE_WEIGHTS."""
+    global module_keys
+    module_ids = {mid for mid in module_ids if mid in modules}
+    if not usage_ranking_enabled or not module_ids:
+        return
+    for mid in module_ids:
+        usage_stats.record(mid, USAGE_WEIGHTS[kind])
+    module_sorter.set_ranks(USAGE_SORT_FIELD, usage_stats.ranks)
+    if any(field == USAGE_SORT_FIELD for field, _ in module_sort_spec):
+        # Used the next time the list is filled, so the row just clicked does not jump away
+        module_keys = module_sorter.sorted_keys(module_sort_spec)
+
+def poll_usage_save(root):
+    # Selections come in bursts; write usage.json at most every few seconds
+    if usage_stats.dirty:
+        usage_stats.save()
+    root.after(10000, poll_usage_save, root)
+
+def launch_items(object_names, module_ids=(), current_settings=None):
+    """
+    Opens every object in object_names (values may list several objects,
+    comma-separated) in MikuMikuModel, without any dialogs. Recently opened
+    objects reuse their remembered path; the rest are resolved in one pass
+    over the cached items index. Launches go through viewer_launcher so only
+    a bounded number of viewers run at once. module_ids are the modules the
+    objects were picked from, counted as used if anything opened.
+    current_settings defaults to cached_settings(), which prompts for setup
+    if settings.json is incomplete.
+
+    Returns {'error': message} if the viewer is not configured, otherwise a
+    dict of opened and already_open (object name, path) pairs, queued and
+    missing object names, and the item_roots searched.
+    """
+    if current_settings is None:
+        # Settings are re-read only if settings.json changed since the last open
+        current_settings = cached_settings()
     mikumikumodel_exe = current_settings.get("mikumikumodel_exe", "")
 
     if not mikumikumodel_exe or not os.path.isfile(mikumikumodel_exe):
-        messagebox.showerror("Error", "MikuMikuModel.exe path is not set or invalid in settings. Please configure it in File -> Settings.")
-        return
-
-    target = object_name.lower() + ".farc"
-    search_dir = ITEMS_FOLDER # Use the ITEMS_FOLDER
-
-    if not os.path.exists(search_dir):
-        messagebox.showwarning("Folder Not Found", f"The items folder '{search_dir}' does not exist.")
-        return
-
-    item_files = os.listdir(search_dir)
-    for fname in item_files:
-        if fname.lower() == target:
-            filepath = os.path.abspath(os.path.join(search_dir, fname))
-            try:
-                # Directly open the .exe with the file on Windows
-                subprocess.Popen([mikumikumodel_exe, filepath])
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not open file:\n{filepath}\n\n{e}")
-            return
-    messagebox.showwarning("File Not Found", f"Item file for '{object_name}' not found in '{search_dir}' folder.")
-
-def save_note(name, module_id, item_id, desc):
-    os.makedirs(os.path.dirname(NOTES_CSV), exist_ok=True)
-    with open(NOTES_CSV, 'a', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow([name, module_id, item_id, desc])
-
-def load_notes():
-    notes = {}
-    order = []
-    if os.path.exists(NOTES_CSV):
-        with open(NOTES_CSV, newline='', encoding='utf-8') as csvfile:
-            reader = csv.reader(csvfile)
-            for row in reader:
-                if len(row) < 4:
-                    continue
-                name, module_id, item_id, desc = row
-                if name not in notes:
-                    notes[name] = []
-                    order.append(name)
-                notes[name].append((module_id, item_id, desc))
-    return notes, order
-
-def save_all_notes(notes):
-    """Saves all notes from the current_notes_data dictionary to NOTES_CSV."""
-    os.makedirs(os.path.dirname(NOTES_CSV), exist_ok=True)
-    with open(NOTES_CSV, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        for name, items in notes.items():
-            for module_id, item_id, desc in items:
-                writer.writerow([name, module_id, item_id, desc])
+        return {'error': "MikuMikuModel.exe path is not set or invalid in settings. Please configure it in File -> Settings."}
+
+    item_roots = configured_item_roots(current_settings)
+
+    viewer_launcher.max_running = setting_number(current_settings, "max_open_viewers", ViewerLauncher.DEFAULT_MAX_RUNNING, minimum=1)
+    items_index = None # Only looked up for objects not in recent_items
+    missing = []
+    already_open = []
+    opened = []
+    queued = [] # Opened, but waiting for one of the running viewers to be closed
+    seen = set()
+    for value in object_names:
+        for object_name in split_objects(value):
+            if object_name.lower() in seen:
+                continue
+            seen.add(object_name.lower())
+            filepath = recent_items.resolve(object_name, item_roots)
+            if filepath is None:
+                if items_index is None:
+                    items_index = merged_items_index(item_roots)
+                filepath = items_index.get(object_name.lower())
+            if filepath is None:
+                missing.append(object_name)
+            else:
+                status = viewer_launcher.submit(mikumikumodel_exe, filepath)
+                if status is None:
+                    already_open.append((object_name, filepath))
+                else:
+                    opened.append((object_name, filepath))
+                    if status == 'queued':
+                        queued.append(object_name)
+
+    if opened:
+        recent_items.record(opened, item_roots)
+        record_module_use(module_ids, 'open')
+    if refresh_recent_items_panel:
+        refresh_recent_items_panel()
+    return {'opened': opened, 'already_open': already_open, 'queued': queued, 'missing': missing, 'item_roots': item_roots}
+
+def open_items_in_mikumikumodel(object_names, parent=None, module_ids=()):
+    """
+    launch_items(), then tells the user about anything that did not open
+    right away. Returns the number queued.
+    """
+    result = launch_items(object_names, module_ids)
+    if 'error' in result:
+        messagebox.showerror("Error", result['error'], parent=parent)
+        return 0
+    opened, already_open, queued, missing, item_roots = (
+        result['opened'], result['already_open'], result['queued'], result['missing'], result['item_roots'])
+
+    if missing and not any(os.path.isdir(root) for root in item_roots):
+        messagebox.showwarning("Folder Not Found", "None of the item folders exist:\n" + "\n".join(item_roots), parent=parent)
+    elif missing:
+        messagebox.showwarning("File Not Found", "Item file(s) not found in the item folders:\n" + "\n".join(missing[:20]) +
+                               "\n\nSearched:\n" + "\n".join(item_roots), parent=parent)
+    elif queued:
+        messagebox.showinfo("Waiting for MikuMikuModel",
+                            f"{len(queued)} item(s) will open once one of the {viewer_launcher.max_running} open MikuMikuModel windows is closed:\n" +
+                            "\n".join(queued[:20]), parent=parent)
+    elif already_open and not opened and len(already_open) == 1:
+        object_name, filepath = already_open[0]
+        if viewer_launcher.is_waiting(filepath):
+            messagebox.showinfo("Waiting for MikuMikuModel", f"'{object_name}' will open once an open MikuMikuModel window is closed.", parent=parent)
+        else:
+            messagebox.showinfo("Already Open", f"'{object_name}' is already open in MikuMikuModel.", parent=parent)
+    return len(opened)
+
+def poll_viewer_errors(root):
+    """Reports launch failures from viewer_launcher's worker threads on the Tk thread."""
+    while not viewer_launcher.errors.empty():
+        filepath, e = viewer_launcher.errors.get_nowait()
+        messagebox.showerror("Error", f"Could not open file:\n{filepath}\n\n{e}")
+    root.after(500, poll_viewer_errors, root)
+
+note_search_index = NoteSearchIndex()
+
+# FrankenNotes stay loaded between window opens; the search index follows the model's events
+notes_model = NotesModel()
+NOTES_PAGE_SIZE = 200 # Rows in the FrankenNotes details tree at a time
+
+def index_notes_event(event):
+    kind, notes = event[0], notes_model.notes
+    if kind == 'reset':
+        note_search_index.rebuild(notes, modules)
+    elif kind == 'note_removed':
+        note_search_index.remove_note(event[1])
+    elif kind == 'item_updated':
+        note_search_index.update_item(event[1], event[2], event[3], modules)
+    elif kind == 'item_inserted' and event[2] == len(notes[event[1]]) - 1:
+        note_search_index.add_item(event[1], event[2], event[3], modules)
+    elif kind in ('item_inserted', 'item_removed', 'note_changed'):
+        # Positions after the change shifted, so only this note is reindexed
+        note_search_index.reindex_note(event[1], notes[event[1]], modules)
+
+notes_model.subscribe(index_notes_event)
+
+# Ranked fuzzy search for the module list; rebuilt on the first search after a catalog load
+module_search_index = FuzzyModuleIndex()
+_module_search_stale = True
+_module_positions = (None, None, {}) # (module_keys and usage_stats.version it was built from, {Module ID: position}) for tie-breaking
+SEARCH_RESULT_LIMIT = 200 # Matches shown at most while searching, best first
+search_match_total = 0 # Matches found by the last search, shown when more than the limit
+
+# Item texture previews, decoded on a process pool and cached under CACHE_FOLDER
+thumbnail_service = ThumbnailService(ThumbnailCache(os.path.join(CACHE_FOLDER, "thumbs")))
+MAX_PREVIEWS = 8
+
+# Reads the selected module's archives into the page cache ahead of opening them
+archive_prefetcher = ArchivePrefetcher()
+
+def open_memory_report(parent, extra_image_sources=None):
+    """Shows live Tk widgets and images, catalog sizes and traced allocations by subsystem."""
+    started = start_memory_tracing()
+
+    report_win = tk.Toplevel(parent)
+    report_win.title("Memory Report")
+    report_win.geometry("560x520")
+    apply_theme_to_window(report_win)
+    center_window(report_win)
+
+    report_text = tk.Text(report_win, wrap='none', font=('Courier', 10))
+    report_text.pack(fill='both', expand=True, padx=10, pady=(10, 5))
+    theme_manager.apply_theme_to_widget(report_text, 'entry')
+
+    def refresh_report():
+        image_sources = {
+            "Module row gradients": [entry.gradient_img for entry in MODULE_ENTRY_INSTANCES if entry.gradient_img],
+            "Character icon cache": list(ModuleEntry._image_cache.values()),
+        }
+        image_sources.update(extra_image_sources or {})
+        rows = memory_report(
+            root=parent.winfo_toplevel(), image_sources=image_sources, modules=modules,
+            extra_rows=[('Module list', 'ModuleEntry rows', len(MODULE_ENTRY_INSTANCES), '')]
+        )
+        text = format_memory_report(rows)
+        if started:
+            text += "\n\nAllocation tracing started with this window; only later allocations are counted.\nSet PYTHONTRACEMALLOC=25 before launching to include startup."
+        report_text.config(state='normal')
+        report_text.delete('1.0', tk.END)
+        report_text.insert('1.0', text)
+        report_text.config(state='disabled')
+
+    refresh_button = tk.Button(report_win, text="Refresh", command=refresh_report)
+    refresh_button.pack(pady=(0, 10))
+    theme_manager.apply_theme_to_widget(refresh_button, 'button')
+    refresh_report()
 
 def open_settings(parent):
     settings_win = tk.Toplevel(parent)
     settings_win.title("Settings")
-    settings_win.geometry("500x300") # Adjusted height for removal of Wine Prefix field
+    settings_win.geometry("500x470")
     settings_win.resizable(False, False)
     settings_win.grab_set()
     apply_theme_to_window(settings_win)
@@ -731,6 +932,47 @@ def open_settings(parent):
 
     # Wine Prefix Path Setting removed for Windows
 
+    # --- Item Folders ---
+    roots_frame = tk.Frame(main_frame)
+    roots_frame.pack(fill='x', padx=20, pady=(10, 5))
+    theme_manager.apply_theme_to_widget(roots_frame, 'frame')
+
+    tk.Label(roots_frame, text="Item folders, first match wins (the app's items folder is always searched last):", anchor='w').pack(fill='x')
+    roots_listbox = tk.Listbox(roots_frame, height=5)
+    roots_listbox.pack(side='left', fill='x', expand=True, padx=(0, 5))
+    theme_manager.apply_theme_to_widget(roots_listbox, 'listbox')
+    for item_root in current_settings.get("item_roots", []):
+        roots_listbox.insert(tk.END, item_root)
+
+    def add_item_root():
+        path = filedialog.askdirectory(title="Select a folder of .farc files", parent=settings_win)
+        if path and path not in roots_listbox.get(0, tk.END):
+            roots_listbox.insert(tk.END, path)
+
+    def remove_item_root():
+        for index in reversed(roots_listbox.curselection()):
+            roots_listbox.delete(index)
+
+    def move_item_root(offset):
+        selected = roots_listbox.curselection()
+        if not selected:
+            return
+        index = selected[0]
+        target = index + offset
+        if 0 <= target < roots_listbox.size():
+            value = roots_listbox.get(index)
+            roots_listbox.delete(index)
+            roots_listbox.insert(target, value)
+            roots_listbox.selection_set(target)
+
+    roots_buttons = tk.Frame(roots_frame)
+    roots_buttons.pack(side='right', fill='y')
+    theme_manager.apply_theme_to_widget(roots_buttons, 'frame')
+    tk.Button(roots_buttons, text="Add...", command=add_item_root).pack(fill='x')
+    tk.Button(roots_buttons, text="Remove", command=remove_item_root).pack(fill='x')
+    tk.Button(roots_buttons, text="Up", command=lambda: move_item_root(-1)).pack(fill='x')
+    tk.Button(roots_buttons, text="Down", command=lambda: move_item_root(1)).pack(fill='x')
+
     # --- Separator ---
     ttk.Separator(main_frame, orient='horizontal').pack(fill='x', padx=20, pady=10)
 
@@ -782,10 +1024,13 @@ def open_settings(parent):
     theme_manager.apply_theme_to_widget(button_frame, 'frame')
 
     def save_current_settings():
-        updated_settings = {
+        # Start from the saved file so settings without a field in this window are kept
+        updated_settings = load_settings()
+        updated_settings.update({
             "mikumikumodel_exe": exe_var.get().strip(),
+            "item_roots": list(roots_listbox.get(0, tk.END)),
             "theme": theme_manager.current_theme # Ensure current theme is also saved
-        }
+        })
         try:
             os.makedirs(os.path.dirname(SETTINGS_FILE), exist_ok=True)
             with open(SETTINGS_FILE, 'w') as f:
@@ -808,6 +1053,7 @@ def open_settings(parent):
         theme_var.set('Light') # Update radio button
         refresh_all_themes() # Apply theme change
         exe_var.set("") # Clear MMM path
+        roots_listbox.delete(0, tk.END)
         # Clear Wine prefix - removed
 
         # Reset other settings in the file
@@ -818,6 +1064,7 @@ def open_settings(parent):
                     current_settings_data = json.load(f)
 
             current_settings_data['mikumikumodel_exe'] = ""
+            current_settings_data['item_roots'] = []
             current_settings_data['theme'] = 'light' # Default theme
             os.makedirs(os.path.dirname(SETTINGS_FILE), exist_ok=True)
             with open(SETTINGS_FILE, 'w') as f:
@@ -826,6 +1073,23 @@ def open_settings(parent):
         except Exception as e:
             messagebox.showerror("Error", f"Failed to reset other settings: {e}")
 
+    def clear_usage_history():
+        global module_keys
+        if not messagebox.askyesno("Clear Usage History", "Forget which modules you use most? Search results and the 'Most Used' sort start over.", parent=settings_win):
+            return
+        usage_stats.clear()
+        if usage_ranking_enabled:
+            module_sorter.set_ranks(USAGE_SORT_FIELD, usage_stats.ranks)
+        module_keys = module_sorter.sorted_keys(module_sort_spec)
+        populate_module_entries()
+
+    usage_btn = tk.Button(
+        button_frame, text="Clear Usage History", command=clear_usage_history,
+        font=('Arial', 10), padx=10, borderwidth=0
+    )
+    usage_btn.pack(side='left', padx=(20, 0))
+    theme_manager.apply_theme_to_widget(usage_btn, 'button')
+
     reset_btn = tk.Button(
         button_frame, text="Reset to Default", command=reset_settings,
         font=('Arial', 10), padx=20, borderwidth=0
@@ -852,51 +1116,131 @@ def open_notes_view(parent, modules):
     main_frame.pack(fill='both', expand=True, padx=10, pady=10)
     theme_manager.apply_theme_to_widget(main_frame, 'frame')
 
-    current_notes_data, notes_order = load_notes()
-
-    def update_notes_listbox_and_details():
-        # Save current selections
-        selected_note_indices = notes_listbox.curselection()
-        selected_note_index = selected_note_indices[0] if selected_note_indices else 0
-        selected_item_iid = details_tree.focus()
+    notes_model.sync() # Only reads notes.csv on the first open or after it changed on disk
+    notes = notes_model.notes
+    view = {'note': None, 'start': 0} # Note shown in the details tree and the position of its first row
 
-        # Repopulate the notes listbox
-        notes_listbox.delete(0, tk.END)
-        for name in notes_order:
-            notes_listbox.insert(tk.END, name)
-
-        # Restore note selection or select the first item
-        if notes_order:
-            new_selection = min(selected_note_index, len(notes_order) - 1)
-            notes_listbox.selection_set(new_selection)
-            notes_listbox.activate(new_selection)
-            notes_listbox.see(new_selection)
-
-        # Update details based on selection
-        update_details_tree()
-
-        # Restore item selection
-        if selected_item_iid and details_tree.exists(selected_item_iid):
-            details_tree.selection_set(selected_item_iid)
-            details_tree.focus(selected_item_iid)
-
-        # Update button states
+    def selected_note():
+        selected_indices = notes_listbox.curselection()
+        return notes_listbox.get(selected_indices[0]) if selected_indices else None
+
+    def select_note(index):
+        notes_listbox.selection_clear(0, tk.END)
+        notes_listbox.selection_set(index)
+        notes_listbox.activate(index)
+        notes_listbox.see(index)
+
+    def item_position(iid):
+        return view['start'] + details_tree.index(iid)
+
+    def update_page_controls():
+        count = len(notes.get(view['note'], ()))
+        start = view['start']
+        if count > NOTES_PAGE_SIZE:
+            page_label.config(text=f"Items {start + 1}-{min(start + NOTES_PAGE_SIZE, count)} of {count}")
+        else:
+            page_label.config(text=f"{count} item(s)" if view['note'] is not None else "")
+        prev_page_btn.config(state=tk.NORMAL if start > 0 else tk.DISABLED)
+        next_page_btn.config(state=tk.NORMAL if start + NOTES_PAGE_SIZE < count else tk.DISABLED)
+
+    def render_page(start):
+        """Fills the details tree with one page of the shown note's items."""
+        items = notes.get(view['note'], [])
+        start = max(0, min(start, (len(items) - 1) // NOTES_PAGE_SIZE * NOTES_PAGE_SIZE))
+        view['start'] = start
+        details_tree.delete(*details_tree.get_children())
+        for item_data in items[start:start + NOTES_PAGE_SIZE]:
+            details_tree.insert("", tk.END, values=item_data)
+        update_page_controls()
         update_button_states()
 
     def update_details_tree():
-        # Clear previous details
-        for item in details_tree.get_children():
-            details_tree.delete(item)
+        name = selected_note()
+        view['note'] = name if name in notes else None
+        note_name_label.config(text=f"Note: {name}" if name else "Note: (Select a note)")
+        render_page(0)
+
+    def show_item(name, position):
+        """Selects a note and brings one of its items into view and focus."""
+        if name not in notes:
+            return
+        select_note(notes_model.order.index(name))
+        if view['note'] != name:
+            update_details_tree()
+        if not view['start'] <= position < view['start'] + NOTES_PAGE_SIZE:
+            render_page(position // NOTES_PAGE_SIZE * NOTES_PAGE_SIZE)
+        children = details_tree.get_children()
+        row = position - view['start']
+        if 0 <= row < len(children):
+            details_tree.selection_set(children[row])
+            details_tree.focus(children[row])
+            details_tree.see(children[row])
+
+    def refill_notes_listbox():
+        name = selected_note()
+        notes_listbox.delete(0, tk.END)
+        notes_listbox.insert(tk.END, *notes_model.order)
+        if notes_model.order:
+            select_note(notes_model.order.index(name) if name in notes else 0)
+        update_details_tree()
 
-        selected_indices = notes_listbox.curselection()
-        if selected_indices:
-            selected_name = notes_listbox.get(selected_indices[0])
-            note_name_label.config(text=f"Note: {selected_name}")
-            if selected_name in current_notes_data:
-                for item_data in current_notes_data[selected_name]:
-                    details_tree.insert("", tk.END, values=item_data)
-        else:
-            note_name_label.config(text="Note: (Select a note)")
+    def item_inserted(pos, item):
+        start = view['start']
+        if pos < start:
+            render_page(start) # Every row on this page shifted down
+            return
+        if pos < start + NOTES_PAGE_SIZE:
+            details_tree.insert("", pos - start, values=item)
+            children = details_tree.get_children()
+            if len(children) > NOTES_PAGE_SIZE:
+                details_tree.delete(children[-1])
+        update_page_controls()
+
+    def item_updated(pos, item):
+        row = pos - view['start']
+        children = details_tree.get_children()
+        if 0 <= row < len(children):
+            details_tree.item(children[row], values=item)
+
+    def item_removed(pos):
+        start = view['start']
+        items = notes[view['note']]
+        if pos < start or (start and start >= len(items)):
+            render_page(start) # Rows shifted up, or this was the last item of the last page
+            return
+        children = details_tree.get_children()
+        if pos - start < len(children):
+            details_tree.delete(children[pos - start])
+        if len(items) >= start + NOTES_PAGE_SIZE:
+            details_tree.insert("", tk.END, values=items[start + NOTES_PAGE_SIZE - 1]) # Pull up the next page's first row
+        update_page_controls()
+
+    def on_notes_event(event):
+        """Mirrors one notes_model change in the listbox and the details tree."""
+        kind = event[0]
+        if kind == 'reset':
+            refill_notes_listbox()
+            return
+        name = event[1]
+        if kind == 'note_added':
+            notes_listbox.insert(event[2], name)
+        elif kind == 'note_removed':
+            shown = view['note'] == name
+            notes_listbox.delete(event[2])
+            if shown and notes_model.order:
+                select_note(min(event[2], len(notes_model.order) - 1))
+            if shown:
+                update_details_tree()
+        elif name != view['note']:
+            pass
+        elif kind == 'note_changed':
+            render_page(view['start'])
+        elif kind == 'item_inserted':
+            item_inserted(event[2], event[3])
+        elif kind == 'item_updated':
+            item_updated(event[2], event[3])
+        elif kind == 'item_removed':
+            item_removed(event[2])
         update_button_states()
 
     def update_button_states(*args):
@@ -904,6 +1248,8 @@ def open_notes_view(parent, modules):
         item_selected = bool(details_tree.selection())
 
         add_item_btn.config(state=tk.NORMAL if note_selected else tk.DISABLED)
+        open_selected_btn.config(state=tk.NORMAL if item_selected else tk.DISABLED)
+        open_all_btn.config(state=tk.NORMAL if notes.get(view['note']) else tk.DISABLED)
         edit_item_btn.config(state=tk.NORMAL if item_selected else tk.DISABLED)
         delete_item_btn.config(state=tk.NORMAL if item_selected else tk.DISABLED)
 
@@ -929,7 +1275,8 @@ def open_notes_view(parent, modules):
     details_tree = ttk.Treeview(
         details_frame,
         columns=("Module ID", "Item ID", "Description"),
-        show="headings"
+        show="headings",
+        selectmode='extended'
     )
     details_tree.heading("Module ID", text="Module ID")
     details_tree.heading("Item ID", text="Item ID")
@@ -941,22 +1288,51 @@ def open_notes_view(parent, modules):
     theme_manager.apply_theme_to_treeview(details_tree)
     details_tree.bind("<<TreeviewSelect>>", update_button_states)
 
-    def open_selected_module_item(event=None):
-        selected_iid = details_tree.focus()
-        if not selected_iid: return
-        values = details_tree.item(selected_iid, 'values')
-        if not values: return
-        object_name_found = None
-        module = modules.get(values[0])
+    page_frame = tk.Frame(details_frame)
+    page_frame.pack(fill='x', pady=(5, 0))
+    prev_page_btn = tk.Button(page_frame, text="< Prev", command=lambda: render_page(view['start'] - NOTES_PAGE_SIZE))
+    prev_page_btn.pack(side='left')
+    next_page_btn = tk.Button(page_frame, text="Next >", command=lambda: render_page(view['start'] + NOTES_PAGE_SIZE))
+    next_page_btn.pack(side='right')
+    page_label = tk.Label(page_frame, text="")
+    page_label.pack(side='left', fill='x', expand=True)
+
+    def object_name_for(module_id, item_id):
+        module = modules.get(module_id)
         if module:
             for item in module.get('Items', []):
-                if item.get('Item ID') == values[1]:
-                    object_name_found = item.get('Object(s)')
-                    break
-        if object_name_found:
-            open_item_in_mikumikumodel(object_name_found)
-        else:
-            messagebox.showwarning("Not Found", "Could not find object name for this item.", parent=notes_win)
+                if item.get('Item ID') == item_id:
+                    return item.get('Object(s)')
+        return None
+
+    def open_note_items(items):
+        object_names = []
+        module_ids = []
+        not_found = 0
+        for module_id, item_id, _desc in items:
+            object_name_found = object_name_for(module_id, item_id)
+            if object_name_found:
+                object_names.append(object_name_found)
+                module_ids.append(module_id)
+            else:
+                not_found += 1
+        if not_found:
+            messagebox.showwarning("Not Found", f"Could not find object name for {not_found} item(s).", parent=notes_win)
+        if object_names:
+            open_items_in_mikumikumodel(object_names, parent=notes_win, module_ids=module_ids)
+
+    def open_selected_module_item(event=None):
+        selected_iid = details_tree.focus()
+        if not selected_iid or view['note'] is None: return
+        open_note_items([notes[view['note']][item_position(selected_iid)]])
+
+    def open_selected_note_items():
+        if view['note'] is not None:
+            open_note_items([notes[view['note']][item_position(iid)] for iid in details_tree.selection()])
+
+    def open_all_note_items():
+        # Every item of the note, not just the page on screen
+        open_note_items(notes.get(view['note'], []))
 
     details_tree.bind("<Double-1>", open_selected_module_item)
 
@@ -981,40 +1357,25 @@ def open_notes_view(parent, modules):
 
         # Module
         tk.Label(frame, text="Module:").pack(anchor='w')
-        module_options = []
-        module_id_map = {}
-        for mid, mdata in modules.items():
-            display = f"[{mid}] {mdata['Name (EN)']} ({mdata['Character']})"
-            module_options.append(display)
-            module_id_map[display] = mid
-
-        # *** FIX: Sort numerically ***
-        module_options.sort(key=lambda name: int(name.split(']')[0].strip('[m')))
-
+        module_index = module_option_index()
         module_var = tk.StringVar()
-        module_combobox = ttk.Combobox(frame, textvariable=module_var, values=module_options, state='readonly')
+        module_combobox = AutocompleteCombobox(frame, module_index, textvariable=module_var)
         module_combobox.pack(fill='x', pady=(0, 10))
 
         # Item
         tk.Label(frame, text="Item:").pack(anchor='w')
         item_var = tk.StringVar()
-        item_combobox = ttk.Combobox(frame, textvariable=item_var, state='disabled')
+        item_combobox = AutocompleteCombobox(frame, textvariable=item_var, state='disabled')
         item_combobox.pack(fill='x', pady=(0, 10))
-        item_id_map = {}
 
         def update_item_options(*args):
-            nonlocal item_id_map
-            selected_module_id = module_id_map.get(module_var.get())
-            item_id_map = {}
-            item_options = []
+            selected_module_id = module_combobox.selected_value()
             if selected_module_id and selected_module_id in modules:
-                for item in modules[selected_module_id]['Items']:
-                    display = f"[{item['Item ID']}] {item['Object(s)']}"
-                    item_options.append(display)
-                    item_id_map[display] = item['Item ID']
-                item_combobox.config(state='readonly', values=item_options)
+                item_combobox.set_index(item_option_index(selected_module_id))
+                item_combobox.config(state='normal')
             else:
-                item_combobox.config(state='disabled', values=[])
+                item_combobox.set_index(None)
+                item_combobox.config(state='disabled')
             item_combobox.set('')
 
         module_combobox.bind("<<ComboboxSelected>>", update_item_options)
@@ -1027,23 +1388,18 @@ def open_notes_view(parent, modules):
         # Pre-fill for Edit mode
         if mode == 'edit' and item_data_prefill:
             mod_id, item_id, desc = item_data_prefill
-            # Find and set module display name
-            for display_name, m_id in module_id_map.items():
-                if m_id == mod_id:
-                    module_var.set(display_name)
-                    update_item_options()
-                    break
-            # Find and set item display name
-            for display_name, i_id in item_id_map.items():
-                if i_id == item_id:
-                    item_var.set(display_name)
-                    break
+            if mod_id in module_index.display_for:
+                module_var.set(module_index.display_for[mod_id])
+                update_item_options()
+                item_display = item_combobox.option_index.display_for.get(item_id)
+                if item_display:
+                    item_var.set(item_display)
             desc_text.insert("1.0", desc)
 
         def on_save():
             name = note_name_var.get().strip()
-            mod_id = module_id_map.get(module_var.get())
-            item_id = item_id_map.get(item_var.get())
+            mod_id = module_combobox.selected_value()
+            item_id = item_combobox.selected_value()
             desc = desc_text.get("1.0", tk.END).strip()
 
             if not all([name, mod_id, item_id, desc]):
@@ -1051,15 +1407,10 @@ def open_notes_view(parent, modules):
                 return
 
             if mode == 'add':
-                if name not in current_notes_data:
-                    current_notes_data[name] = []
-                    notes_order.append(name)
-                current_notes_data[name].append((mod_id, item_id, desc))
+                position = notes_model.add_items(name, [(mod_id, item_id, desc)])
+                show_item(name, position) # It may have landed on a later page
             elif mode == 'edit':
-                current_notes_data[name][item_index] = (mod_id, item_id, desc)
-
-            save_all_notes(current_notes_data)
-            update_notes_listbox_and_details()
+                notes_model.update_item(name, item_index, (mod_id, item_id, desc))
             dialog_win.destroy()
 
         tk.Button(frame, text="Save", command=on_save).pack(side='right')
@@ -1069,56 +1420,263 @@ def open_notes_view(parent, modules):
         name = simpledialog.askstring("New Note", "Enter the name for the new note:", parent=notes_win)
         if name and name.strip():
             name = name.strip()
-            if name in current_notes_data:
+            if not notes_model.add_note(name):
                 messagebox.showwarning("Exists", f"A note with the name '{name}' already exists.", parent=notes_win)
             else:
-                current_notes_data[name] = []
-                notes_order.append(name)
-                save_all_notes(current_notes_data)
-                update_notes_listbox_and_details()
                 # Select the new note
-                new_index = notes_order.index(name)
-                notes_listbox.selection_clear(0, tk.END)
-                notes_listbox.selection_set(new_index)
+                select_note(notes_model.order.index(name))
                 update_details_tree()
 
     def add_item_action():
-        selected_indices = notes_listbox.curselection()
-        if not selected_indices: return
-        note_name = notes_listbox.get(selected_indices[0])
+        note_name = selected_note()
+        if note_name is None: return
         open_note_item_dialog(mode='add', note_name_prefill=note_name)
 
     def edit_item_action():
         selected_item_iid = details_tree.focus()
-        selected_note_indices = notes_listbox.curselection()
-        if not selected_item_iid or not selected_note_indices: return
+        note_name = view['note']
+        if not selected_item_iid or note_name is None: return
 
-        note_name = notes_listbox.get(selected_note_indices[0])
-        item_index = details_tree.index(selected_item_iid)
-        item_data = current_notes_data[note_name][item_index]
+        item_index = item_position(selected_item_iid)
+        item_data = notes[note_name][item_index]
         open_note_item_dialog(mode='edit', note_name_prefill=note_name, item_data_prefill=item_data, item_index=item_index)
 
     def delete_item_action():
         selected_item_iid = details_tree.focus()
-        selected_note_indices = notes_listbox.curselection()
-        if not selected_item_iid or not selected_note_indices: return
-
-        note_name = notes_listbox.get(selected_note_indices[0])
-        item_index = details_tree.index(selected_item_iid)
+        note_name = view['note']
+        if not selected_item_iid or note_name is None: return
 
+        item_index = item_position(selected_item_iid)
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this item from the note?", parent=notes_win):
-            current_notes_data[note_name].pop(item_index)
-            # If the note is now empty, delete the note itself
-            if not current_notes_data[note_name]:
-                del current_notes_data[note_name]
-                notes_order.remove(note_name)
-            save_all_notes(current_notes_data)
-            update_notes_listbox_and_details()
+            # A note left empty is deleted with its last item
+            notes_model.remove_item(note_name, item_index)
+
+    def import_action():
+        path = filedialog.askopenfilename(
+            title="Import Notes",
+            filetypes=[("Notes files", "*.csv *.jsonl *.ndjson"), ("All files", "*.*")],
+            parent=notes_win
+        )
+        if not path:
+            return
+
+        policy_win = tk.Toplevel(notes_win)
+        policy_win.title("Import Notes")
+        policy_win.resizable(False, False)
+        center_window(policy_win)
+        policy_frame = tk.Frame(policy_win)
+        policy_frame.pack(fill='both', expand=True, padx=20, pady=20)
+        tk.Label(policy_frame, text="When an imported item already exists in a note:").pack(anchor='w', pady=(0, 5))
+        policy_var = tk.StringVar(value='skip')
+        for policy, label in NOTE_MERGE_POLICIES.items():
+            tk.Radiobutton(policy_frame, text=label, variable=policy_var, value=policy).pack(anchor='w')
+
+        def run_import():
+            policy = policy_var.get()
+            policy_win.destroy()
+            try:
+                # Rolled back to what is on disk if anything fails
+                stats = notes_model.import_rows(iter_note_rows(path), policy=policy, valid_items=catalog_item_keys(modules))
+            except Exception as e:
+                messagebox.showerror("Import Error", f"Could not import notes from:\n{path}\n\n{e}", parent=notes_win)
+                return
+            message = (f"Added: {stats['added']}\nUpdated: {stats['updated']}\n"
+                       f"Skipped: {stats['skipped']}\nInvalid: {stats['invalid']}")
+            if stats['invalid_rows']:
+                message += "\n\nFirst invalid rows (note, module, item):\n" + "\n".join(
+                    f"{name}, {module_id}, {item_id}" for name, module_id, item_id in stats['invalid_rows'])
+            messagebox.showinfo("Import Complete", message, parent=notes_win)
+
+        tk.Button(policy_frame, text="Import", command=run_import).pack(side='right', pady=(10, 0))
+        apply_theme_to_window(policy_win)
+
+    def export_action():
+        path = filedialog.asksaveasfilename(
+            title="Export Notes",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")],
+            parent=notes_win
+        )
+        if not path:
+            return
+        try:
+            count = export_notes(iter_notes(notes), path)
+        except Exception as e:
+            messagebox.showerror("Export Error", f"Could not export notes to:\n{path}\n\n{e}", parent=notes_win)
+            return
+        messagebox.showinfo("Export Complete", f"Exported {count} item(s) to:\n{path}", parent=notes_win)
+
+    def open_search_window():
+        search_win = tk.Toplevel(notes_win)
+        search_win.title("Search FrankenNotes")
+        search_win.geometry("700x400")
+        center_window(search_win)
+
+        search_frame = tk.Frame(search_win)
+        search_frame.pack(fill='both', expand=True, padx=10, pady=10)
+
+        query_var = tk.StringVar()
+        query_entry = tk.Entry(search_frame, textvariable=query_var)
+        query_entry.pack(fill='x', pady=(0, 5))
+        query_entry.focus_set()
+
+        results_tree = ttk.Treeview(
+            search_frame,
+            columns=("Note", "Module ID", "Item ID", "Description"),
+            show="headings"
+        )
+        for column, width, stretch in (("Note", 150, tk.NO), ("Module ID", 80, tk.NO), ("Item ID", 80, tk.NO), ("Description", 300, tk.YES)):
+            results_tree.heading(column, text=column)
+            results_tree.column(column, width=width, stretch=stretch)
+        results_tree.pack(fill='both', expand=True)
+
+        status_label = tk.Label(search_frame, text="", anchor='w')
+        status_label.pack(fill='x', pady=(5, 0))
+
+        result_refs = {}
+        result_limit = 500
+
+        def run_search(*args):
+            results_tree.delete(*results_tree.get_children())
+            result_refs.clear()
+            matches = note_search_index.search(query_var.get(), result_limit + 1)
+            for note_name, position in matches[:result_limit]:
+                module_id, item_id, desc = notes[note_name][position]
+                iid = results_tree.insert("", tk.END, values=(note_name, module_id, item_id, desc))
+                result_refs[iid] = (note_name, position)
+            if len(matches) > result_limit:
+                status_label.config(text=f"Showing the first {result_limit} matches. Refine the search to see more.")
+            else:
+                status_label.config(text=f"{len(matches)} match(es)" if query_var.get().strip() else "")
+
+        def on_result_activate(event=None):
+            ref = result_refs.get(results_tree.focus())
+            if ref:
+                show_item(*ref)
+
+        query_var.trace_add("write", run_search)
+        results_tree.bind("<Double-1>", on_result_activate)
+        results_tree.bind("<Return>", on_result_activate)
+        apply_theme_to_window(search_win)
+
+    def open_slot_finder():
+        finder_win = tk.Toplevel(notes_win)
+        finder_win.title("Find Items for Slot")
+        finder_win.geometry("700x450")
+        center_window(finder_win)
+
+        finder_frame = tk.Frame(finder_win)
+        finder_frame.pack(fill='both', expand=True, padx=10, pady=10)
+
+        slot_frame = tk.Frame(finder_frame)
+        slot_frame.pack(fill='x', pady=(0, 5))
+        tk.Label(slot_frame, text="Character:").pack(side='left')
+        character_var = tk.StringVar()
+        character_combobox = ttk.Combobox(slot_frame, textvariable=character_var, state='readonly',
+                                          values=slot_item_index.characters(), width=20)
+        character_combobox.pack(side='left', padx=(5, 10))
+        tk.Label(slot_frame, text="Type:").pack(side='left')
+        type_var = tk.StringVar()
+        type_combobox = ttk.Combobox(slot_frame, textvariable=type_var, state='readonly', width=20)
+        type_combobox.pack(side='left', padx=(5, 0))
+
+        candidates_tree = ttk.Treeview(
+            finder_frame,
+            columns=("Object(s)", "Module", "Item ID", "Modules"),
+            show="headings",
+            selectmode='extended'
+        )
+        for column, width, stretch in (("Object(s)", 180, tk.NO), ("Module", 300, tk.YES), ("Item ID", 70, tk.NO), ("Modules", 70, tk.NO)):
+            candidates_tree.heading(column, text=column)
+            candidates_tree.column(column, width=width, stretch=stretch)
+        candidates_tree.pack(fill='both', expand=True)
+
+        desc_frame = tk.Frame(finder_frame)
+        desc_frame.pack(fill='x', pady=(5, 0))
+        tk.Label(desc_frame, text="Description:").pack(side='left')
+        desc_var = tk.StringVar()
+        tk.Entry(desc_frame, textvariable=desc_var).pack(side='left', fill='x', expand=True, padx=(5, 0))
+
+        status_label = tk.Label(finder_frame, text="", anchor='w')
+        status_label.pack(fill='x', pady=(5, 0))
+
+        candidate_refs = {}
+
+        def update_types(*args):
+            types = slot_item_index.types(character_var.get())
+            type_combobox.config(values=types)
+            if type_var.get() not in types:
+                type_var.set(types[0] if types else '')
+            update_candidates()
+
+        def update_candidates(*args):
+            candidates_tree.delete(*candidates_tree.get_children())
+            candidate_refs.clear()
+            candidates = slot_item_index.candidates(character_var.get(), type_var.get())
+            id_ranks = module_sorter.ranks.get('Module ID', {})
+            for candidate in candidates:
+                # The lowest Module ID stands in for the modules sharing this object
+                module_id, item_id = min(candidate['sources'], key=lambda source: id_ranks.get(source[0], 0))
+                module = modules.get(module_id)
+                iid = candidates_tree.insert("", tk.END, values=(
+                    candidate['Object(s)'], module_display_name(module) if module else module_id,
+                    item_id, len({mid for mid, _ in candidate['sources']})
+                ))
+                candidate_refs[iid] = (candidate, module_id, item_id)
+            status_label.config(text=f"{len(candidates)} item(s) fit this slot")
+
+        def add_candidates_to_note():
+            note_name = selected_note()
+            if note_name is None:
+                messagebox.showwarning("No Note Selected", "Select a note in FrankenNotes first.", parent=finder_win)
+                return
+            refs = [candidate_refs[iid] for iid in candidates_tree.selection() if iid in candidate_refs]
+            if not refs:
+                return
+            desc = desc_var.get().strip()
+            if not desc:
+                messagebox.showwarning("Input Error", "Enter a description for the added items.", parent=finder_win)
+                return
+            notes_model.add_items(note_name, [(module_id, item_id, desc) for _, module_id, item_id in refs])
+            status_label.config(text=f"Added {len(refs)} item(s) to '{note_name}'")
+
+        def open_candidates(event=None):
+            refs = [candidate_refs[iid] for iid in candidates_tree.selection() if iid in candidate_refs]
+            if refs:
+                open_items_in_mikumikumodel([candidate['Object(s)'] for candidate, _, _ in refs], parent=finder_win,
+                                            module_ids=[module_id for _, module_id, _ in refs])
+
+        # Start from the slot of the selected note item, if any
+        selected_item_iid = details_tree.focus()
+        if selected_item_iid and view['note'] is not None:
+            module_id, item_id, _desc = notes[view['note']][item_position(selected_item_iid)]
+            module = modules.get(module_id)
+            if module:
+                character_var.set(module.get('Character') or '')
+                for item in module['Items']:
+                    if item.get('Item ID') == item_id:
+                        type_var.set(item.get('Type') or '')
+        character_combobox.bind("<<ComboboxSelected>>", update_types)
+        type_combobox.bind("<<ComboboxSelected>>", update_candidates)
+        candidates_tree.bind("<Double-1>", open_candidates)
+        candidates_tree.bind("<Return>", open_candidates)
+
+        finder_button_frame = tk.Frame(finder_frame)
+        finder_button_frame.pack(fill='x', pady=(5, 0))
+        tk.Button(finder_button_frame, text="Add Selected to Note", command=add_candidates_to_note).pack(side='left', fill='x', expand=True, padx=(0, 2))
+        tk.Button(finder_button_frame, text="Open Selected in MikuMikuModel", command=open_candidates).pack(side='left', fill='x', expand=True, padx=(2, 0))
+
+        update_types()
+        apply_theme_to_window(finder_win)
 
     # --- Button Bars ---
     list_button_frame = tk.Frame(notes_list_frame)
     list_button_frame.pack(side='bottom', fill='x', pady=(10, 0))
     tk.Button(list_button_frame, text="New Note", command=new_note_action).pack(fill='x')
+    tk.Button(list_button_frame, text="Search Notes", command=open_search_window).pack(fill='x', pady=(5, 0))
+    tk.Button(list_button_frame, text="Find Items for Slot", command=open_slot_finder).pack(fill='x', pady=(5, 0))
+    tk.Button(list_button_frame, text="Import...", command=import_action).pack(fill='x', pady=(5, 0))
+    tk.Button(list_button_frame, text="Export...", command=export_action).pack(fill='x', pady=(5, 0))
 
     details_button_frame = tk.Frame(details_frame)
     details_button_frame.pack(side='bottom', fill='x', pady=(10,0))
@@ -1129,14 +1687,88 @@ def open_notes_view(parent, modules):
     delete_item_btn = tk.Button(details_button_frame, text="Delete Selected Item", command=delete_item_action)
     delete_item_btn.pack(side='left', fill='x', expand=True, padx=(2, 0))
 
-    # Initial population
-    update_notes_listbox_and_details()
+    open_button_frame = tk.Frame(details_frame)
+    open_button_frame.pack(side='bottom', fill='x', pady=(5, 0))
+    open_selected_btn = tk.Button(open_button_frame, text="Open Selected in MikuMikuModel", command=open_selected_note_items)
+    open_selected_btn.pack(side='left', fill='x', expand=True, padx=(0, 2))
+    open_all_btn = tk.Button(open_button_frame, text="Open All in Note", command=open_all_note_items)
+    open_all_btn.pack(side='left', fill='x', expand=True, padx=(2, 0))
+
+    # Initial population; from here on only the rows a change touches are redrawn
+    refill_notes_listbox()
+    notes_model.subscribe(on_notes_event)
+    notes_win.bind("<Destroy>", lambda e: notes_model.unsubscribe(on_notes_event) if e.widget is notes_win else None)
     apply_theme_to_window(notes_win)
 
 
+class AutocompleteCombobox(ttk.Combobox):
+    """
+    Editable combobox whose drop-down values are narrowed through an
+    OptionIndex as the user types. Only values present in the index count
+    as a selection.
+    """
+    MAX_SHOWN = 1000
+    NAVIGATION_KEYS = ('Up', 'Down', 'Left', 'Right', 'Return', 'Escape', 'Tab', 'Home', 'End')
+
+    def __init__(self, parent, option_index=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.option_index = None
+        self.set_index(option_index)
+        self.bind("<KeyRelease>", self._on_key_release)
+        self.bind("<Return>", self._complete)
+        self.bind("<FocusOut>", self._complete)
+
+    def set_index(self, option_index):
+        self.option_index = option_index
+        self.configure(values=option_index.displays[:self.MAX_SHOWN] if option_index else [])
+
+    def selected_value(self):
+        if not self.option_index:
+            return None
+        return self.option_index.value_for.get(self.get())
+
+    def _on_key_release(self, event):
+        if not self.option_index or event.keysym in self.NAVIGATION_KEYS:
+            return
+        self.configure(values=self.option_index.filter(self.get(), self.MAX_SHOWN))
+
+    def _complete(self, event=None):
+        # Accept the typed text when it narrows the options down to exactly one
+        if not self.option_index or self.get() in self.option_index.value_for:
+            return
+        matches = self.option_index.filter(self.get(), 2)
+        if len(matches) == 1:
+            self.set(matches[0])
+            self.event_generate("<<ComboboxSelected>>")
+
+
+def character_icon_path(char):
+    fpath = os.path.join(IMAGES_FOLDER, f"{char}.png")
+    if not os.path.isfile(fpath):
+        fpath = os.path.join(IMAGES_FOLDER, f"{char.lower().replace(' ', '_')}.png")
+    return fpath if os.path.isfile(fpath) else None
+
+def decode_character_icon(fpath):
+    pil_img = Image.open(fpath).convert("RGBA")
+    return pil_img.resize((24, 24), Image.Resampling.LANCZOS)
+
+def decode_character_icons():
+    """Decodes the icon of every known character to a PIL image, {path: image}. No Tk calls, so it can run on any thread."""
+    decoded = {}
+    for char in CHARACTER_COLORS:
+        fpath = character_icon_path(char)
+        if fpath and fpath not in decoded:
+            try:
+                decoded[fpath] = decode_character_icon(fpath)
+            except Exception as e:
+                print(f"Could not decode character icon {fpath}: {e}")
+    return decoded
+
+
 class ModuleEntry(tk.Frame):
     _image_cache = {}
     ENTRY_HEIGHT = 28
+    ROW_PITCH = ENTRY_HEIGHT + 2 # Entries are packed with pady=1, so each row occupies 2 extra pixels
     GRADIENT_PORTION = 0.55
 
     def __init__(self, parent, module, select_callback, *args, **kwargs):
@@ -1156,18 +1788,26 @@ class ModuleEntry(tk.Frame):
         self.canvas.bind("<Button-1>", self._on_select)
         self.bind("<Button-1>", self._on_select)
 
-        img = self._load_character_image()
-        self.img_ref = img
-        self.mid = module['Module ID']
-        self.name = module['Name (EN)']
-        self.char = module['Character']
-        self.display_name = f"[{self.mid}] {self.name} ({self.char})"
+        self._set_module_fields(module)
         self.text_id = None
         self.gradient_img = None
         self.last_drawn_width = None
         self.bind('<Configure>', self._on_resize)
         MODULE_ENTRY_INSTANCES.append(self)
 
+    def _set_module_fields(self, module):
+        self.module = module
+        self.img_ref = self._load_character_image()
+        self.mid = module['Module ID']
+        self.name = module['Name (EN)']
+        self.char = module['Character']
+        self.display_name = module_display_name(module)
+
+    def set_module(self, module):
+        """Points this row at an updated version of its module; the caller redraws it if visible."""
+        self._set_module_fields(module)
+        self.bg_color, self.gradient_color = self._get_colors()
+
     def destroy(self):
         try:
             MODULE_ENTRY_INSTANCES.remove(self)
@@ -1256,11 +1896,23 @@ class ModuleEntry(tk.Frame):
             fill="#222" if self._is_light_theme() else "#eee"
         )
 
-    def redraw_theme(self):
+        if self.selected:
+            self.canvas.create_rectangle(
+                1, 1, w - 2, h - 2,
+                outline=theme_manager.get_theme()['fg'], width=2
+            )
+
+    def set_selected(self, selected):
+        if self.selected == selected:
+            return
+        self.selected = selected
+        self._draw_gradient(self.bg_color, self.gradient_color)
+
+    def redraw_theme(self, check_visible=True):
         # Update colors based on current theme
         self.bg_color, self.gradient_color = self._get_colors()
         # Only redraw the gradient if the entry is visible
-        if self.is_visible():
+        if not check_visible or self.is_visible():
             self._draw_gradient(self.bg_color, self.gradient_color)
 
 
@@ -1272,19 +1924,11 @@ class ModuleEntry(tk.Frame):
         return tuple(int(hexcolor[i:i+2], 16) for i in (0, 2, 4))
 
     def _load_character_image(self):
-        char = self.module['Character']
-        fname = f"{char}.png"
-        fpath = os.path.join(IMAGES_FOLDER, fname)
-        if not os.path.isfile(fpath):
-            fname = f"{char.lower().replace(' ', '_')}.png"
-            fpath = os.path.join(IMAGES_FOLDER, fname)
-        if not os.path.isfile(fpath):
+        fpath = character_icon_path(self.module['Character'])
+        if fpath is None:
             return None
         if fpath not in ModuleEntry._image_cache:
-            pil_img = Image.open(fpath).convert("RGBA")
-            pil_img = pil_img.resize((24, 24), Image.Resampling.LANCZOS)
-            img = ImageTk.PhotoImage(pil_img)
-            ModuleEntry._image_cache[fpath] = img
+            ModuleEntry._image_cache[fpath] = ImageTk.PhotoImage(decode_character_icon(fpath))
         return ModuleEntry._image_cache[fpath]
 
     def _get_colors(self):
@@ -1296,6 +1940,45 @@ class ModuleEntry(tk.Frame):
     def _is_light_theme(self):
         return theme_manager.current_theme == "light"
 
+class GroupHeader(tk.Frame):
+    """
+    A collapsible group row in the module list. It is exactly as tall as a
+    ModuleEntry, so the fixed-pitch row maths keeps working with headers mixed in.
+    """
+    def __init__(self, parent, key, count, total, expanded, toggle_callback, *args, **kwargs):
+        super().__init__(parent, height=ModuleEntry.ENTRY_HEIGHT, *args, **kwargs)
+        self.pack_propagate(False)
+        self.key = key
+        self.count = count
+        self.total = total
+        self.expanded = expanded
+        self.label = tk.Label(self, anchor='w', font=('Arial', 10, 'bold'))
+        self.label.pack(fill='both', expand=True, padx=4)
+        for widget in (self, self.label):
+            widget.bind("<Button-1>", lambda event: toggle_callback(self))
+        self.redraw_theme()
+        GROUP_HEADER_INSTANCES.append(self)
+
+    def destroy(self):
+        try:
+            GROUP_HEADER_INSTANCES.remove(self)
+        except ValueError:
+            pass
+        super().destroy()
+
+    def set_expanded(self, expanded):
+        self.expanded = expanded
+        self.redraw_theme()
+
+    def redraw_theme(self, check_visible=True):
+        theme = theme_manager.get_theme()
+        count = f"{self.count}" if self.count == self.total else f"{self.count} of {self.total}"
+        self.configure(bg=theme['frame_bg'])
+        self.label.configure(
+            bg=theme['frame_bg'], fg=theme['fg'],
+            text=f"{'▼' if self.expanded else '▶'}  {self.key or '(none)'}  ({count})"
+        )
+
 # Global variables used in populate_module_entries and related functions
 modules = {}
 module_keys = []
@@ -1306,46 +1989,500 @@ filter_var = None
 _redraw_visible_entries_on_canvas = None # Defined later in main()
 show_module_details = None # Defined later in main()
 
+module_sort_spec = [('Module ID', False)]
 
-def populate_module_entries():
-    filtered_modules = []
-    search_term = search_var.get().lower()
-    char_filter = filter_var.get()
-    for mid in module_keys:
-        module = modules[mid]
-        if char_filter != "All Characters" and module['Character'] != char_filter:
-            continue
-        display_name = f"[{mid}] {module['Name (EN)']} ({module['Character']})"
-        if search_term in display_name.lower():
-            filtered_modules.append(module)
+# Grouped view: None for a flat list, otherwise one of ModuleGroups.FIELDS.
+# Remembered in settings.json as "module_group"; grouped by default so a
+# large catalog starts as one header row per group.
+DEFAULT_MODULE_GROUP = 'Character'
+module_group_field = DEFAULT_MODULE_GROUP
+_expanded_groups = {} # group field -> {group keys currently expanded}
+_group_buckets = {} # group key -> [modules] of the current filter, for expanding without re-filtering
 
-    for entry in list(MODULE_ENTRY_INSTANCES): # Iterate over a copy
-        entry.destroy()
+# State for keyboard navigation of the module list
+filtered_modules = [] # Modules matching the search and filter, in display order
+display_rows = [] # One per list row: a module, or None for a group header
+module_list_rows = [] # ModuleEntry or GroupHeader widgets, same order as display_rows
+module_row_index = {} # Module ID -> first row index showing it
+selected_row = None
+_jump_index = None # (sorted (id, row) pairs, sorted (name, row) pairs), built on first type-ahead
+TYPEAHEAD_TIMEOUT = 1.0 # Seconds of inactivity before the type-ahead buffer resets
+_typeahead_state = {'buffer': '', 'time': 0.0}
 
-    MODULE_ENTRY_INSTANCES.clear() # Ensure the global list is fully cleared
-
-    for module in filtered_modules:
-        entry = ModuleEntry(
-            scrollable_frame, module,
-            select_callback=show_module_details
-        )
-        entry.pack(fill='x', pady=1)
 
+def filter_modules():
+    """
+    Returns the modules matching the character filter and search box: in
+    module_keys order, or ranked best match first while searching, with
+    ties going to the most used modules. The tie-break positions are only
+    rebuilt after the list order or the usage counts change.
+    """
+    global _module_search_stale, _module_positions, search_match_total
+    search_term = search_var.get()
+    char_filter = filter_var.get()
+    search_match_total = 0
+    if not search_term.strip():
+        return [modules[mid] for mid in module_keys
+                if char_filter == "All Characters" or modules[mid]['Character'] == char_filter]
+
+    if _module_search_stale:
+        module_search_index.rebuild(modules)
+        _module_search_stale = False
+    if _module_positions[0] is not module_keys or _module_positions[1] != usage_stats.version:
+        positions = {mid: pos for pos, mid in enumerate(module_keys)}
+        if usage_ranking_enabled:
+            # Equally relevant matches: most used first, then the list order
+            offset = -len(usage_stats.order)
+            positions.update((mid, offset + rank) for rank, mid in enumerate(usage_stats.order))
+        _module_positions = (module_keys, usage_stats.version, positions)
+    accept = None if char_filter == "All Characters" else (lambda mid: modules[mid]['Character'] == char_filter)
+    ranked, search_match_total = module_search_index.search_counted(search_term, SEARCH_RESULT_LIMIT, accept, _module_positions[2])
+    return [modules[mid] for mid in ranked]
+
+def _rebuild_row_index():
+    global module_row_index
+    module_row_index = {}
+    for row, module in enumerate(display_rows):
+        if module is not None:
+            module_row_index.setdefault(module['Module ID'], row)
+
+def _refresh_scroll_region():
     canvas.update_idletasks()
     canvas.configure(scrollregion=canvas.bbox("all"))
     _redraw_visible_entries_on_canvas()
 
+def populate_module_entries():
+    global filtered_modules, display_rows, module_list_rows, selected_row, _jump_index, _group_buckets
+    previously_selected = display_rows[selected_row]['Module ID'] if selected_row is not None else None
+
+    filtered_modules = filter_modules()
+    if search_match_total > len(filtered_modules):
+        search_hint_var.set(f"Showing the first {len(filtered_modules)} of {search_match_total} matches")
+    else:
+        search_hint_var.set("")
+
+    for widget in scrollable_frame.winfo_children(): # Entries and headers drop out of their instance lists
+        widget.destroy()
+    MODULE_ENTRY_INSTANCES.clear() # Ensure the global list is fully cleared
+
+    display_rows = []
+    module_list_rows = []
+    if module_group_field is None:
+        _group_buckets = {}
+        for module in filtered_modules:
+            entry = ModuleEntry(
+                scrollable_frame, module,
+                select_callback=_on_module_entry_clicked
+            )
+            entry.pack(fill='x', pady=1)
+            display_rows.append(module)
+            module_list_rows.append(entry)
+    else:
+        # Collapsed groups cost one header row; only expanded groups get entries
+        buckets = module_groups.bucket(module_group_field, filtered_modules)
+        _group_buckets = dict(buckets)
+        expanded = _expanded_groups.setdefault(module_group_field, set())
+        group_totals = module_groups.members[module_group_field]
+        for key, members in buckets:
+            header = GroupHeader(
+                scrollable_frame, key, len(members), len(group_totals.get(key, members)),
+                key in expanded, toggle_callback=toggle_module_group
+            )
+            header.pack(fill='x', pady=1)
+            display_rows.append(None)
+            module_list_rows.append(header)
+            if key in expanded:
+                for module in members:
+                    entry = ModuleEntry(scrollable_frame, module, select_callback=_on_module_entry_clicked)
+                    entry.pack(fill='x', pady=1)
+                    display_rows.append(module)
+                    module_list_rows.append(entry)
+    _rebuild_row_index()
+
+    # Keep the selection on the same module if it survived the filter
+    selected_row = module_row_index.get(previously_selected)
+    if selected_row is not None:
+        module_list_rows[selected_row].selected = True
+    _jump_index = None
+
+    _refresh_scroll_region()
+
+def toggle_module_group(header):
+    """
+    Expands or collapses one group in place: only that group's entries are
+    created or destroyed, and the rows after it just shift.
+    """
+    global selected_row, _jump_index
+    expanded = _expanded_groups.setdefault(module_group_field, set())
+    row = module_list_rows.index(header)
+    members = _group_buckets.get(header.key, [])
+    if header.expanded:
+        expanded.discard(header.key)
+        removed = module_list_rows[row + 1:row + 1 + len(members)]
+        for entry in removed:
+            entry.destroy()
+        del module_list_rows[row + 1:row + 1 + len(members)]
+        del display_rows[row + 1:row + 1 + len(members)]
+        if selected_row is not None and selected_row > row:
+            selected_row = None if selected_row <= row + len(members) else selected_row - len(members)
+    else:
+        expanded.add(header.key)
+        entries = []
+        after = header
+        for module in members:
+            entry = ModuleEntry(scrollable_frame, module, select_callback=_on_module_entry_clicked)
+            entry.pack(fill='x', pady=1, after=after)
+            entries.append(entry)
+            after = entry
+        module_list_rows[row + 1:row + 1] = entries
+        display_rows[row + 1:row + 1] = members
+        if selected_row is not None and selected_row > row:
+            selected_row += len(members)
+    header.set_expanded(not header.expanded)
+    _rebuild_row_index()
+    _jump_index = None
+    _refresh_scroll_region()
+
+def set_module_grouping(field):
+    """Switches the module list between flat (field None) and grouped by field, and remembers the choice."""
+    global module_group_field
+    module_group_field = field
+    populate_module_entries()
+    save_module_grouping(field)
+
+def saved_module_grouping(settings):
+    """The grouping stored in settings: a ModuleGroups field, or None for a flat list."""
+    field = settings.get("module_group", DEFAULT_MODULE_GROUP)
+    return field if field is None or field in ModuleGroups.FIELDS else DEFAULT_MODULE_GROUP
+
+def save_module_grouping(field):
+    try:
+        settings_data = {}
+        if os.path.exists(SETTINGS_FILE):
+            with open(SETTINGS_FILE, 'r') as f:
+                settings_data = json.load(f)
+        settings_data['module_group'] = field
+        os.makedirs(os.path.dirname(SETTINGS_FILE), exist_ok=True)
+        with open(SETTINGS_FILE, 'w') as f:
+            json.dump(settings_data, f, indent=4)
+    except (OSError, ValueError) as e:
+        print(f"Could not save the module grouping: {e}")
+
+
+def apply_catalog_changes(changed_ids):
+    """
+    Folds modules added, edited or removed on disk into the running app:
+    sort keys and option indexes are updated for changed_ids only, and the
+    list is rebuilt only if its membership or order changed; otherwise just
+    the affected rows are updated and redrawn if they are on screen.
+    """
+    global module_keys, _jump_index
+    module_sorter.update(modules, changed_ids)
+    module_groups.update(modules, changed_ids)
+    slot_item_index.update(modules, changed_ids)
+    if not _module_search_stale:
+        module_search_index.update(modules, changed_ids)
+    _option_index_cache.pop((catalog_version, 'modules'), None)
+    for mid in changed_ids:
+        _option_index_cache.pop((catalog_version, 'items', mid), None)
+    module_keys = module_sorter.sorted_keys(module_sort_spec)
+    if api_context:
+        api_context.catalog_changed(changed_ids)
+
+    new_filtered = filter_modules()
+    if module_group_field is not None or [m['Module ID'] for m in new_filtered] != [m['Module ID'] for m in filtered_modules]:
+        # Group membership may have moved too; headers are cheap and only expanded groups are rebuilt
+        populate_module_entries()
+    else:
+        first, last = visible_row_range()
+        for mid in changed_ids:
+            row = module_row_index.get(mid)
+            if row is None:
+                continue
+            display_rows[row] = filtered_modules[row] = modules[mid]
+            module_list_rows[row].set_module(modules[mid])
+            if first <= row <= last:
+                module_list_rows[row].redraw_theme(check_visible=False)
+        _jump_index = None
+
+    if selected_row is not None and display_rows[selected_row]['Module ID'] in changed_ids:
+        show_module_details(display_rows[selected_row])
+
+def watched_paths():
+    # The catalog.d and item root directories themselves catch files being added or removed.
+    # Runs on the watcher thread, so it uses the roots last resolved rather than reading settings.
+    return catalog_layer_paths() + [CATALOG_D_FOLDER] + list(item_roots_index.roots or [ITEMS_FOLDER])
+
+def poll_file_changes(root, watcher):
+    """Applies settled file changes reported by the watcher thread on the Tk thread."""
+    changed_paths = set()
+    while not watcher.changes.empty():
+        changed_paths |= watcher.changes.get_nowait()
+    if changed_paths:
+        catalog_paths = set(catalog_layer_paths()) | {CATALOG_D_FOLDER}
+        if changed_paths & catalog_paths or any(p.startswith(CATALOG_D_FOLDER) for p in changed_paths):
+            with catalog_lock:
+                try:
+                    changed_ids = layered_catalog.refresh(catalog_layer_paths())
+                except Exception as e:
+                    print(f"Could not reload {MODULES_CSV}: {e}") # Keep the catalog we have; the next save retries
+                    changed_ids = set()
+                for path, error in layered_catalog.errors:
+                    print(f"Skipping catalog overlay {path}: {error}")
+                if changed_ids:
+                    apply_catalog_changes(changed_ids)
+        if changed_paths & set(item_roots_index.roots) and selected_row is not None:
+            # New or removed archives change what can be previewed and opened
+            show_module_details(display_rows[selected_row])
+    root.after(250, poll_file_changes, root, watcher)
+
+def visible_row_range():
+    """
+    Returns the (first, last) row indexes inside the list viewport, computed from
+    the fixed row pitch instead of querying each entry's geometry.
+    """
+    pitch = ModuleEntry.ROW_PITCH
+    top = canvas.canvasy(0)
+    first = max(int(top // pitch), 0)
+    last = min(int((top + canvas.winfo_height()) // pitch), len(module_list_rows) - 1)
+    return first, last
+
+def _scroll_row_into_view(row):
+    bbox = canvas.bbox("all")
+    total_height = bbox[3] if bbox else len(module_list_rows) * ModuleEntry.ROW_PITCH
+    if total_height <= 0:
+        return
+    top = canvas.canvasy(0)
+    view_height = canvas.winfo_height()
+    row_top = row * ModuleEntry.ROW_PITCH
+    row_bottom = row_top + ModuleEntry.ROW_PITCH
+    if row_top < top:
+        canvas.yview_moveto(row_top / total_height)
+    elif row_bottom > top + view_height:
+        canvas.yview_moveto((row_bottom - view_height) / total_height)
+
+def select_module_row(row, direction=1):
+    """
+    Selects the given row of the module list, scrolls it into view and shows
+    its details. Group headers are skipped in the given direction.
+    """
+    global selected_row
+    if not module_row_index:
+        return
+    row = max(0, min(row, len(display_rows) - 1))
+    step = 1 if direction >= 0 else -1
+    target = row
+    while 0 <= target < len(display_rows) and display_rows[target] is None:
+        target += step
+    if not 0 <= target < len(display_rows):
+        # Ran off the end: take the nearest module row the other way
+        target = row
+        while display_rows[target] is None:
+            target -= step
+    if selected_row is not None and selected_row < len(module_list_rows):
+        module_list_rows[selected_row].set_selected(False)
+    selected_row = target
+    _scroll_row_into_view(target)
+    # Only the rows at the destination need drawing
+    _redraw_visible_entries_on_canvas()
+    module_list_rows[target].set_selected(True)
+    show_module_details(display_rows[target])
+
+def _on_module_entry_clicked(module):
+    record_module_use([module['Module ID']], 'select')
+    row = module_row_index.get(module['Module ID'])
+    if row is not None:
+        select_module_row(row)
+    canvas.focus_set()
+
+def _build_jump_index():
+    ids = []
+    names = []
+    for row, module in enumerate(display_rows):
+        if module is None:
+            continue
+        mid = module['Module ID']
+        if mid.isdigit():
+            ids.append((int(mid), row))
+        names.append((module['Name (EN)'].lower(), row))
+    ids.sort()
+    names.sort()
+    return ids, names
+
+def find_module_row(prefix):
+    """
+    Finds the row to jump to for a type-ahead prefix. Digits jump to the first
+    module whose numeric ID is >= the typed number, anything else to the first
+    module whose English name starts with the prefix. Returns None if nothing matches.
+    """
+    global _jump_index
+    if _jump_index is None:
+        _jump_index = _build_jump_index()
+    ids, names = _jump_index
+
+    if prefix.isdigit():
+        pos = bisect.bisect_left(ids, (int(prefix), -1))
+        return ids[pos][1] if pos < len(ids) else None
+
+    prefix = prefix.lower()
+    pos = bisect.bisect_left(names, (prefix, -1))
+    if pos < len(names) and names[pos][0].startswith(prefix):
+        return names[pos][1]
+    return None
+
+def _on_module_list_key(event):
+    if not module_row_index:
+        return None
+    current = selected_row if selected_row is not None else -1
+    page_size = max(1, canvas.winfo_height() // ModuleEntry.ROW_PITCH - 1)
+    moves = {
+        'Up': (current - 1, -1),
+        'Down': (current + 1, 1),
+        'Prior': (current - page_size, -1),
+        'Next': (current + page_size, 1),
+        'Home': (0, 1),
+        'End': (len(display_rows) - 1, -1),
+    }
+    if event.keysym in moves:
+        select_module_row(*moves[event.keysym])
+        return "break"
+
+    # Type-ahead: ignore Control chords and non-printable keys
+    if event.char and event.char.isprintable() and not (event.state & 0x0004):
+        now = time.monotonic()
+        if now - _typeahead_state['time'] > TYPEAHEAD_TIMEOUT:
+            _typeahead_state['buffer'] = ''
+        _typeahead_state['time'] = now
+        _typeahead_state['buffer'] += event.char
+        row = find_module_row(_typeahead_state['buffer'])
+        if row is None:
+            canvas.bell()
+        else:
+            select_module_row(row)
+        return "break"
+    return None
 
-def main():
-    global modules, module_keys, canvas, scrollable_frame, search_var, filter_var, _redraw_visible_entries_on_canvas, show_module_details
 
-    ensure_app_structure() # Ensure app structure is set up first
-    settings = load_settings() # Load settings after ensuring the app structure and potentially running first_launch_prompt
+def scan_items_folder():
+    # Warms merged_items_index() for the first module shown; returns whether the tutorial is needed
+    return items_folder_is_empty()
 
-    modules = load_modules()
-    module_keys = list(modules.keys())
+def wait_for_startup(root, pipeline):
+    """
+    Starts pipeline and shows a splash until it finishes. Tk keeps handling
+    events meanwhile (wait_variable runs a nested event loop), so the splash
+    paints and moves while the steps run on worker threads.
+    """
+    splash = tk.Toplevel(root)
+    splash.overrideredirect(True)
+    frame = tk.Frame(splash, bd=1, relief='solid', padx=30, pady=20)
+    frame.pack()
+    tk.Label(frame, text="DivaDivaModule", font=('Arial', 16, 'bold')).pack()
+    status_label = tk.Label(frame, text="Loading...", width=40)
+    status_label.pack(pady=(10, 0))
+    center_window(splash)
+
+    finished = tk.BooleanVar(value=False)
+    def poll():
+        if pipeline.done():
+            finished.set(True)
+            return
+        status_label.config(text="Loading " + ", ".join(pipeline.pending()) + "...")
+        splash.after(30, poll)
+
+    started = time.perf_counter()
+    pipeline.start()
+    poll()
+    if not finished.get():
+        root.wait_variable(finished)
+    splash.destroy()
+    print(f"Startup took {time.perf_counter() - started:.2f}s: " +
+          ", ".join(f"{name} {seconds:.2f}s" for name, seconds in pipeline.timings.items()))
+
+def parse_launch_args(argv=None):
+    parser = argparse.ArgumentParser(prog='divadivamodule', description="Browse the Project DIVA module catalog.")
+    parser.add_argument('--module', help="Select this Module ID")
+    parser.add_argument('--open', nargs='+', metavar='OBJECT', default=[], help="Open these objects in MikuMikuModel")
+    parser.add_argument('--search', help="Search the module list for this term")
+    parser.add_argument('--new-instance', action='store_true', help="Start a new window even if one is already running")
+    return parser.parse_args(argv)
+
+def handle_launch_request(root, request):
+    """Applies a launch request (this process's own or one forwarded by a later launch) and raises the window."""
+    if request.get('search') is not None:
+        search_var.set(request['search'])
+    module_id = request.get('module')
+    if module_id:
+        if module_id not in modules:
+            messagebox.showwarning("Module Not Found", f"Module '{module_id}' is not in the catalog.", parent=root)
+        else:
+            if module_id not in module_row_index and request.get('search') is None:
+                # Hidden by the current search or filter: show the whole list again
+                search_var.set('')
+                filter_var.set("All Characters")
+                populate_module_entries()
+            if module_id not in module_row_index and module_group_field is not None:
+                # In a collapsed group
+                _expanded_groups.setdefault(module_group_field, set()).update(module_groups.keys_of[module_group_field].get(module_id, ()))
+                populate_module_entries()
+            row = module_row_index.get(module_id)
+            if row is not None:
+                select_module_row(row)
+    if request.get('open'):
+        open_items_in_mikumikumodel(request['open'], parent=root)
+    root.deiconify()
+    root.lift()
+    root.focus_force()
+
+def poll_instance_requests(root, server):
+    """Handles launches forwarded to this instance by server's thread on the Tk thread."""
+    while not server.requests.empty():
+        handle_launch_request(root, server.requests.get_nowait())
+    root.after(200, poll_instance_requests, root, server)
+
+def main(argv=None, on_ready=None):
+    """Runs the app. on_ready(root), if given, is called once the window is built (used by divadiva_uibench.py)."""
+    global module_keys, canvas, scrollable_frame, search_var, search_hint_var, filter_var, _redraw_visible_entries_on_canvas, show_module_details, refresh_recent_items_panel, api_context, usage_ranking_enabled, module_group_field
+
+    args = parse_launch_args(argv)
+    launch_request = {'action': 'launch', 'module': args.module, 'search': args.search, 'open': args.open}
+    # A window is already up: let it do the work instead of repeating the cold start
+    if not args.new_instance and send_to_running_instance(launch_request):
+        return
 
+    # Show a splash right away and overlap the independent startup I/O behind it
     root = tk.Tk()
+    root.withdraw()
+    pipeline = StartupPipeline()
+    pipeline.add('provisioning', ensure_app_structure)
+    pipeline.add('settings', read_valid_settings)
+    pipeline.add('recent items', recent_items.load)
+    pipeline.add('usage', usage_stats.load)
+    pipeline.add('items folder', scan_items_folder)
+    pipeline.add('catalog', lambda: layered_catalog.refresh(catalog_layer_paths()), deps=('provisioning',))
+    pipeline.add('icons', decode_character_icons, deps=('provisioning',)) # Starter icons are copied in
+    wait_for_startup(root, pipeline)
+
+    # Join on the Tk thread: anything that needs a dialog happens here
+    for kind, title, message in pipeline.result('provisioning'):
+        getattr(messagebox, kind)(title, message)
+    settings = pipeline.result('settings') or load_settings(root) # Prompts for first launch setup if needed
+    pipeline.result('recent items')
+    pipeline.result('usage')
+    usage_ranking_enabled = settings.get("usage_ranking", True)
+    module_group_field = saved_module_grouping(settings)
+    thumbnail_service.cache.max_bytes = setting_number(settings, "thumbnail_cache_mb", 64) * 1024 * 1024
+    archive_prefetcher.budget_bytes = setting_number(settings, "prefetch_mb", 256) * 1024 * 1024
+
+    report_catalog_load(pipeline.errors.get('catalog'))
+    set_catalog(layered_catalog.modules)
+    if usage_ranking_enabled:
+        module_sorter.set_ranks(USAGE_SORT_FIELD, usage_stats.ranks)
+    module_keys = module_sorter.sorted_keys(module_sort_spec)
+    for fpath, pil_img in pipeline.results.get('icons', {}).items():
+        ModuleEntry._image_cache[fpath] = ImageTk.PhotoImage(pil_img)
+
+    root.deiconify()
     root.title("DivaDivaModule")
     root.geometry("900x700")
     apply_theme_to_window(root, 'default')
@@ -1357,6 +2494,7 @@ def main():
     file_menu = tk.Menu(menubar, tearoff=0)
     menubar.add_cascade(label="File", menu=file_menu)
     file_menu.add_command(label="Open Settings", command=lambda: open_settings(root))
+    file_menu.add_command(label="Memory Report", command=lambda: open_memory_report(root, {"Item previews": preview_state['images']}))
     file_menu.add_separator()
     file_menu.add_command(label="Exit", command=root.quit)
 
@@ -1373,12 +2511,55 @@ def main():
     search_entry.pack(side='left', fill='x', expand=True, padx=(0, 10))
     theme_manager.apply_theme_to_widget(search_entry, 'entry')
 
+    search_hint_var = tk.StringVar()
+    search_hint_label = tk.Label(search_filter_frame, textvariable=search_hint_var)
+    search_hint_label.pack(side='left', padx=(0, 10))
+    theme_manager.apply_theme_to_widget(search_hint_label, 'label')
+
+    def _focus_module_list(event):
+        canvas.focus_set()
+        if selected_row is None:
+            select_module_row(0)
+        return "break"
+
+    search_entry.bind("<Down>", _focus_module_list)
+
     char_options = ["All Characters"] + sorted(list(CHARACTER_COLORS.keys()))
     filter_var = tk.StringVar(value="All Characters")
     filter_menu = ttk.Combobox(search_filter_frame, textvariable=filter_var, values=char_options, state='readonly', width=20)
     filter_menu.pack(side='left')
     theme_manager.apply_theme_to_combobox(filter_menu)
 
+    sort_label = tk.Label(search_filter_frame, text="Sort by:")
+    sort_label.pack(side='left', padx=(10, 5))
+    theme_manager.apply_theme_to_widget(sort_label, 'label')
+
+    sort_var = tk.StringVar(value="Module ID")
+    sort_menu = ttk.Combobox(search_filter_frame, textvariable=sort_var, values=module_sorter.fields, state='readonly', width=12)
+    sort_menu.pack(side='left')
+    theme_manager.apply_theme_to_combobox(sort_menu)
+
+    sort_desc_var = tk.BooleanVar(value=False)
+    sort_desc_check = tk.Checkbutton(search_filter_frame, text="Desc", variable=sort_desc_var)
+    sort_desc_check.pack(side='left', padx=(5, 0))
+    theme_manager.apply_theme_to_widget(sort_desc_check, 'button')
+
+    group_label = tk.Label(search_filter_frame, text="Group by:")
+    group_label.pack(side='left', padx=(10, 5))
+    theme_manager.apply_theme_to_widget(group_label, 'label')
+
+    group_var = tk.StringVar(value=module_group_field or "None")
+    group_menu = ttk.Combobox(search_filter_frame, textvariable=group_var, values=["None"] + list(ModuleGroups.FIELDS), state='readonly', width=10)
+    group_menu.pack(side='left')
+    theme_manager.apply_theme_to_combobox(group_menu)
+    group_menu.bind("<<ComboboxSelected>>", lambda e: set_module_grouping(None if group_var.get() == "None" else group_var.get()))
+
+    def on_sort_change(*args):
+        global module_keys, module_sort_spec
+        module_sort_spec = [(sort_var.get(), sort_desc_var.get())]
+        module_keys = module_sorter.sorted_keys(module_sort_spec)
+        populate_module_entries()
+
     main_content_frame = tk.Frame(root)
     main_content_frame.pack(fill='both', expand=True, padx=10, pady=10)
     theme_manager.apply_theme_to_widget(main_content_frame, 'frame')
@@ -1405,26 +2586,15 @@ def main():
     scrollable_frame.bind("<Configure>", _on_frame_configure)
 
     def _redraw_visible_entries_on_canvas_func(): # Renamed to avoid global conflict
-        canvas_y_offset = canvas.canvasy(0)
-        canvas_height = canvas.winfo_height()
-
-        for entry in MODULE_ENTRY_INSTANCES:
+        # Rows have a fixed pitch, so the visible slice is computed directly
+        # instead of asking every entry for its winfo_y().
+        first, last = visible_row_range()
+        for entry in module_list_rows[first:last + 1]:
             try:
                 # Ensure entry is still mapped and visible on screen
                 if not entry.winfo_exists():
                     continue
-
-                entry_y_in_frame = entry.winfo_y()
-                entry_top_on_canvas = entry_y_in_frame - canvas_y_offset
-                entry_bottom_on_canvas = entry_top_on_canvas + ModuleEntry.ENTRY_HEIGHT
-
-                # Check if any part of the widget is within the visible canvas area
-                if entry_bottom_on_canvas > 0 and entry_top_on_canvas < canvas_height:
-                    entry.redraw_theme() # Call redraw_theme to ensure it draws correctly
-                else:
-                    # Optionally, clear entries that are far off-screen to save resources
-                    # For now, we just don't redraw them.
-                    pass
+                entry.redraw_theme(check_visible=False)
             except tk.TclError:
                 # Widget might have been destroyed in the interim
                 pass
@@ -1435,6 +2605,9 @@ def main():
     canvas.bind("<MouseWheel>", lambda event: (canvas.yview_scroll(int(-1*(event.delta/120)), "units"), _redraw_visible_entries_on_canvas()))
     canvas.bind("<Button-4>", lambda event: (canvas.yview_scroll(-1, "units"), _redraw_visible_entries_on_canvas()))
     canvas.bind("<Button-5>", lambda event: (canvas.yview_scroll(1, "units"), _redraw_visible_entries_on_canvas()))
+    # Keyboard navigation and type-ahead once the list has focus (clicking an entry gives it focus)
+    canvas.configure(takefocus=1)
+    canvas.bind("<Key>", _on_module_list_key)
 
     module_details_frame = tk.Frame(main_content_frame, width=400)
     module_details_frame.pack(side='right', fill='y')
@@ -1446,6 +2619,7 @@ def main():
     theme_manager.apply_theme_to_separator(separator)
 
     details_labels = {}
+    shown_module = {'id': None} # Module whose items the item tree lists
     label_font = ('Arial', 10)
     for i, (key_en, key_jp) in enumerate([
         ("Module ID", "モジュールID"),
@@ -1471,7 +2645,7 @@ def main():
 
     tk.Label(module_details_frame, text="Items:", font=('Arial', 10, 'bold'), anchor='w').pack(fill='x', pady=(5,0), padx=5)
 
-    item_tree = ttk.Treeview(module_details_frame, columns=("Item ID", "Object(s)", "Type"), show='headings')
+    item_tree = ttk.Treeview(module_details_frame, columns=("Item ID", "Object(s)", "Type"), show='headings', selectmode='extended')
     item_tree.heading("Item ID", text="Item ID")
     item_tree.heading("Object(s)", text="Object(s)")
     item_tree.heading("Type", text="Type")
@@ -1481,7 +2655,117 @@ def main():
     item_tree.pack(fill='both', expand=True, padx=5)
     theme_manager.apply_theme_to_treeview(item_tree)
 
+    preview_frame = tk.Frame(module_details_frame)
+    preview_frame.pack(fill='x', padx=5, pady=(5, 0))
+    theme_manager.apply_theme_to_widget(preview_frame, 'frame')
+    preview_state = {'token': 0, 'images': []}
+
+    def show_preview(label, png_path):
+        try:
+            img = ImageTk.PhotoImage(Image.open(png_path))
+        except Exception:
+            return
+        preview_state['images'].append(img)
+        label.config(image=img, text='')
+
+    def poll_previews(token, pending):
+        if token != preview_state['token']:
+            return # Another module was selected; its previews stay cached for later
+        for future, label in list(pending.items()):
+            if future.done():
+                del pending[future]
+                png_path = None if future.cancelled() or future.exception() else future.result()
+                if png_path:
+                    show_preview(label, png_path)
+                else:
+                    label.destroy()
+        if pending:
+            root.after(100, poll_previews, token, pending)
+
+    def show_module_previews(module):
+        preview_state['token'] += 1
+        preview_state['images'] = []
+        for child in preview_frame.winfo_children():
+            child.destroy()
+
+        items_index = merged_items_index(configured_item_roots(cached_settings()))
+        object_names = []
+        for item in module.get('Items', []):
+            for object_name in split_objects(item.get('Object(s)', '')):
+                if object_name not in object_names and object_name.lower() in items_index:
+                    object_names.append(object_name)
+        # Every archive, not just the previewed ones; replaces the last module's prefetch
+        if archive_prefetcher.budget_bytes > 0:
+            archive_prefetcher.prefetch(items_index[name.lower()] for name in object_names)
+
+        pending = {}
+        for position, object_name in enumerate(object_names[:MAX_PREVIEWS]):
+            label = tk.Label(preview_frame, text="...")
+            label.grid(row=position // 5, column=position % 5, padx=2, pady=2)
+            theme_manager.apply_theme_to_widget(label, 'label')
+            state, result = thumbnail_service.request(items_index[object_name.lower()])
+            if state == 'ready':
+                show_preview(label, result)
+            elif state == 'pending':
+                pending[result] = label
+            else:
+                label.destroy()
+        if pending:
+            root.after(100, poll_previews, preview_state['token'], pending)
+
+    # --- Recently opened items: reopened from their remembered paths ---
+    tk.Label(module_details_frame, text="Recently Opened:", font=('Arial', 10, 'bold'), anchor='w').pack(fill='x', pady=(5, 0), padx=5)
+    recent_tree = ttk.Treeview(module_details_frame, columns=("Object", "Opened"), show='headings', selectmode='extended', height=6)
+    recent_tree.heading("Object", text="Object")
+    recent_tree.heading("Opened", text="Opened")
+    recent_tree.column("Object", width=150)
+    recent_tree.column("Opened", width=110, stretch=tk.NO)
+    recent_tree.tag_configure('missing', foreground='gray')
+    recent_tree.pack(fill='x', padx=5, pady=(0, 5))
+    theme_manager.apply_theme_to_treeview(recent_tree)
+
+    def refresh_recent_panel():
+        # Shows the last known state only; entries are re-checked when reopened
+        recent_tree.delete(*recent_tree.get_children())
+        for entry in recent_items.entries:
+            valid = entry.get('valid', True)
+            opened_text = time.strftime('%m-%d %H:%M', time.localtime(entry.get('opened', 0))) if valid else "missing"
+            recent_tree.insert('', 'end', values=(entry['object'], opened_text), tags=() if valid else ('missing',))
+
+    def open_selected_recent(event=None):
+        selected = recent_tree.selection()
+        if selected:
+            open_items_in_mikumikumodel([recent_tree.item(iid, 'values')[0] for iid in selected])
+
+    def remove_selected_recent():
+        for iid in recent_tree.selection():
+            recent_items.remove(recent_tree.item(iid, 'values')[0])
+        refresh_recent_panel()
+
+    def clear_recent():
+        recent_items.clear()
+        refresh_recent_panel()
+
+    recent_context_menu = tk.Menu(root, tearoff=0)
+    recent_context_menu.add_command(label="Open in MikuMikuModel", command=open_selected_recent)
+    recent_context_menu.add_command(label="Remove from List", command=remove_selected_recent)
+    recent_context_menu.add_separator()
+    recent_context_menu.add_command(label="Clear List", command=clear_recent)
+
+    def show_recent_context_menu(event):
+        row = recent_tree.identify_row(event.y)
+        if row and row not in recent_tree.selection():
+            recent_tree.selection_set(row)
+        recent_context_menu.post(event.x_root, event.y_root)
+
+    recent_tree.bind("<Double-1>", open_selected_recent)
+    recent_tree.bind("<Return>", open_selected_recent)
+    recent_tree.bind("<Button-3>", show_recent_context_menu)
+    refresh_recent_items_panel = refresh_recent_panel # Assign to global
+    refresh_recent_panel()
+
     def show_module_details_func(module): # Renamed to avoid global conflict
+        shown_module['id'] = module['Module ID']
         for key, label_widget in details_labels.items():
             label_widget.config(text=module.get(key, ''))
 
@@ -1495,12 +2779,17 @@ def main():
                 item.get('Type', '')
             ))
 
+        show_module_previews(module)
+
         item_tree_context_menu = tk.Menu(root, tearoff=0)
-        item_tree_context_menu.add_command(label="Open Item in MikuMikuModel", command=lambda: on_item_double_click(None))
+        item_tree_context_menu.add_command(label="Open Selected in MikuMikuModel", command=lambda: on_item_double_click(None))
+        item_tree_context_menu.add_command(label="Open All Items of Module", command=open_all_module_items)
 
         def show_item_context_menu(event):
-            item_tree.identify_row(event.y)
-            item_tree.selection_set(item_tree.identify_row(event.y))
+            row = item_tree.identify_row(event.y)
+            # Keep a multi-selection when right-clicking inside it
+            if row and row not in item_tree.selection():
+                item_tree.selection_set(row)
             item_tree_context_menu.post(event.x_root, event.y_root)
 
         item_tree.bind("<Button-3>", show_item_context_menu)
@@ -1510,14 +2799,19 @@ def main():
     def on_item_double_click(event):
         selected = item_tree.selection()
         if selected:
-            values = item_tree.item(selected[0], 'values')
-            object_name = values[1]
-            open_item_in_mikumikumodel(object_name)
+            open_items_in_mikumikumodel([item_tree.item(iid, 'values')[1] for iid in selected], module_ids=[shown_module['id']])
+
+    def open_all_module_items():
+        object_names = [item_tree.item(iid, 'values')[1] for iid in item_tree.get_children()]
+        if object_names:
+            open_items_in_mikumikumodel(object_names, module_ids=[shown_module['id']])
 
     item_tree.bind("<Double-1>", on_item_double_click)
 
     search_var.trace_add("write", lambda *_: populate_module_entries())
     filter_menu.bind("<<ComboboxSelected>>", lambda e: populate_module_entries())
+    sort_menu.bind("<<ComboboxSelected>>", on_sort_change)
+    sort_desc_check.configure(command=on_sort_change)
     populate_module_entries()
 
     notes_btn = tk.Button(root, text="FrankenNotes", command=lambda: open_notes_view(root, modules))
@@ -1529,9 +2823,68 @@ def main():
 
     # --- Call check_items_folder_and_guide AFTER the main window is set up but before mainloop ---
     # This ensures the main window is visible when the tutorial pops up.
-    check_items_folder_and_guide(root)
+    check_items_folder_and_guide(root, pipeline.results.get('items folder'))
+
+    poll_viewer_errors(root)
+    poll_usage_save(root)
+
+    # Pick up edits to the catalog and items folder without a restart
+    file_watcher = None
+    if settings.get("hot_reload", True):
+        file_watcher = FileWatcher(watched_paths)
+        file_watcher.start()
+        poll_file_changes(root, file_watcher)
+
+    # Later launches forward their request here and exit
+    instance_server = None
+    if settings.get("single_instance", True) and not args.new_instance:
+        instance_server = InstanceServer()
+        try:
+            if instance_server.start():
+                poll_instance_requests(root, instance_server)
+            else:
+                instance_server = None # Another instance started meanwhile; keep this window anyway
+        except OSError as e:
+            print(f"Single-instance mode unavailable: {e}")
+            instance_server = None
+    # Opt-in: answer authoring tools from the catalog already in memory
+    api_server = None
+    if settings.get("api_server"):
+        api_context = ApiContext(modules, catalog_lock, open_objects=queue_api_open)
+        api_server = ApiServer(api_context, setting_number(settings, "api_port", DEFAULT_API_PORT, minimum=1, maximum=65535))
+        try:
+            api_server.start()
+            print(f"API listening on http://127.0.0.1:{api_server.port}")
+            poll_api_requests(root)
+        except OSError as e:
+            print(f"Could not start the API server: {e}")
+            api_server = None
+
+    if args.module or args.search is not None or args.open:
+        root.after_idle(handle_launch_request, root, launch_request)
+
+    # Opt-in: log where the event loop spends time when the window freezes
+    watchdog = None
+    if settings.get("stall_watchdog") or os.getenv("DIVADIVA_WATCHDOG"):
+        watchdog = StallWatchdog(root.after, threshold=setting_number(settings, "stall_threshold_ms", 200, minimum=10) / 1000.0)
+        watchdog.start()
+
+    if on_ready:
+        root.after_idle(on_ready, root)
 
     root.mainloop()
+    if usage_stats.dirty:
+        usage_stats.save()
+    if api_server:
+        api_server.stop()
+    if instance_server:
+        instance_server.stop()
+    if watchdog:
+        watchdog.stop()
+    if file_watcher:
+        file_watcher.stop()
+    thumbnail_service.shutdown()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Worker processes of the frozen app start here
     main()
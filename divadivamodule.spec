@@ -43,10 +43,53 @@ exe = EXE(
     # icon='your_icon.ico', # Uncomment if you have an icon
 )
 
+# Console companion for scripts: the same catalog/notes commands as
+# divadiva_cli.py, without tkinter or PIL so it starts quickly
+cli_a = Analysis(
+    ['divadiva_cli.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=['tkinter', 'PIL'],
+    win_no_prefer_redirects=False,
+    win_private_assemblies=False,
+    cipher=block_cipher,
+    noarchive=False,
+    optimize=0,
+)
+cli_pyz = PYZ(cli_a.pure, cli_a.zipped_data, cipher=block_cipher)
+
+cli_exe = EXE(
+    cli_pyz,
+    cli_a.scripts,
+    [],
+    exclude_binaries=True,
+    name='divadiva-cli',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=True,
+    upx_exclude=[],
+    runtime_tmpdir=None,
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+
 coll = COLLECT(
     exe,
     a.binaries,
     a.datas,
+    cli_exe,
+    cli_a.binaries,
+    cli_a.datas,
     strip=False,
     upx=True,
     upx_exclude=[],
@@ -0,0 +1,35 @@
+"""
+Shared test setup. divadiva_core reads LOCALAPPDATA when it is first
+imported, so it is pointed at a throwaway directory before any test module
+imports it; tests that write app files patch the paths they use as well.
+"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_app_data = tempfile.mkdtemp(prefix="divadiva_tests_")
+os.environ['LOCALAPPDATA'] = _app_data
+atexit.register(shutil.rmtree, _app_data, ignore_errors=True)
+
+
+def _module(mid, name, character='MIKU', source='', items=()):
+    """A module dict shaped like parse_modules_csv() output; items are (Item ID, Object(s), Type)."""
+    return {
+        'Module ID': mid,
+        'Name (EN)': name,
+        'Name (JP)': '',
+        'Character': character,
+        'Source': source,
+        'COS ID': '',
+        'Names': {'Module ID': mid, 'Name (EN)': name, 'Name (JP)': ''},
+        'Items': [{'Item ID': item_id, 'Object(s)': objects, 'Type': item_type} for item_id, objects, item_type in items],
+    }
+
+@pytest.fixture
+def make_module():
+    return _module
@@ -0,0 +1,65 @@
+from divadiva_core import FuzzyModuleIndex, bounded_edit_distance
+
+
+def build(make_module, names):
+    modules = {str(n): make_module(str(n), name) for n, name in enumerate(names, 1)}
+    index = FuzzyModuleIndex()
+    index.rebuild(modules)
+    return index, modules
+
+def name_of(modules, mid):
+    return modules[mid]['Name (EN)']
+
+def test_edit_distance_counts_swaps_once_and_stops_at_limit():
+    assert bounded_edit_distance("miku", "mkiu", 2) == 1
+    assert bounded_edit_distance("miku", "kimu", 2) == 2
+    assert bounded_edit_distance("append", "apend", 1) == 1
+    assert bounded_edit_distance("racing", "school", 2) == 3
+
+def test_substring_tiers_come_first(make_module):
+    index, modules = build(make_module, ["Miku Append", "Deep Sky Miku", "Mikudayo", "Append"])
+    # Display names are "[id] name (MIKU)": "append" starts a word in both, so the catalog order decides
+    assert [name_of(modules, mid) for mid in index.search("append")] == ["Miku Append", "Append"]
+    assert index.search("[4] append (miku)") == ['4']
+    # A match at a word start beats one inside a word, whatever the catalog order
+    index, _ = build(make_module, ["Mikudayo", "Dayo Fan"])
+    assert index.search("dayo") == ['2', '1']
+
+def test_typos_are_tolerated(make_module):
+    index, modules = build(make_module, ["Racing Miku 2010", "School Uniform", "Hatsune Miku Append"])
+    assert index.search("racign")[:1] == ['1']
+    assert index.search("shcool unifrom")[:1] == ['2']
+    assert index.search("hatune miku")[:1] == ['3']
+    assert index.search("xyzzy") == []
+
+def test_letters_in_order_fall_back_to_a_subsequence_scan(make_module):
+    index, _ = build(make_module, ["Racing Miku", "School Uniform"])
+    assert index.search("rcng") == ['1']
+    assert index.search("rcng", accept=lambda mid: mid != '1') == []
+
+def test_every_match_class_is_cut_to_the_limit(make_module):
+    index, _ = build(make_module, [f"Racing Miku {n}" for n in range(300)] + ["Racer"])
+    ranked, total = index.search_counted("racing", limit=10)
+    assert len(ranked) == 10 and total == 300
+    ranked, total = index.search_counted("racng", limit=5)
+    assert len(ranked) == 5 and total >= 300
+    assert index.search_counted("   ") == ([], 0)
+
+def test_order_breaks_ties_and_accept_filters(make_module):
+    index, _ = build(make_module, ["Cute A", "Cute B", "Cute C"])
+    order = {'3': 0, '1': 1, '2': 2}
+    assert index.search("cute", order=order) == ['3', '1', '2']
+    assert index.search("cute", accept=lambda mid: mid != '1', order=order) == ['3', '2']
+
+def test_update_matches_rebuild(make_module):
+    index, modules = build(make_module, ["Racing Miku", "School Uniform", "Append"])
+    modules['2'] = make_module('2', "Summer Dress")
+    del modules['3']
+    modules['4'] = make_module('4', "Racing Rin")
+    index.update(modules, {'2', '3', '4'})
+
+    fresh = FuzzyModuleIndex()
+    fresh.rebuild(modules)
+    assert index.postings == fresh.postings
+    for query in ("racing", "school", "sumer dres", "append"):
+        assert sorted(index.search(query)) == sorted(fresh.search(query))
@@ -0,0 +1,91 @@
+import csv
+
+import pytest
+
+import divadiva_core as core
+from divadiva_core import LayeredCatalog, file_stamp, load_catalog_layer
+
+FIELDS = ['Module ID', 'Name (EN)', 'Name (JP)', 'Character', 'Source', 'COS ID', 'Item ID', 'Object(s)', 'Type']
+
+
+@pytest.fixture(autouse=True)
+def cache_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, 'CACHE_FOLDER', str(tmp_path / "cache"))
+
+def write_layer(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        for row in rows:
+            writer.writerow([row.get(field, '') for field in FIELDS])
+    return str(path)
+
+BASE = [
+    {'Module ID': '1', 'Name (EN)': "Append", 'Character': 'MIKU', 'Source': 'F', 'Item ID': '1', 'Object(s)': 'mikitm001', 'Type': 'Head'},
+    {'Module ID': '1', 'Name (EN)': "Append", 'Character': 'MIKU', 'Source': 'F', 'Item ID': '2', 'Object(s)': 'mikitm002', 'Type': 'Body'},
+    {'Module ID': '2', 'Name (EN)': "Uniform", 'Character': 'RIN', 'Item ID': '1', 'Object(s)': 'rinitm001', 'Type': 'Body'},
+]
+OVERLAY = [
+    # Blank fields keep the base values; Item ID 2 is replaced and 3 appended
+    {'Module ID': '1', 'Name (EN)': "Append (fixed)", 'Item ID': '2', 'Object(s)': 'mikitm002b', 'Type': 'Body'},
+    {'Module ID': '1', 'Item ID': '3', 'Object(s)': 'mikitm003', 'Type': 'Hand'},
+    {'Module ID': '9', 'Name (EN)': "Mod Module", 'Character': 'LEN', 'Item ID': '1', 'Object(s)': 'lenitm900', 'Type': 'Head'},
+]
+
+def test_overlay_fields_and_items_take_precedence(tmp_path):
+    base = write_layer(tmp_path / "base.csv", BASE)
+    overlay = write_layer(tmp_path / "mod.csv", OVERLAY)
+    catalog = LayeredCatalog()
+    assert catalog.refresh([base, overlay]) == {'1', '2', '9'}
+
+    module = catalog.modules['1']
+    assert (module['Name (EN)'], module['Character'], module['Source']) == ("Append (fixed)", 'MIKU', 'F')
+    assert [(item['Item ID'], item['Object(s)']) for item in module['Items']] == [
+        ('1', 'mikitm001'), ('2', 'mikitm002b'), ('3', 'mikitm003')]
+    assert catalog.modules['9']['Character'] == 'LEN'
+
+def test_refresh_reports_only_changed_modules(tmp_path):
+    base = write_layer(tmp_path / "base.csv", BASE)
+    overlay = write_layer(tmp_path / "mod.csv", OVERLAY)
+    catalog = LayeredCatalog()
+    catalog.refresh([base, overlay])
+    assert catalog.refresh([base, overlay]) == set()
+
+    write_layer(tmp_path / "mod.csv", OVERLAY[2:] + [{'Module ID': '9', 'Item ID': '2', 'Object(s)': 'lenitm901', 'Type': 'Body'}])
+    assert catalog.refresh([base, overlay]) == {'1', '9'}
+    assert catalog.modules['1']['Name (EN)'] == "Append"
+
+    # Dropping the overlay removes what only it defined
+    assert catalog.refresh([base]) == {'9'}
+    assert set(catalog.modules) == {'1', '2'}
+
+def test_layer_order_decides_precedence(tmp_path):
+    a = write_layer(tmp_path / "a.csv", [{'Module ID': '1', 'Name (EN)': "From A"}])
+    b = write_layer(tmp_path / "b.csv", [{'Module ID': '1', 'Name (EN)': "From B"}])
+    catalog = LayeredCatalog()
+    catalog.refresh([a, b])
+    assert catalog.modules['1']['Name (EN)'] == "From B"
+    assert catalog.refresh([b, a]) == {'1'}
+    assert catalog.modules['1']['Name (EN)'] == "From A"
+
+def test_broken_overlay_is_reported_but_base_is_required(tmp_path):
+    base = write_layer(tmp_path / "base.csv", BASE)
+    broken = tmp_path / "broken.csv"
+    broken.write_bytes(b"Module ID,Name (EN)\n1,\xff\xfe\n")
+    catalog = LayeredCatalog()
+    catalog.refresh([base, str(broken)])
+    assert [path for path, _ in catalog.errors] == [str(broken)]
+    assert catalog.modules['1']['Name (EN)'] == "Append"
+    with pytest.raises(Exception):
+        LayeredCatalog().refresh([str(broken)])
+
+def test_parsed_layers_are_cached_by_stamp(tmp_path, monkeypatch):
+    base = write_layer(tmp_path / "base.csv", BASE)
+    parsed = load_catalog_layer(base, file_stamp(base))
+
+    def fail(path):
+        raise AssertionError("parsed again")
+    monkeypatch.setattr(core, 'parse_modules_csv', fail)
+    assert load_catalog_layer(base, file_stamp(base)) == parsed
+    with pytest.raises(AssertionError):
+        load_catalog_layer(base, (0, 0)) # A different stamp means the file changed
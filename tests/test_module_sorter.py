@@ -0,0 +1,49 @@
+from divadiva_core import ModuleSorter
+
+
+def catalog(make_module):
+    modules = [
+        make_module('10', "Racing Miku", 'MIKU', 'F 2nd', [('1', 'mikitm100', 'Head')]),
+        make_module('2', "School Uniform", 'RIN', 'F', [('1', 'rinitm200', 'Body'), ('2', 'rinitm201', 'Head')]),
+        make_module('1', "Append", 'MIKU', ''),
+        make_module('x7', "append", 'LEN', 'X'),
+    ]
+    return {module['Module ID']: module for module in modules}
+
+def test_module_id_sorts_numerically_then_text(make_module):
+    sorter = ModuleSorter()
+    sorter.rebuild(catalog(make_module))
+    assert sorter.sorted_keys([('Module ID', False)]) == ['1', '2', '10', 'x7']
+    assert sorter.sorted_keys([('Module ID', True)]) == ['x7', '10', '2', '1']
+
+def test_equal_keys_fall_back_to_module_id(make_module):
+    sorter = ModuleSorter()
+    sorter.rebuild(catalog(make_module))
+    # "Append" and "append" compare equal, so Module ID decides
+    assert sorter.sorted_keys([('Name (EN)', False)]) == ['1', 'x7', '10', '2']
+    assert sorter.sorted_keys([('Character', False), ('Item Count', True)]) == ['x7', '10', '1', '2']
+
+def test_blank_values_sort_last(make_module):
+    sorter = ModuleSorter()
+    sorter.rebuild(catalog(make_module))
+    assert sorter.sorted_keys([('Source', False)])[-1] == '1'
+
+def test_update_matches_rebuild(make_module):
+    modules = catalog(make_module)
+    sorter = ModuleSorter()
+    sorter.rebuild(modules)
+    sorter.sorted_keys([('Name (EN)', False)]) # Cached order must not survive the update
+    modules['2'] = make_module('2', "Art Deco", 'RIN')
+    del modules['10']
+    modules['3'] = make_module('3', "Zeus", 'KAITO')
+    sorter.update(modules, {'2', '10', '3'})
+
+    fresh = ModuleSorter()
+    fresh.rebuild(modules)
+    for spec in ([('Name (EN)', False)], [('Character', True), ('Module ID', False)], [('Item Count', False)]):
+        assert sorter.sorted_keys(spec) == fresh.sorted_keys(spec)
+
+def test_unknown_fields_are_ignored(make_module):
+    sorter = ModuleSorter()
+    sorter.rebuild(catalog(make_module))
+    assert sorter.sorted_keys([('No Such Field', True)]) == ['1', '2', '10', 'x7']
@@ -0,0 +1,46 @@
+from divadiva_core import NoteSearchIndex
+
+
+def setup_index(make_module):
+    catalog = {'10': make_module('10', "Racing Miku", items=[('1', 'mikitm100', 'Head')])}
+    notes = {
+        'Outfits': [('10', '1', "goggles for the race"), ('20', '5', "plain shirt")],
+        'Favourites': [('20', '5', "best shirt")],
+    }
+    index = NoteSearchIndex()
+    index.rebuild(notes, catalog)
+    return index, notes, catalog
+
+def test_matches_every_word_by_prefix(make_module):
+    index, _, _ = setup_index(make_module)
+    assert index.search("shi") == [('Favourites', 0), ('Outfits', 1)]
+    assert index.search("best SHIRT") == [('Favourites', 0)]
+    assert index.search("shirt goggles") == []
+    assert index.search("  ") == []
+
+def test_indexes_catalog_names_objects_and_ids(make_module):
+    index, _, _ = setup_index(make_module)
+    assert index.search("racing") == [('Outfits', 0)]
+    assert index.search("mikitm") == [('Outfits', 0)]
+    assert index.search("outfits 20") == [('Outfits', 1)]
+
+def test_limit(make_module):
+    index, _, _ = setup_index(make_module)
+    assert index.search("shirt", limit=1) == [('Favourites', 0)]
+
+def test_incremental_updates_match_rebuild(make_module):
+    index, notes, catalog = setup_index(make_module)
+    notes['Outfits'][1] = ('20', '5', "striped jacket")
+    index.update_item('Outfits', 1, notes['Outfits'][1], catalog)
+    notes['Outfits'].pop(0)
+    index.reindex_note('Outfits', notes['Outfits'], catalog)
+    del notes['Favourites']
+    index.remove_note('Favourites')
+    notes['New'] = [('10', '1', "shirt")]
+    index.add_item('New', 0, notes['New'][0], catalog)
+
+    fresh = NoteSearchIndex()
+    fresh.rebuild(notes, catalog)
+    assert index.postings == fresh.postings
+    assert index.search("shirt") == [('New', 0)]
+    assert index.search("jacket") == [('Outfits', 0)]
@@ -0,0 +1,61 @@
+import pytest
+
+from divadiva_core import import_notes, iter_note_rows, export_notes
+
+
+def existing():
+    notes = {'Outfits': [('10', '1', "old"), ('20', '5', "shirt")]}
+    return notes, ['Outfits']
+
+ROWS = [
+    ('Outfits', '10', '1', "new"), # Conflicts with an existing item
+    ('Outfits', '20', '5', "shirt"), # Same as the existing item
+    ('Hair', '30', '2', "long"),
+]
+
+def test_skip_keeps_existing_items():
+    notes, order = existing()
+    stats = import_notes(ROWS, notes, order, policy='skip')
+    assert notes['Outfits'] == [('10', '1', "old"), ('20', '5', "shirt")]
+    assert notes['Hair'] == [('30', '2', "long")]
+    assert order == ['Outfits', 'Hair']
+    assert (stats['added'], stats['updated'], stats['skipped']) == (1, 0, 2)
+    assert stats['touched'] == {'Hair'}
+
+def test_overwrite_replaces_changed_descriptions():
+    notes, order = existing()
+    stats = import_notes(ROWS, notes, order, policy='overwrite')
+    assert notes['Outfits'] == [('10', '1', "new"), ('20', '5', "shirt")]
+    assert (stats['added'], stats['updated'], stats['skipped']) == (1, 1, 1)
+    assert stats['touched'] == {'Outfits', 'Hair'}
+
+def test_keep_both_appends_conflicts():
+    notes, order = existing()
+    stats = import_notes(ROWS, notes, order, policy='keep_both')
+    assert notes['Outfits'][2:] == [('10', '1', "new"), ('20', '5', "shirt")]
+    assert (stats['added'], stats['updated'], stats['skipped']) == (3, 0, 0)
+
+def test_rows_outside_the_catalog_are_invalid():
+    notes, order = existing()
+    rows = ROWS + [('Hair', '99', '9', "gone"), ('  ', '30', '2', "no name")]
+    stats = import_notes(rows, notes, order, valid_items={('10', '1'), ('20', '5'), ('30', '2')})
+    assert stats['invalid'] == 2
+    assert stats['invalid_rows'] == [('Hair', '99', '9'), ('', '30', '2')]
+    assert notes['Hair'] == [('30', '2', "long")]
+
+def test_unknown_policy_is_rejected():
+    notes, order = existing()
+    with pytest.raises(ValueError):
+        import_notes(ROWS, notes, order, policy='merge')
+
+@pytest.mark.parametrize('filename', ['notes.csv', 'notes.jsonl'])
+def test_export_then_import_round_trips(tmp_path, filename):
+    rows = [('Outfits', '10', '1', 'comma, "quotes"'), ('Hair', '30', '2', "line\nbreak")]
+    path = str(tmp_path / filename)
+    assert export_notes(iter(rows), path) == 2
+    assert list(iter_note_rows(path)) == rows
+
+def test_csv_header_and_short_rows_are_skipped(tmp_path):
+    path = tmp_path / "notes.csv"
+    path.write_text("note,module_id,item_id,description\nOutfits,10\nOutfits,10,1,goggles\n", encoding='utf-8')
+    assert list(iter_note_rows(str(path))) == [('Outfits', '10', '1', "goggles")]
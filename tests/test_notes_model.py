@@ -0,0 +1,79 @@
+import pytest
+
+import divadiva_core as core
+from divadiva_core import NotesModel, load_notes, save_all_notes
+
+
+@pytest.fixture(autouse=True)
+def notes_csv(tmp_path, monkeypatch):
+    path = str(tmp_path / "notes.csv")
+    monkeypatch.setattr(core, 'NOTES_CSV', path)
+    return path
+
+@pytest.fixture
+def model():
+    model = NotesModel()
+    model.events = []
+    model.subscribe(model.events.append)
+    model.sync()
+    return model
+
+def test_edits_emit_events_and_save(model):
+    assert model.events == [('reset',)]
+    assert model.add_items('Outfits', [('10', '1', "goggles"), ('20', '5', "shirt")]) == 0
+    model.update_item('Outfits', 1, ('20', '5', "striped shirt"))
+    model.remove_item('Outfits', 0)
+    assert model.events[1:] == [
+        ('note_added', 'Outfits', 0),
+        ('item_inserted', 'Outfits', 0, ('10', '1', "goggles")),
+        ('item_inserted', 'Outfits', 1, ('20', '5', "shirt")),
+        ('item_updated', 'Outfits', 1, ('20', '5', "striped shirt")),
+        ('item_removed', 'Outfits', 0),
+    ]
+    assert load_notes() == ({'Outfits': [('20', '5', "striped shirt")]}, ['Outfits'])
+
+def test_removing_the_last_item_removes_the_note(model):
+    model.add_items('A', [('1', '1', "")])
+    model.add_items('B', [('2', '1', "")])
+    model.remove_item('A', 0)
+    assert model.events[-1] == ('note_removed', 'A', 0)
+    assert model.order == ['B']
+    assert not model.add_note('B')
+
+def test_reload_refills_in_place(model):
+    notes, order = model.notes, model.order
+    save_all_notes({'Hair': [('30', '2', "long")]})
+    assert model.sync()
+    assert notes is model.notes and order is model.order
+    assert order == ['Hair']
+    assert not model.sync() # Unchanged on disk
+
+def test_import_reports_new_and_changed_notes(model):
+    model.add_items('Outfits', [('10', '1', "old")])
+    del model.events[:]
+    stats = model.import_rows([('Outfits', '10', '1', "new"), ('Hair', '30', '2', "long")], policy='overwrite')
+    assert (stats['added'], stats['updated']) == (1, 1)
+    assert model.events[0] == ('note_added', 'Hair', 1)
+    assert sorted(model.events[1:]) == [('note_changed', 'Hair'), ('note_changed', 'Outfits')]
+    assert load_notes()[0]['Outfits'] == [('10', '1', "new")]
+
+def test_a_failed_import_is_rolled_back(model):
+    model.add_items('Outfits', [('10', '1', "old")])
+
+    def rows():
+        yield ('Hair', '30', '2', "long")
+        raise ValueError("bad row")
+    with pytest.raises(ValueError):
+        model.import_rows(rows())
+    assert model.notes == {'Outfits': [('10', '1', "old")]}
+    assert model.events[-1] == ('reset',)
+
+def test_saving_merges_changes_made_on_disk(model):
+    model.add_items('Outfits', [('10', '1', "goggles"), ('20', '5', "shirt")])
+    # Another process (e.g. the CLI) removes one row and adds a note meanwhile
+    save_all_notes({'Outfits': [('10', '1', "goggles")], 'Hair': [('30', '2', "long")]})
+    model.add_items('Outfits', [('40', '1', "gloves")])
+    expected = {'Outfits': [('10', '1', "goggles"), ('40', '1', "gloves")], 'Hair': [('30', '2', "long")]}
+    assert model.notes == expected
+    assert model.events[-1] == ('reset',)
+    assert load_notes()[0] == expected
@@ -0,0 +1,30 @@
+from divadiva_core import OptionIndex
+
+
+OPTIONS = [
+    ("[1] Append (MIKU)", '1'),
+    ("[2] Racing Miku 2010 (MIKU)", '2'),
+    ("[3] School Uniform (RIN)", '3'),
+    ("[4] Miku Append Deep (MIKU)", '4'),
+]
+
+def test_maps_both_directions():
+    index = OptionIndex(OPTIONS)
+    assert index.value_for["[3] School Uniform (RIN)"] == '3'
+    assert index.display_for['2'] == "[2] Racing Miku 2010 (MIKU)"
+
+def test_filter_matches_word_prefixes_in_option_order():
+    index = OptionIndex(OPTIONS)
+    assert index.filter("app") == ["[1] Append (MIKU)", "[4] Miku Append Deep (MIKU)"]
+    assert index.filter("MIKU app") == ["[1] Append (MIKU)", "[4] Miku Append Deep (MIKU)"]
+    assert index.filter("uni sch") == ["[3] School Uniform (RIN)"]
+
+def test_filter_does_not_match_inside_words():
+    index = OptionIndex(OPTIONS)
+    assert index.filter("pend") == []
+
+def test_empty_text_returns_everything_up_to_limit():
+    index = OptionIndex(OPTIONS)
+    assert index.filter("  ") == [display for display, _ in OPTIONS]
+    assert index.filter("", limit=2) == [display for display, _ in OPTIONS[:2]]
+    assert index.filter("miku", limit=1) == ["[1] Append (MIKU)"]
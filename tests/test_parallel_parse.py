@@ -0,0 +1,59 @@
+import csv
+import random
+
+import pytest
+
+import divadiva_core as core
+from divadiva_core import parse_modules_csv, parse_modules_csv_parallel, split_csv_records
+
+FIELDS = ['Module ID', 'Name (EN)', 'Name (JP)', 'Character', 'Source', 'COS ID', 'Item ID', 'Object(s)', 'Type']
+
+
+@pytest.fixture
+def catalog_csv(tmp_path):
+    """A catalog with the awkward cases: quoted newlines, quotes, non-ASCII, repeats, short and empty rows."""
+    rng = random.Random(7)
+    path = tmp_path / "modules.csv"
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        for n in range(300):
+            mid = str(rng.randrange(60)) # Modules recur far apart, so they span chunks
+            name = rng.choice(["Append", 'Line\nbreak', 'Say "hi", twice', "初音ミク", ""])
+            item = str(rng.randrange(4))
+            writer.writerow([mid, name, "", rng.choice(['MIKU', 'RIN']), "F", "", item, f"obj{mid}_{item}", "Head"])
+            if n % 50 == 0:
+                writer.writerow([])
+                writer.writerow([mid, "Short row"])
+                writer.writerow(["", "No Module ID"])
+                writer.writerow([mid, "Extra", "", "MIKU", "", "", "9", "objx", "Body", "spill"])
+    return str(path)
+
+def test_boundaries_cut_only_between_records(catalog_csv):
+    with open(catalog_csv, newline='', encoding='utf-8') as f:
+        expected = list(csv.reader(f))
+    with open(catalog_csv, 'rb') as f:
+        data = f.read()
+    for chunk_size, block_size in ((1, 7), (64, 16), (500, 1024 * 1024)):
+        boundaries = split_csv_records(catalog_csv, chunk_size, block_size=block_size)
+        assert boundaries[0] == 0 and boundaries[-1] == len(data)
+        records = []
+        for start, end in zip(boundaries, boundaries[1:]):
+            records.extend(csv.reader(data[start:end].decode('utf-8').splitlines(True)))
+        assert records == expected
+
+@pytest.mark.parametrize('chunk_size', [1, 200, 4096])
+@pytest.mark.parametrize('max_workers', [1, 3])
+def test_parallel_parse_matches_sequential(catalog_csv, monkeypatch, chunk_size, max_workers):
+    split = core.split_csv_records
+    # The real function never cuts below 1 MB; force small chunks so modules span them
+    monkeypatch.setattr(core, 'split_csv_records', lambda path, _size: split(path, chunk_size, block_size=97))
+    expected = parse_modules_csv(catalog_csv)
+    parsed = parse_modules_csv_parallel(catalog_csv, max_workers=max_workers)
+    assert list(parsed) == list(expected)
+    assert parsed == expected
+
+def test_header_only_file(tmp_path):
+    path = tmp_path / "empty.csv"
+    path.write_text(",".join(FIELDS) + "\n", encoding='utf-8')
+    assert parse_modules_csv_parallel(str(path), max_workers=2) == {}
@@ -0,0 +1,52 @@
+from divadiva_core import RecentItems
+
+
+def archive(tmp_path, name, data=b"FArc"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+def test_record_keeps_newest_first_without_duplicates(tmp_path):
+    recent = RecentItems(str(tmp_path / "recent.json"), max_entries=3)
+    recent.record([('a', archive(tmp_path, "a.farc")), ('b', archive(tmp_path, "b.farc"))])
+    recent.record([('c', archive(tmp_path, "c.farc")), ('A', archive(tmp_path, "a.farc"))])
+    assert [entry['object'] for entry in recent.entries] == ['c', 'A', 'b']
+    recent.record([('d', archive(tmp_path, "d.farc"))])
+    assert [entry['object'] for entry in recent.entries] == ['d', 'c', 'A']
+
+def test_resolve_checks_the_file_is_still_there(tmp_path):
+    recent = RecentItems(str(tmp_path / "recent.json"))
+    path = archive(tmp_path, "a.farc")
+    recent.record([('a', path)])
+    assert recent.resolve('A') == path
+    assert recent.resolve('unknown') is None
+
+    (tmp_path / "a.farc").write_bytes(b"FArc, now larger")
+    assert recent.resolve('a') == path # A changed stamp is refreshed, not a miss
+    (tmp_path / "a.farc").unlink()
+    assert recent.resolve('a') is None
+    assert recent.get('a')['valid'] is False
+
+def test_paths_are_only_trusted_for_the_same_roots(tmp_path):
+    recent = RecentItems(str(tmp_path / "recent.json"))
+    path = archive(tmp_path, "a.farc")
+    recent.record([('a', path)], roots=['mods', 'items'])
+    assert recent.resolve('a', ['mods', 'items']) == path
+    assert recent.resolve('a', ['items', 'mods']) is None # Precedence changed
+    assert recent.resolve('a', ['items']) is None
+
+def test_entries_survive_a_reload(tmp_path):
+    recent = RecentItems(str(tmp_path / "recent.json"))
+    path = archive(tmp_path, "a.farc")
+    recent.record([('a', path)], roots=['items'])
+    loaded = RecentItems(str(tmp_path / "recent.json"))
+    loaded.load()
+    assert loaded.resolve('a', ['items']) == path
+    loaded.remove('a')
+    assert loaded.entries == []
+
+def test_a_corrupt_file_loads_as_empty(tmp_path):
+    (tmp_path / "recent.json").write_text("{not json", encoding='utf-8')
+    recent = RecentItems(str(tmp_path / "recent.json"))
+    recent.load()
+    assert recent.entries == []
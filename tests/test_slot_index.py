@@ -0,0 +1,45 @@
+from divadiva_core import SlotItemIndex
+
+
+def catalog(make_module):
+    modules = [
+        make_module('1', "Append", 'MIKU', items=[('1', 'mikitm001', 'Head'), ('2', 'mikitm002', 'Body')]),
+        make_module('2', "Append B", 'MIKU', items=[('1', 'MIKITM001', 'Head'), ('2', '', 'Body')]),
+        make_module('3', "Uniform", 'RIN', items=[('1', 'rinitm001,rinitm002', 'Body')]),
+    ]
+    return {module['Module ID']: module for module in modules}
+
+def test_candidates_share_objects_across_modules(make_module):
+    index = SlotItemIndex()
+    index.rebuild(catalog(make_module))
+    heads = index.candidates('MIKU', 'Head')
+    assert len(heads) == 1
+    assert heads[0]['sources'] == [('1', '1'), ('2', '1')]
+    assert index.candidates('MIKU', 'Body')[0]['Object(s)'] == 'mikitm002' # Blank objects are skipped
+    assert index.candidates('RIN', 'Body')[0]['Object(s)'] == 'rinitm001, rinitm002'
+    assert index.candidates('LEN', 'Head') == []
+
+def test_characters_and_types(make_module):
+    index = SlotItemIndex()
+    index.rebuild(catalog(make_module))
+    assert index.characters() == ['MIKU', 'RIN']
+    assert index.types() == ['Body', 'Head']
+    assert index.types('RIN') == ['Body']
+
+def test_update_matches_rebuild(make_module):
+    modules = catalog(make_module)
+    index = SlotItemIndex()
+    index.rebuild(modules)
+    del modules['1']
+    modules['3'] = make_module('3', "Uniform", 'RIN', items=[('1', 'rinitm003', 'Hand')])
+    modules['4'] = make_module('4', "Cape", 'LEN', items=[('1', 'lenitm001', 'Back')])
+    index.update(modules, {'1', '3', '4'})
+
+    fresh = SlotItemIndex()
+    fresh.rebuild(modules)
+    def summary(slots):
+        # The displayed spelling of a shared object may come from either module
+        return {slot: {key: sorted(c['sources']) for key, c in found.items()} for slot, found in slots.items()}
+    assert summary(index.slots) == summary(fresh.slots)
+    assert index.candidates('MIKU', 'Head')[0]['sources'] == [('2', '1')]
+    assert ('MIKU', 'Body') not in index.slots
@@ -0,0 +1,101 @@
+import pytest
+
+from divadiva_core import ModuleSorter, UsageStats
+
+DAY = 86400.0
+
+
+def stats(tmp_path, **kwargs):
+    usage = UsageStats(str(tmp_path / "usage.json"), **kwargs)
+    usage.epoch = 0.0
+    return usage
+
+def assert_consistent(usage):
+    # Equal scores may be in either order (the latest use goes first), so compare scores, not IDs
+    scores = [usage.scores[mid] for mid in usage.order]
+    assert sorted(usage.order) == sorted(usage.scores)
+    assert scores == sorted(scores, reverse=True)
+    assert usage.ranks == {mid: rank for rank, mid in enumerate(usage.order)}
+
+def test_counts_halve_every_half_life(tmp_path):
+    usage = stats(tmp_path, half_life_days=10)
+    usage.record('1', 4.0, now=0.0)
+    assert usage.count('1', now=10 * DAY) == pytest.approx(2.0)
+    assert usage.count('1', now=20 * DAY) == pytest.approx(1.0)
+    assert usage.count('unused', now=0.0) == 0.0
+
+def test_recent_uses_outrank_old_ones(tmp_path):
+    usage = stats(tmp_path, half_life_days=10)
+    for _ in range(3):
+        usage.record('old', now=0.0)
+    usage.record('new', now=30 * DAY) # 3 uses three half-lives ago count as 0.375 now
+    assert usage.order == ['new', 'old']
+    usage.record('old', now=30 * DAY)
+    assert usage.order == ['old', 'new']
+    assert_consistent(usage)
+
+def test_ties_go_to_the_latest_use(tmp_path):
+    usage = stats(tmp_path)
+    usage.record('a', now=0.0)
+    usage.record('b', now=0.0)
+    assert usage.order == ['b', 'a']
+
+def test_order_and_ranks_stay_consistent(tmp_path):
+    usage = stats(tmp_path, half_life_days=1)
+    for step in range(200):
+        usage.record(str(step * 7 % 13), weight=1 + step % 3, now=step * DAY / 8)
+        assert_consistent(usage)
+    assert usage.dirty
+
+def test_scores_are_rescaled_before_overflowing(tmp_path):
+    usage = stats(tmp_path, half_life_days=1)
+    usage.record('a', now=0.0)
+    usage.record('b', now=600 * DAY) # Past MAX_EXPONENT half-lives
+    assert usage.epoch == 600 * DAY
+    assert usage.order == ['b', 'a']
+    assert usage.count('b', now=600 * DAY) == pytest.approx(1.0)
+    assert_consistent(usage)
+
+def test_least_used_modules_are_dropped(tmp_path):
+    usage = stats(tmp_path, max_modules=2)
+    usage.record('a', 3.0, now=0.0)
+    usage.record('b', 2.0, now=0.0)
+    usage.record('c', 1.0, now=0.0)
+    assert usage.order == ['a', 'b']
+    assert 'c' not in usage.scores and 'c' not in usage.ranks
+
+def test_save_load_and_clear(tmp_path):
+    usage = stats(tmp_path)
+    usage.record('a', now=0.0)
+    usage.record('b', 2.0, now=0.0)
+    usage.save()
+    assert not usage.dirty
+    loaded = UsageStats(usage.path)
+    loaded.load()
+    assert (loaded.epoch, loaded.order) == (0.0, ['b', 'a'])
+    loaded.clear()
+    again = UsageStats(usage.path)
+    again.load()
+    assert again.order == []
+
+def test_a_corrupt_file_loads_as_empty(tmp_path):
+    (tmp_path / "usage.json").write_text('{"epoch": "soon"}', encoding='utf-8')
+    usage = UsageStats(str(tmp_path / "usage.json"))
+    usage.load()
+    assert usage.order == [] and not usage.dirty
+
+def test_usage_ranks_as_a_sort_field(tmp_path, make_module):
+    modules = {mid: make_module(mid, f"Module {mid}") for mid in ('1', '2', '3', '4')}
+    sorter = ModuleSorter()
+    sorter.rebuild(modules)
+    usage = stats(tmp_path)
+    usage.record('3', now=0.0)
+    sorter.set_ranks("Most Used", usage.ranks)
+    assert sorter.sorted_keys([("Most Used", False)]) == ['3', '1', '2', '4'] # Unused ones by Module ID
+
+    usage.record('2', 5.0, now=0.0)
+    sorter.set_ranks("Most Used", usage.ranks)
+    assert sorter.sorted_keys([("Most Used", False)]) == ['2', '3', '1', '4']
+    sorter.rebuild(modules) # The field survives a catalog reload
+    assert "Most Used" in sorter.fields
+    assert sorter.sorted_keys([("Most Used", False)]) == ['2', '3', '1', '4']